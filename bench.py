@@ -0,0 +1,2128 @@
+import argparse
+import bisect
+import collections
+import contextlib
+import datetime
+import gzip
+import importlib.util
+import itertools
+import json
+import os
+import random
+import shutil
+import signal
+import socket
+import sqlite3
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import types
+import urllib.error
+import urllib.request
+
+import core
+import collector
+
+
+# =========================================================
+# 공통: 임시 DB / 가짜 작업 데이터
+# =========================================================
+def make_temp_db(workdir, name):
+    path = os.path.join(workdir, name)
+    core.DB_PATH = path
+    core.init_db()
+    core.update_setting("retention_months", 0)     # 합성 로그는 2024년 날짜라 엔진 / 수집 서버가 보관으로 옮기지 않도록
+    return path
+
+def sample_records(n, seed=0):
+    rnd = random.Random(seed)
+    base = datetime.datetime(2024, 1, 1, 9, 0, 0)
+    records = []
+    for i in range(n):
+        is_color = 1 if rnd.random() < 0.2 else 0
+        size = "A3" if rnd.random() < 0.1 else "A4"
+        pages = rnd.randint(1, 30)
+        unit = 200 if is_color else 50
+        if size == "A3": unit *= 2
+        t = (base + datetime.timedelta(seconds=i)).strftime("%Y-%m-%d %H:%M:%S")
+        records.append((i + 1, f"Printer-{i % 8}", "PC-BENCH", f"user{rnd.randint(1, 50)}",
+                        f"문서_{i}.pdf", pages, size, is_color, unit, pages * unit, t, "PRINTED", t))
+    return records
+
+def synthetic_records(rows, days=365, end=datetime.date(2024, 12, 31), seed=0):
+    # days 일에 걸쳐 rows 건의 로그를 시간순으로 만든다 (LOG_COLUMNS 순서)
+    rnd = random.Random(seed)
+    start = datetime.datetime.combine(end - datetime.timedelta(days=days - 1), datetime.time(0, 0))
+    step = days * 86400 / rows
+    for i in range(rows):
+        is_color = 1 if rnd.random() < 0.2 else 0
+        r = rnd.random()
+        size = "A3" if r < 0.1 else ("Etc" if r < 0.13 else "A4")
+        pages = rnd.randint(1, 30)
+        unit = 200 if is_color else 50
+        if size == "A3": unit *= 2
+        t = (start + datetime.timedelta(seconds=i * step)).strftime("%Y-%m-%d %H:%M:%S")
+        yield (i + 1, f"Printer-{rnd.randint(0, 9)}", f"PC-{rnd.randint(0, 4)}", f"user{rnd.randint(1, 300)}",
+               f"문서_{i}.pdf", pages, size, is_color, unit, pages * unit, t, "PRINTED", t)
+
+# 현실적인 합성 로그: 사용자 / 프린터 쏠림(지프), 출근 시간대 몰림 + 연속 출력 묶음, 주말 / 월말 차이,
+# 용지(A4 / A3 / 기타)와 컬러 비율은 사용자 / 프린터마다 다르게
+HOUR_WEIGHTS = (0.02, 0.01, 0.01, 0.01, 0.01, 0.02, 0.05, 0.2, 0.6, 1.6, 1.8, 1.5, 0.5, 1.2, 1.7, 1.6, 1.4, 1.0,
+                0.4, 0.2, 0.1, 0.06, 0.04, 0.03)
+WEEKDAY_WEIGHTS = (1.0, 1.05, 1.0, 0.95, 0.9, 0.12, 0.05)
+DOC_KINDS = ("보고서", "회의자료", "견적서", "계약서", "공문", "발표자료", "영수증", "도면", "교안", "Invoice", "Report", "scan")
+DOC_EXTS = (".pdf", ".hwp", ".docx", ".xlsx", ".pptx", ".jpg")
+
+def zipf_weights(n, s=1.1):
+    # 순위 k 의 비중 1/k^s 누적값 (bisect 로 뽑기)
+    total, cum = 0.0, []
+    for k in range(1, n + 1):
+        total += 1.0 / k ** s
+        cum.append(total)
+    return cum
+
+def pick(rnd, cum):
+    return bisect.bisect(cum, rnd.random() * cum[-1])
+
+def realistic_records(rows, days=365, end=datetime.date(2024, 12, 31), seed=0, users=400, printers=30):
+    # days 일에 걸쳐 정확히 rows 건을 시간순으로 (LOG_INSERT_SQL 순서). 금액은 지금 요금표 기준
+    rnd = random.Random(seed)
+    tariff = {k: core.current_settings[k] for k in core.TARIFF_KEYS}
+    unit_costs = {(size, color): core.calc_unit_cost(tariff, size, color) for size in ("A4", "A3", "Etc") for color in (0, 1)}
+    printer_cum = zipf_weights(printers, 1.0)
+    printer_names = [f"Printer-{p:02d}" for p in range(printers)]
+    a3_rates = [rnd.choice((0.02, 0.04, 0.15, 0.25)) for _ in range(printers)]     # 큰 복합기만 A3 가 많음
+    # 사용자: 자리 PC (일부는 공용 PC), 주로 쓰는 프린터, 컬러 비율
+    profiles = [(f"user{u + 1:03d}", f"PC-{min(u, users * 3 // 4) + 1:03d}", pick(rnd, printer_cum), rnd.betavariate(1.2, 4.0))
+                for u in range(users)]
+    user_cum = zipf_weights(users, 1.05)
+    doc_cum = zipf_weights(max(1000, rows // 20), 0.9)    # 같은 문서를 여러 번 뽑는 경우가 흔함
+
+    # 날짜별 건수: 요일 / 월말 / 휴일 / 날마다 흔들림 -> 합이 정확히 rows 가 되도록 나눔
+    start = end - datetime.timedelta(days=days - 1)
+    weights = []
+    for d in range(days):
+        day = start + datetime.timedelta(days=d)
+        w = WEEKDAY_WEIGHTS[day.weekday()] * rnd.lognormvariate(0, 0.25)
+        if (day + datetime.timedelta(days=3)).month != day.month: w *= 1.4
+        if rnd.random() < 0.02: w *= 0.1
+        weights.append(w)
+    shares = [rows * w / sum(weights) for w in weights]
+    counts = [int(x) for x in shares]
+    for d in sorted(range(days), key=lambda d: counts[d] - shares[d])[:rows - sum(counts)]:
+        counts[d] += 1
+
+    hour_cum = list(itertools.accumulate(HOUR_WEIGHTS))
+    job_ids = [0] * printers
+    for d, count in enumerate(counts):
+        midnight = datetime.datetime.combine(start + datetime.timedelta(days=d), datetime.time(0, 0))
+        jobs = []
+        while len(jobs) < count:
+            # 연속 출력 묶음: 한 사용자가 몇 초 ~ 몇 분 사이에 몇 건
+            user, computer, home, color_rate = profiles[pick(rnd, user_cum)]
+            printer = home if rnd.random() < 0.85 else pick(rnd, printer_cum)
+            t = pick(rnd, hour_cum) * 3600 + rnd.random() * 3600
+            doc = None
+            for _ in range(min(count - len(jobs), 1 + int(rnd.expovariate(0.6)))):
+                if doc is None or rnd.random() > 0.3:
+                    n = pick(rnd, doc_cum)
+                    doc = f"{DOC_KINDS[n % len(DOC_KINDS)]}_{n:05d}{DOC_EXTS[n // 7 % len(DOC_EXTS)]}"
+                r = rnd.random()
+                size = "A3" if r < a3_rates[printer] else ("Etc" if r < a3_rates[printer] + 0.04 else "A4")
+                is_color = 1 if rnd.random() < color_rate else 0
+                pages = max(1, min(300, int(rnd.lognormvariate(1.0, 1.1) / (3 if size != "A4" else 1))))
+                jobs.append((min(t, 86399), printer, computer, user, doc, pages, size, is_color))
+                t += rnd.expovariate(1 / 15)
+        jobs.sort(key=lambda job: job[0])
+        for t, printer, computer, user, doc, pages, size, is_color in jobs:
+            job_ids[printer] += 1
+            stamp = (midnight + datetime.timedelta(seconds=int(t))).strftime("%Y-%m-%d %H:%M:%S")
+            unit = unit_costs[(size, is_color)]
+            yield (job_ids[printer], printer_names[printer], computer, user, doc, pages, size, is_color,
+                   unit, pages * unit, stamp, "PRINTED", stamp)
+
+def chunked(records, size):
+    batch = []
+    for record in records:
+        batch.append(record)
+        if len(batch) >= size:
+            yield batch
+            batch = []
+    if batch: yield batch
+
+def fill_synthetic_logs(path, rows, days=365, end=datetime.date(2024, 12, 31), seed=0, chunk=50000):
+    conn = sqlite3.connect(path)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=OFF")
+    names = core.NameIds()
+    for batch in chunked(synthetic_records(rows, days, end, seed), chunk):
+        core.insert_logs(conn, batch, names)
+    conn.close()
+
+def bulk_load(path, records, chunk=50000, progress=None):
+    # 대량 적재: 행마다 도는 트리거(일별 집계 / 문서명 색인)와 인덱스를 떼고 넣은 뒤 한 번에 다시 만든다
+    conn = sqlite3.connect(path)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=OFF")
+    saved = conn.execute("SELECT type, name, sql FROM sqlite_master WHERE tbl_name = 'log_entries' "
+                         "AND type IN ('index', 'trigger') AND sql IS NOT NULL ORDER BY type").fetchall()
+    for kind, name, _ in saved:
+        conn.execute(f"DROP {kind} {name}")
+    names = core.NameIds(max_size=1000000)
+    loaded = 0
+    for batch in chunked(records, chunk):
+        core.insert_logs(conn, batch, names)
+        loaded += len(batch)
+        if progress: progress(loaded)
+    with conn:
+        for _, _, sql in saved:
+            conn.execute(sql)
+        if core.HISTORY_FTS: conn.execute("INSERT INTO logs_fts(logs_fts) VALUES ('rebuild')")
+    core.rebuild_daily_summary(conn)
+    conn.execute("ANALYZE")
+    conn.close()
+    return loaded
+
+def timed(fn, repeat=3):
+    best = None
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        result = fn()
+        elapsed = time.perf_counter() - t0
+        best = elapsed if best is None else min(best, elapsed)
+    return best, result
+
+
+# =========================================================
+# 1. 로그 기록 경로: 작업당 연결/커밋 vs LogWriter 배치 커밋
+# =========================================================
+def bench_writer(n_jobs, batch_size, flush_interval):
+    workdir = tempfile.mkdtemp(prefix="pm_bench_")
+    try:
+        records = sample_records(n_jobs)
+
+        # (기존 방식) 작업 하나마다 connect -> INSERT -> commit -> close
+        path = make_temp_db(workdir, "per_job.db")
+        t0 = time.perf_counter()
+        for rec in records:
+            conn = sqlite3.connect(path)
+            cursor = conn.cursor()
+            cursor.execute(core.LOG_INSERT_SQL, rec)
+            conn.commit()
+            conn.close()
+        per_job = time.perf_counter() - t0
+
+        # (LogWriter) 큐에 넣고 종료 시 flush 까지 포함
+        path = make_temp_db(workdir, "writer.db")
+        writer = core.LogWriter(db_path=path, batch_size=batch_size, flush_interval=flush_interval)
+        writer.start()
+        max_depth = 0
+        t0 = time.perf_counter()
+        for rec in records:
+            writer.submit(rec)
+            max_depth = max(max_depth, writer.queue_depth())
+        writer.stop()
+        batched = time.perf_counter() - t0
+
+        conn = sqlite3.connect(path)
+        stored = conn.execute("SELECT COUNT(*) FROM logs").fetchone()[0]
+        conn.close()
+        assert stored == n_jobs, f"기록 누락: {stored}/{n_jobs}"
+
+        print(f"[writer] 작업 {n_jobs:,}건")
+        print(f"  작업당 커밋 : {per_job:8.3f}s  ({n_jobs / per_job:10,.0f} jobs/s)")
+        print(f"  LogWriter   : {batched:8.3f}s  ({n_jobs / batched:10,.0f} jobs/s)"
+              f"  배치 {writer.batches}회, 최대 큐 깊이 {max_depth}")
+        print(f"  속도 향상   : x{per_job / batched:.1f}")
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+def bench_writer_lock(args):
+    # 다른 프로세스가 DB 를 잡고 있는 동안에도 작업이 계속 들어오는 경우 (바쁜 스풀러 + 백업 / 다른 창)
+    # 다시 시도가 큐가 빌 때까지 밀리지 않는지, 그동안 한 번에 기록하려는 batch 가 batch_size 를 넘지 않는지
+    workdir = tempfile.mkdtemp(prefix="pm_bench_")
+    busy_timeout = core.WRITER_BUSY_TIMEOUT
+    devnull = open(os.devnull, "w", encoding="utf-8")
+    try:
+        path = make_temp_db(workdir, "locked.db")
+        core.WRITER_BUSY_TIMEOUT = 0.2      # 잠김을 빨리 알아채게 (실제는 30초 기다린 뒤 다시 시도)
+        writer = core.LogWriter(db_path=path, batch_size=args.batch_size)
+        sizes = []
+        flush = writer._flush
+        def recording_flush(conn, batch, tickets=()):
+            sizes.append(len(batch))
+            return flush(conn, batch, tickets)
+        writer._flush = recording_flush
+
+        blocker = sqlite3.connect(path, isolation_level=None)
+        blocker.execute("BEGIN IMMEDIATE")
+        records = iter(sample_records(int((args.lock + args.tail) * args.rate) + 1))
+        submitted = 0
+        max_depth = 0
+        with contextlib.redirect_stdout(devnull):
+            writer.start()
+            t0 = time.monotonic()
+            released = None
+            resumed = None
+            while time.monotonic() - t0 < args.lock + args.tail:
+                writer.submit(next(records))
+                submitted += 1
+                max_depth = max(max_depth, writer.queue_depth())
+                now = time.monotonic()
+                if released is None and now - t0 >= args.lock:
+                    blocker.rollback()
+                    released = now
+                if released is not None and resumed is None and writer.committed:
+                    resumed = now
+                time.sleep(1 / args.rate)
+            writer.stop()
+        blocker.close()
+
+        conn = sqlite3.connect(path)
+        stored = conn.execute("SELECT COUNT(*) FROM logs").fetchone()[0]
+        conn.close()
+        retries = sum(1 for size in sizes if size) - writer.batches   # 커밋하지 못한 시도
+        print(f"[writer-lock] 잠김 {args.lock:g}s 동안 초당 {args.rate:,}건 계속 제출 (batch_size {args.batch_size})")
+        print(f"  기록 시도 {len(sizes)}회 (잠겨서 실패 {retries}회), 한 번에 기록하려던 최대 {max(sizes):,}건, 최대 큐 깊이 {max_depth:,}")
+        print(f"  잠김이 풀린 뒤 기록 재개까지 {(resumed - released) if resumed else float('nan'):.2f}s "
+              f"(작업이 들어오는 중, 최대 재시도 간격 {core.WRITER_RETRY_MAX:g}s)")
+        print(f"  제출 {submitted:,}건 -> 저장 {stored:,}건, 버림 {writer.failed}건")
+        assert retries > 0 and resumed is not None and max(sizes) <= args.batch_size
+        assert stored == submitted and not writer.failed
+    finally:
+        core.WRITER_BUSY_TIMEOUT = busy_timeout
+        devnull.close()
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+# =========================================================
+# 2. 감시 엔진: 시뮬레이터 스풀러로 처리량 / 탐지 지연 측정
+# =========================================================
+class DetectionProbe:
+    # LogWriter 앞에 끼워서 작업이 감지된 시각을 남긴다.
+    def __init__(self, writer, clock=time.monotonic):
+        self.writer = writer
+        self.clock = clock
+        self.detected = {}
+
+    def submit(self, record):
+        self.detected[(record[1], record[0])] = self.clock()
+        self.writer.submit(record)
+
+    def submit_update(self, update):
+        self.writer.submit_update(update)
+
+    def queue_depth(self):
+        return self.writer.queue_depth()
+
+def percentile(values, q):
+    if not values: return 0.0
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * q))]
+
+def make_spooler(args, speed):
+    if args.replay:
+        return core.SimulatedSpooler.load(args.replay, speed=speed)
+    return core.SimulatedSpooler.synthetic(printers=args.printers, jobs=args.jobs, duration=args.duration, seed=args.seed, speed=speed)
+
+def bench_engine(args):
+    workdir = tempfile.mkdtemp(prefix="pm_bench_")
+    devnull = open(os.devnull, "w", encoding="utf-8")
+    try:
+        # (1) 결정적 재생: 프레임마다 한 번씩 폴링 -> 순수 엔진 처리량
+        spooler = make_spooler(args, speed=None)
+        writer = core.LogWriter(db_path=make_temp_db(workdir, "engine_step.db"))
+        writer.start()
+        processed = core.JobDedup()
+        detected = 0
+        t0 = time.perf_counter()
+        with contextlib.redirect_stdout(devnull):
+            detected += core.poll_once(spooler, writer, processed, "PC-BENCH")
+            while spooler.step():
+                detected += core.poll_once(spooler, writer, processed, "PC-BENCH")
+        elapsed = time.perf_counter() - t0
+        writer.stop()
+        expected = len(spooler.first_seen())
+        print(f"[engine] 프린터 {len(spooler.printers)}대, 프레임 {len(spooler.frames)}개, 작업 {expected:,}건")
+        print(f"  결정적 재생 : 감지 {detected:,}건 / {elapsed:.3f}s  ({detected / elapsed:,.0f} jobs/s, "
+              f"{len(spooler.frames) / elapsed:,.0f} polls/s)")
+
+        # (2) 시간 재생: monitor_loop 를 실제 주기로 돌려 탐지 지연 측정
+        spooler = make_spooler(args, speed=args.speed)
+        writer = core.LogWriter(db_path=make_temp_db(workdir, "engine_timed.db"))
+        writer.start()
+        probe = DetectionProbe(writer)
+        stop = threading.Event()
+        with contextlib.redirect_stdout(devnull):
+            spooler.start()
+            t = threading.Thread(target=core.monitor_loop, args=(probe, stop, spooler, args.poll_interval), daemon=True)
+            t.start()
+            while not spooler.finished():
+                time.sleep(0.05)
+            time.sleep(args.poll_interval * 2)
+            stop.set()
+            t.join()
+        writer.stop()
+
+        first_seen = spooler.first_seen()
+        latencies = [probe.detected[key] - spooler.frame_time(idx) for key, idx in first_seen.items() if key in probe.detected]
+        missed = len(first_seen) - len(latencies)
+        print(f"  시간 재생 x{args.speed}: 폴링 주기 {args.poll_interval}s, 감지 {len(latencies):,}건, 놓침 {missed}건")
+        print(f"  탐지 지연 p50 {percentile(latencies, 0.5) * 1000:.1f}ms  p95 {percentile(latencies, 0.95) * 1000:.1f}ms  "
+              f"max {max(latencies, default=0) * 1000:.1f}ms")
+    finally:
+        devnull.close()
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+# =========================================================
+# 2-1. 기본 스풀러: monitor_loop 에 스풀러를 안 넘기면 만드는 Win32Spooler 로 실제로 폴링되는지
+# - Windows: 진짜 win32print 로 잠깐 돌려서 예외 없이 돌고 프린터를 조회하는지만 확인
+# - 그 밖: win32print 자리에 시뮬레이터로 넘겨주는 모듈을 넣고, 기록 건수 / 한도 일시 정지까지 확인
+# =========================================================
+def win32print_standin(sim):
+    # pywin32 의 win32print 중 Win32Spooler 가 쓰는 부분만 같은 호출 모양으로
+    module = types.ModuleType("win32print")
+    module.PRINTER_ENUM_LOCAL, module.PRINTER_ENUM_CONNECTIONS = 2, 4
+    module.PRINTER_ALL_ACCESS = 0xF000C
+    module.JOB_CONTROL_PAUSE = 1
+    module.EnumPrinters = lambda flags: [(flags, name, name, "") for name in sim.enum_printers()]
+    module.OpenPrinter = lambda name, defaults=None: sim.open_printer(name)
+    module.EnumJobs = lambda handle, first, count, level: sim.enum_jobs(handle, first, count)
+    module.ClosePrinter = sim.close_printer
+    module.SetJob = lambda handle, job_id, level, info, command: sim.pause_job(handle, job_id)
+    return module
+
+def bench_spooler(args):
+    workdir = tempfile.mkdtemp(prefix="pm_bench_")
+    devnull = open(os.devnull, "w", encoding="utf-8")
+    saved = sys.modules.get("win32print")
+    failures = []
+    try:
+        sim = None
+        if importlib.util.find_spec("win32print") is None:
+            sim = core.SimulatedSpooler.synthetic(printers=args.printers, jobs=args.jobs, duration=args.duration, seed=args.seed, speed=args.speed)
+            sys.modules["win32print"] = win32print_standin(sim)
+        writer = core.LogWriter(db_path=make_temp_db(workdir, "spooler.db"))
+        writer.start()
+        stop = threading.Event()
+        errors = []
+
+        def run():
+            try:
+                core.monitor_loop(writer, stop, None, 0.1)
+            except Exception as e:
+                errors.append(e)
+
+        with contextlib.redirect_stdout(devnull):
+            if sim: sim.start()
+            t = threading.Thread(target=run, daemon=True)
+            t.start()
+            deadline = time.monotonic() + (args.duration / args.speed + 1.0 if sim else args.duration)
+            while time.monotonic() < deadline and t.is_alive() and not (sim and sim.finished()):
+                time.sleep(0.05)
+            time.sleep(0.3)
+            stop.set()
+            t.join(10)
+        writer.stop()
+
+        if errors: failures.append(f"monitor_loop 예외: {errors[0]!r}")
+        if t.is_alive(): failures.append("monitor_loop 가 멈추지 않음")
+        backend = "win32print" if sim is None else "win32print 대역 (시뮬레이터)"
+        print(f"[spooler] 기본 백엔드 {backend}: 기록 {writer.committed:,}건")
+        if sim is not None and not failures:
+            expected = len(sim.first_seen())
+            if sim.enum_calls == 0: failures.append("EnumPrinters 가 한 번도 불리지 않음")
+            if writer.committed != expected: failures.append(f"기록 {writer.committed:,}건 != 작업 {expected:,}건")
+            printer, jobs = next((name, jobs) for _, snapshot in sim.frames for name, jobs in snapshot.items() if jobs)
+            core.Win32Spooler().pause_job(printer, jobs[0]["JobId"])     # 한도 초과 시 쓰는 관리 권한 경로
+            if (printer, jobs[0]["JobId"]) not in sim.paused: failures.append("pause_job 이 SetJob 으로 이어지지 않음")
+    finally:
+        if saved is None: sys.modules.pop("win32print", None)
+        else: sys.modules["win32print"] = saved
+        devnull.close()
+        shutil.rmtree(workdir, ignore_errors=True)
+    for line in failures: print(f"[spooler] 실패: {line}")
+    return 1 if failures else 0
+
+
+# =========================================================
+# 3. 대시보드 집계: 파이썬 분류(인덱스 없음) vs GROUP BY + 커버링 인덱스 vs 일별 집계
+# =========================================================
+def legacy_dashboard_stats(conn, start_date, end_date):
+    # 이전 refresh_dashboard_stats 의 방식 그대로 (전체 행을 가져와 파이썬에서 분류)
+    stats = {"A4_BW": {"cnt":0, "cost":0}, "A3_BW": {"cnt":0, "cost":0},
+             "A4_Col": {"cnt":0, "cost":0}, "A3_Col": {"cnt":0, "cost":0}}
+    rows = conn.execute("SELECT pages, paper, is_color, cost FROM log_entries WHERE print_ts BETWEEN ? AND ?",
+                        epoch_range(start_date, end_date)).fetchall()
+    for p, paper, is_col, cost in rows:
+        if paper == core.PAPER_CODES["A3"]: key = "A3_Col" if is_col else "A3_BW"
+        else: key = "A4_Col" if is_col else "A4_BW"
+        stats[key]["cnt"] += p
+        stats[key]["cost"] += cost
+    return stats
+
+def epoch_range(start_date, end_date):
+    return core.to_epoch(f"{start_date} 00:00:00"), core.to_epoch(f"{end_date} 23:59:59")
+
+# 로그 원본에 대한 GROUP BY (커버링 인덱스 사용, 일별 집계 도입 전 방식)
+RAW_STATS_SQL = '''
+    SELECT CASE WHEN paper = 1 THEN 'A3' ELSE 'A4' END
+           || CASE WHEN is_color THEN '_Col' ELSE '_BW' END AS bucket,
+           SUM(pages), SUM(cost)
+    FROM log_entries
+    WHERE print_ts BETWEEN ? AND ?
+    GROUP BY bucket
+'''
+
+def raw_dashboard_stats(conn, start_date, end_date):
+    stats = {"A4_BW": {"cnt":0, "cost":0}, "A3_BW": {"cnt":0, "cost":0},
+             "A4_Col": {"cnt":0, "cost":0}, "A3_Col": {"cnt":0, "cost":0}}
+    for key, pages, cost in conn.execute(RAW_STATS_SQL, epoch_range(start_date, end_date)):
+        stats[key]["cnt"] = pages
+        stats[key]["cost"] = cost
+    return stats
+
+def bench_dashboard(args):
+    workdir = tempfile.mkdtemp(prefix="pm_bench_")
+    try:
+        path = make_temp_db(workdir, "dashboard.db")
+        conn = sqlite3.connect(path)
+        conn.execute("DROP INDEX IF EXISTS idx_entries_print_ts")
+        conn.close()
+
+        t0 = time.perf_counter()
+        fill_synthetic_logs(path, args.rows, days=args.days)
+        print(f"[dashboard] 로그 {args.rows:,}건 / {args.days}일 생성 {time.perf_counter() - t0:.1f}s")
+
+        end = datetime.date(2024, 12, 31)
+        ranges = [d for d in (1, 7, 30, 90, 365) if d <= args.days]
+        conn = sqlite3.connect(path)
+
+        legacy = {}
+        for d in ranges:
+            start = (end - datetime.timedelta(days=d - 1)).isoformat()
+            legacy[d] = timed(lambda: legacy_dashboard_stats(conn, start, end.isoformat()), args.repeat)
+
+        t0 = time.perf_counter()
+        conn.execute("CREATE INDEX idx_entries_print_ts ON log_entries (print_ts, paper, is_color, pages, cost)")
+        print(f"  인덱스 생성 {time.perf_counter() - t0:.1f}s")
+        for name, sql in (("GROUP BY", RAW_STATS_SQL), ("일별 집계", core.DASHBOARD_STATS_SQL)):
+            plan = conn.execute("EXPLAIN QUERY PLAN " + sql, ("", "")).fetchall()
+            print(f"  실행 계획({name}): " + " / ".join(row[-1] for row in plan))
+
+        print(f"  {'기간':>6} | {'이전 방식':>10} | {'GROUP BY':>10} | {'일별 집계':>10}")
+        for d in ranges:
+            start = (end - datetime.timedelta(days=d - 1)).isoformat()
+            raw_elapsed, raw_stats = timed(lambda: raw_dashboard_stats(conn, start, end.isoformat()), args.repeat)
+            elapsed, stats = timed(lambda: core.query_dashboard_stats(start, end.isoformat(), conn), args.repeat)
+            old_elapsed, old_stats = legacy[d]
+            assert stats == old_stats == raw_stats, f"{d}일 집계 불일치"
+            print(f"  {d:>5}일 | {old_elapsed * 1000:>8.1f}ms | {raw_elapsed * 1000:>8.1f}ms | {elapsed * 1000:>8.2f}ms")
+        conn.close()
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+# =========================================================
+# 3-1. 프린터 폴링: 직렬 1초 주기 vs PrinterPoller (느린/불통 프린터 포함)
+# =========================================================
+def make_poller_spooler(args):
+    spooler = core.SimulatedSpooler.synthetic(printers=args.printers, jobs=args.jobs, duration=args.duration,
+                                              linger=args.linger, seed=args.seed, speed=1.0)
+    names = list(spooler.printers)
+    slow = names[:args.slow]
+    unreachable = names[args.slow:args.slow + args.unreachable]
+    for name in slow: spooler.delays[name] = args.slow_delay
+    spooler.unreachable.update(unreachable)
+
+    # 작업 100건이 넘게 쌓인 큐 (EnumJobs 페이지 단위 조회 확인용)
+    big = [{"JobId": 100000 + i, "pUserName": "batch", "pDocument": f"월말보고서_{i}.pdf", "TotalPages": 2,
+            "Submitted": datetime.datetime(2024, 1, 1, 8, 0, 0) + datetime.timedelta(seconds=i),
+            "pDevMode": core.SimDevMode()} for i in range(args.big_queue)]
+    if big:
+        for _, snapshot in spooler.frames:
+            snapshot["BigQueue"] = big
+        spooler.printers.append("BigQueue")
+    return spooler, set(slow), set(unreachable)
+
+def run_poll_scenario(args, runner):
+    workdir = tempfile.mkdtemp(prefix="pm_bench_")
+    devnull = open(os.devnull, "w", encoding="utf-8")
+    try:
+        spooler, slow, unreachable = make_poller_spooler(args)
+        writer = core.LogWriter(db_path=make_temp_db(workdir, "poller.db"))
+        writer.start()
+        probe = DetectionProbe(writer)
+        stop = threading.Event()
+        cpu0 = time.process_time()
+        with contextlib.redirect_stdout(devnull):
+            spooler.start()
+            t = threading.Thread(target=runner, args=(spooler, probe, stop), daemon=True)
+            t.start()
+            while not spooler.finished():
+                time.sleep(0.05)
+            time.sleep(1.0)
+            stop.set()
+            t.join(timeout=args.slow_delay * (args.slow + 2))
+        cpu = time.process_time() - cpu0
+        writer.stop()
+
+        first_seen = spooler.first_seen()
+        healthy, lagging = [], []
+        missed = 0
+        for (printer, job_id), idx in first_seen.items():
+            if printer in unreachable: continue
+            if (printer, job_id) not in probe.detected:
+                missed += 1
+                continue
+            latency = probe.detected[(printer, job_id)] - spooler.frame_time(idx)
+            (lagging if printer in slow else healthy).append(latency)
+        big_found = sum(1 for (printer, _) in probe.detected if printer == "BigQueue")
+        return {"healthy": healthy, "slow": lagging, "missed": missed, "cpu": cpu,
+                "job_calls": spooler.job_calls, "big": big_found}
+    finally:
+        devnull.close()
+        shutil.rmtree(workdir, ignore_errors=True)
+
+def bench_poller(args):
+    def serial(spooler, probe, stop):
+        # 이전 monitor_loop: 모든 프린터를 차례로 열고 닫으며 1초마다 반복
+        dedup = core.JobDedup()
+        while not stop.is_set():
+            core.poll_once(spooler, probe, dedup, "PC-BENCH")
+            stop.wait(args.poll_interval)
+
+    def concurrent_poller(spooler, probe, stop):
+        core.monitor_loop(probe, stop, spooler, args.poll_interval, workers=args.workers, timeout=args.timeout)
+
+    print(f"[poller] 프린터 {args.printers}대 (느림 {args.slow}대 x {args.slow_delay}s, 불통 {args.unreachable}대, "
+          f"대기열 {args.big_queue}건 큐 1대), 작업 {args.jobs:,}건 / {args.duration:.0f}s")
+    print(f"  {'방식':<14} | {'p50':>8} | {'p95':>8} | {'max':>8} | {'느린 p50':>9} | 놓침 | 큰 큐 | EnumJobs | CPU")
+    for name, runner in (("직렬", serial), ("PrinterPoller", concurrent_poller)):
+        r = run_poll_scenario(args, runner)
+        h = r["healthy"]
+        print(f"  {name:<14} | {percentile(h, 0.5) * 1000:>6.0f}ms | {percentile(h, 0.95) * 1000:>6.0f}ms | "
+              f"{max(h, default=0) * 1000:>6.0f}ms | {percentile(r['slow'], 0.5) * 1000:>7.0f}ms | {r['missed']:>4} | "
+              f"{r['big']:>5} | {r['job_calls']:>8,} | {r['cpu']:.2f}s")
+
+# =========================================================
+# 3-2. 이력 페이지 조회: 테이블 크기별 한 페이지 조회 시간
+# =========================================================
+def bench_history(args):
+    sizes = [int(x) for x in args.sizes.split(",")]
+    workdir = tempfile.mkdtemp(prefix="pm_bench_")
+    try:
+        print(f"[history] 페이지 {args.page_size}건, 문서 검색 방식: ", end="")
+        results = {}
+        cases = None
+        for rows in sizes:
+            path = make_temp_db(workdir, f"history_{rows}.db")
+            if cases is None: print(core.HISTORY_FTS or "LIKE")
+            fill_synthetic_logs(path, rows, days=min(365, max(1, rows // 1000)))
+            conn = sqlite3.connect(path)
+            last_id = conn.execute("SELECT MAX(id) FROM log_entries").fetchone()[0]
+            last_day = conn.execute("SELECT datetime(MAX(print_ts), 'unixepoch') FROM log_entries").fetchone()[0][:10]
+            cases = [
+                ("첫 페이지", {}, None),
+                ("중간 페이지", {}, last_id // 2),
+                ("사용자", {"user": "user42"}, None),
+                ("프린터+기간", {"printer": "Printer-3", "start_date": last_day, "end_date": last_day}, None),
+                ("A3 컬러", {"paper": "A3", "color": 1}, None),
+                ("문서명 검색", {"doc": f"문서_{rows // 3}"}, None),
+            ]
+            for name, filters, before in cases:
+                elapsed, page = timed(lambda: core.query_history(filters, before, args.page_size, conn), args.repeat)
+                results[(name, rows)] = (elapsed, len(page))
+            conn.close()
+            os.remove(path)
+
+        print(f"  {'조건':<12}" + "".join(f" | {rows:>10,}건" for rows in sizes))
+        for name, _, _ in cases:
+            print(f"  {name:<12}" + "".join(f" | {results[(name, rows)][0] * 1000:>9.2f}ms" for rows in sizes))
+        assert not check_doc_search(workdir)
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+DOC_NAMES = ("2024 견적서 최종.pdf", "견적서(수정).hwp", "Quarterly Report Q3.xlsx", "report_q3 draft.docx", "회의록 A.docx",
+             "할인율 50% 안내.pdf", "a_b_c.txt", "AB 테스트 결과.pptx", "ab.txt", "Microsoft Word - 계약서", "계약서_2024.pdf")
+DOC_QUERIES = ("견적", "견적서 최종", "report", "Report Q3", "q3 draft", "a", "ab", "AB", "50%", "_", "a_b", "계약서",
+               "Word - 계", "서_2", "없는 문서", "  견적서  ")
+
+def check_doc_search(workdir):
+    # 화면이 실시간으로 받은 행에 쓰는 필터(history_row_matches)와 다시 읽었을 때의 조회(query_history)가
+    # 같은 행을 고르는지: 여러 단어 / 3글자 미만 / 대소문자 / LIKE 특수문자. trigram 과 LIKE 두 경로 모두
+    path = make_temp_db(workdir, "doc_search.db")
+    names = {}
+    conn = sqlite3.connect(path)
+    with conn:
+        for rec, name in zip(sample_records(len(DOC_NAMES)), DOC_NAMES):
+            conn.execute(core.LOG_INSERT_SQL, rec[:4] + (name,) + rec[5:])
+    for log_id, name in conn.execute("SELECT id, document_name FROM logs"):
+        names[log_id] = name
+    problems = []
+    index = core.HISTORY_FTS
+    try:
+        for mode in dict.fromkeys((index, None)):
+            core.HISTORY_FTS = mode
+            for doc in DOC_QUERIES:
+                queried = {row[0] for row in core.query_history({"doc": doc}, None, 1000, conn)}
+                live = {log_id for log_id, name in names.items() if core.history_row_matches({"doc": doc}, {"document_name": name,
+                        "print_time": "2024-01-01 00:00:00"})}
+                if queried != live:
+                    problems.append(f"{mode or 'LIKE'} '{doc}': 조회 {sorted(names[i] for i in queried)} / 실시간 {sorted(names[i] for i in live)}")
+    finally:
+        core.HISTORY_FTS = index
+        conn.close()
+    print(f"[history] 문서명 검색어 {len(DOC_QUERIES)}개 x ({index or 'LIKE'}{', LIKE' if index else ''}): 실시간 필터와 조회 결과 "
+          f"{'일치' if not problems else f'불일치 {len(problems)}건'}")
+    for problem in problems:
+        print(f"  {problem}")
+    return problems
+
+# =========================================================
+# 3-3. 화면 갱신: 새 로그 폭주 시 메인(Tk) 스레드 소요 시간 (디스플레이 필요)
+# =========================================================
+def bench_ui(args):
+    workdir = tempfile.mkdtemp(prefix="pm_bench_")
+    try:
+        make_temp_db(workdir, "ui.db")
+        spooler = core.SimulatedSpooler.synthetic(printers=10, jobs=args.burst, duration=0.5, linger=60.0, speed=1.0)
+        import gui
+        app = gui.App(spooler=spooler)
+        result = {}
+
+        def history_burst():
+            # 이력 화면에서 같은 양의 새 로그가 들어온 경우 (기록 스레드 콜백을 그대로 흉내)
+            app.show_history()
+            base_id = 10_000_000
+            rows = [dict(zip(core.LOG_COLUMNS, (base_id + i, *rec))) for i, rec in enumerate(sample_records(args.burst, seed=1))]
+            app.ui_timings.clear()
+            threading.Thread(target=app.on_logs_committed, args=(rows,), daemon=True).start()
+            app.after(2000, measure_legacy)
+
+        def measure_legacy():
+            result["history_delta"] = list(app.ui_timings)
+            # 이전 방식: 새 로그 1건마다 화면 전체를 다시 그림
+            t0 = time.perf_counter()
+            for _ in range(args.legacy_samples): app.reload_history()
+            result["history_full"] = (time.perf_counter() - t0) / args.legacy_samples
+            app.show_dashboard()
+            t0 = time.perf_counter()
+            for _ in range(args.legacy_samples): app.refresh_dashboard_stats()
+            result["dashboard_full"] = (time.perf_counter() - t0) / args.legacy_samples
+            app.on_close()
+
+        def dashboard_done():
+            result["dashboard_delta"] = list(app.ui_timings)
+            history_burst()
+
+        app.after(int(args.wait * 1000), dashboard_done)
+        app.mainloop()
+
+        print(f"[ui] 새 로그 폭주 {args.burst}건")
+        for page in ("dashboard", "history"):
+            timings = result[f"{page}_delta"]
+            rows = sum(n for n, _ in timings)
+            total = sum(t for _, t in timings)
+            full = result[f"{page}_full"]
+            print(f"  {page:<9} | 묶음 반영 {len(timings)}회 / {rows}건, 메인 스레드 {total * 1000:.1f}ms "
+                  f"| 이전 방식(건마다 전체 다시 그리기) 추정 {full * args.burst * 1000:,.0f}ms")
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+# =========================================================
+# 4. 중복 감지: 무한히 커지는 set vs JobDedup (30일 모의 운영)
+# =========================================================
+def deep_size(container):
+    size = sys.getsizeof(container)
+    for key in container:
+        size += sys.getsizeof(key)
+        if isinstance(key, tuple):
+            size += sum(sys.getsizeof(part) for part in key)
+    return size
+
+def bench_dedup(args):
+    rnd = random.Random(args.seed)
+    now = [0.0]
+    dedup = core.JobDedup(clock=lambda: now[0])
+    legacy = set()
+    legacy_missed = 0
+    next_id = {}
+    base = datetime.datetime(2024, 1, 1)
+
+    print(f"[dedup] {args.days}일, 하루 {args.jobs_per_day:,}건, 프린터 {args.printers}대 (JobId 1~{args.max_job_id} 재사용)")
+    print(f"  {'일차':>4} | {'set 항목':>9} | {'set 크기':>9} | {'JobDedup 최대':>13} | {'JobDedup 크기':>13} | set 누락")
+    for day in range(args.days):
+        # 하루치 작업: 업무 시간(9~18시)에 도착, 1~10초 동안 큐에 보임 (1초 폴링)
+        events = []
+        for _ in range(args.jobs_per_day):
+            printer = f"Printer-{rnd.randrange(args.printers)}"
+            job_id = next_id.get(printer, 0) % args.max_job_id + 1
+            next_id[printer] = job_id
+            arrive = day * 86400 + rnd.uniform(9 * 3600, 18 * 3600)
+            submitted = (base + datetime.timedelta(seconds=arrive)).strftime("%Y-%m-%d %H:%M:%S")
+            for k in range(rnd.randint(1, 10)):
+                events.append((arrive + k, printer, job_id, submitted))
+        events.sort()
+
+        peak = 0
+        for t, printer, job_id, submitted in events:
+            now[0] = t
+            key = (printer, job_id, submitted)
+            if not dedup.seen(key):
+                dedup.add(key)
+                # 이전 방식: JobId 가 재사용되면 새 작업인데도 건너뜀
+                legacy_key = f"{printer}_{job_id}"
+                if legacy_key in legacy: legacy_missed += 1
+                legacy.add(legacy_key)
+                peak = max(peak, len(dedup))
+        now[0] = (day + 1) * 86400
+        dedup.expire()
+
+        if day == 0 or (day + 1) % 5 == 0:
+            print(f"  {day + 1:>4} | {len(legacy):>9,} | {deep_size(legacy) / 1024:>7,.0f}KB | "
+                  f"{peak:>13,} | {deep_size(dedup.entries) / 1024:>11,.0f}KB | {legacy_missed:,}")
+
+    # 재시작: 새 JobDedup 으로 같은 작업을 다시 만나도 DB 제약이 중복 기록을 막는지 확인
+    workdir = tempfile.mkdtemp(prefix="pm_bench_")
+    try:
+        path = make_temp_db(workdir, "dedup.db")
+        records = sample_records(1000)
+        for attempt in range(2):
+            writer = core.LogWriter(db_path=path)
+            writer.start()
+            for rec in records: writer.submit(rec)
+            writer.stop()
+        conn = sqlite3.connect(path)
+        stored = conn.execute("SELECT COUNT(*) FROM logs").fetchone()[0]
+        conn.close()
+        print(f"  재시작 후 재감지: {len(records):,}건 다시 제출 -> 중복 거부 {writer.duplicates:,}건, 저장 {stored:,}건")
+        assert stored == len(records)
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+# =========================================================
+# 5. 시작 비용: 모드별 import 시간 / 최대 메모리(RSS) 예산
+# =========================================================
+STARTUP_BUDGETS = {
+    # 모드: (import 시간 예산(초), 최대 RSS 예산(MB))
+    "headless": (0.25, 60),
+    "gui": (1.5, 150),
+}
+GUI_MODULES = ("tkinter", "customtkinter", "matplotlib")
+
+STARTUP_PROBE = """
+import json, sys, time
+t0 = time.perf_counter()
+import {module}
+elapsed = time.perf_counter() - t0
+if {run!r}:
+    import core
+    core.init_db()
+    spooler = core.SimulatedSpooler.synthetic(printers=10, jobs=200, duration={duration!r})
+    core.run_headless(spooler, duration={duration!r}, port=0, poll_interval=0.2)
+try:
+    import resource
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    rss = rss / 1024 / 1024 if sys.platform == "darwin" else rss / 1024   # macOS 는 바이트, 리눅스는 KB
+    if sys.platform.startswith("linux"):    # ru_maxrss 는 exec 전 부모 프로세스의 최대치를 물려받음
+        with open("/proc/self/status") as f:
+            rss = int(next(line for line in f if line.startswith("VmHWM")).split()[1]) / 1024
+except ImportError:
+    try:
+        import psutil
+        rss = psutil.Process().memory_info().peak_wset / 1024 / 1024     # 윈도우
+    except ImportError:
+        rss = None
+print(json.dumps({{"import": elapsed, "rss": rss, "gui_modules": [m for m in {gui_modules!r} if m in sys.modules]}}))
+"""
+
+def probe_startup(module, run, duration, workdir):
+    code = STARTUP_PROBE.format(module=module, run=run, duration=duration, gui_modules=GUI_MODULES)
+    env = dict(os.environ, PYTHONPATH=os.pathsep.join(filter(None, [os.path.dirname(os.path.abspath(__file__)), os.environ.get("PYTHONPATH")])))
+    out = subprocess.run([sys.executable, "-c", code], cwd=workdir, env=env, capture_output=True, text=True, check=True).stdout
+    return json.loads(out.strip().splitlines()[-1])
+
+def bench_startup(args):
+    workdir = tempfile.mkdtemp(prefix="pm_bench_")
+    over = []
+    try:
+        modes = [("headless", "core", True)]
+        if not args.skip_gui: modes.append(("gui", "gui", False))
+        print(f"  {'모드':>8} | {'import':>8} | {'예산':>6} | {'최대 RSS':>9} | {'예산':>6} | GUI 모듈")
+        for mode, module, run in modes:
+            samples = [probe_startup(module, run, args.duration, workdir) for _ in range(args.repeat)]
+            imp = min(s["import"] for s in samples)
+            rss = max((s["rss"] for s in samples if s["rss"] is not None), default=None)
+            loaded = samples[0]["gui_modules"]
+            imp_budget, rss_budget = STARTUP_BUDGETS[mode]
+            rss_text = f"{rss:>7.1f}MB" if rss is not None else f"{'-':>9}"
+            print(f"  {mode:>8} | {imp * 1000:>6.0f}ms | {imp_budget * 1000:>4.0f}ms | {rss_text} | {rss_budget:>4}MB | {', '.join(loaded) or '-'}")
+            if imp > imp_budget: over.append(f"{mode} import {imp * 1000:.0f}ms > {imp_budget * 1000:.0f}ms")
+            if rss is not None and rss > rss_budget: over.append(f"{mode} RSS {rss:.1f}MB > {rss_budget}MB")
+            if mode == "headless" and loaded: over.append(f"headless 에서 GUI 모듈 로드됨: {', '.join(loaded)}")
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+    for line in over: print(f"[startup] 예산 초과: {line}")
+    if over: sys.exit(1)
+
+# =========================================================
+# 6. 엔진 분리: 화면 부하 중 탐지 지연 (창 내부 스레드 vs 엔진 프로세스 + 이벤트 채널)
+# =========================================================
+ENGINE_PROBE = """
+import sys, time
+import core
+core.DB_PATH = {db!r}
+core.init_db()
+spooler = core.SimulatedSpooler.synthetic(printers={printers}, jobs={jobs}, duration={duration!r}, seed={seed}, speed={speed!r})
+spooler.clock = time.time
+spooler.start()
+print(spooler.started, flush=True)
+core.run_headless(spooler, duration={run_time!r}, port={port}, poll_interval={poll_interval!r})
+"""
+
+def gui_load(stop, busy, idle):
+    # 화면 다시 그리기 흉내: busy 초 동안 파이썬 코드로 GIL 을 잡고, idle 초 쉼
+    while not stop.is_set():
+        end = time.perf_counter() + busy
+        while time.perf_counter() < end:
+            sum(i * i for i in range(2000))
+        time.sleep(idle)
+
+class CommitProbe:
+    # 화면 쪽에서 새 로그를 받은 시각 (벽시계: 엔진 프로세스와 같은 기준)
+    def __init__(self):
+        self.received = {}
+
+    def __call__(self, rows):
+        now = time.time()
+        for row in rows:
+            self.received.setdefault((row["printer_name"], row["job_id"]), now)
+
+def ipc_latencies(args, started, received):
+    spooler = core.SimulatedSpooler.synthetic(printers=args.printers, jobs=args.jobs, duration=args.duration, seed=args.seed, speed=args.speed)
+    first_seen = spooler.first_seen()
+    latencies = [received[key] - (started + spooler.frames[idx][0] / args.speed) for key, idx in first_seen.items() if key in received]
+    return latencies, len(first_seen) - len(latencies)
+
+def bench_ipc(args):
+    workdir = tempfile.mkdtemp(prefix="pm_bench_")
+    devnull = open(os.devnull, "w", encoding="utf-8")
+    run_time = args.duration / args.speed + 2.0
+    print(f"[ipc] 프린터 {args.printers}대, 작업 {args.jobs:,}건, 화면 부하 스레드 {args.load_threads}개 "
+          f"({args.busy * 1000:.0f}ms 작업 / {args.idle * 1000:.0f}ms 쉼)")
+    try:
+        for label, separate in (("창 내부 스레드", False), ("엔진 프로세스", True)):
+            for loaded in (False, True):
+                stop = threading.Event()
+                probe = CommitProbe()
+                loads = [threading.Thread(target=gui_load, args=(stop, args.busy, args.idle), daemon=True)
+                         for _ in range(args.load_threads if loaded else 0)]
+                for t in loads: t.start()
+                tag = f"{'sep' if separate else 'inproc'}_{int(loaded)}"
+                if separate:
+                    # 엔진은 자식 프로세스, 이 프로세스(화면 역할)는 이벤트만 구독
+                    db = make_temp_db(workdir, f"ipc_{tag}.db")
+                    sock = socket.create_server(("127.0.0.1", 0))
+                    port = sock.getsockname()[1]
+                    sock.close()
+                    subscriber = core.EventSubscriber(probe, port=port, retry_interval=0.05)
+                    subscriber.start()
+                    code = ENGINE_PROBE.format(db=db, printers=args.printers, jobs=args.jobs, duration=args.duration, seed=args.seed,
+                                               speed=args.speed, run_time=run_time, port=port, poll_interval=args.poll_interval)
+                    env = dict(os.environ, PYTHONPATH=os.pathsep.join(filter(None, [os.path.dirname(os.path.abspath(__file__)), os.environ.get("PYTHONPATH")])))
+                    engine = subprocess.Popen([sys.executable, "-c", code], stdout=subprocess.PIPE, text=True, env=env)
+                    started = float(engine.stdout.readline())
+                    engine.stdout.read()
+                    engine.wait()
+                    subscriber.stop()
+                else:
+                    spooler = core.SimulatedSpooler.synthetic(printers=args.printers, jobs=args.jobs, duration=args.duration, seed=args.seed, speed=args.speed)
+                    spooler.clock = time.time
+                    writer = core.LogWriter(db_path=make_temp_db(workdir, f"ipc_{tag}.db"), on_commit=probe)
+                    writer.start()
+                    engine_stop = threading.Event()
+                    with contextlib.redirect_stdout(devnull):
+                        spooler.start()
+                        started = spooler.started
+                        t = threading.Thread(target=core.monitor_loop, args=(writer, engine_stop, spooler, args.poll_interval), daemon=True)
+                        t.start()
+                        time.sleep(run_time)
+                        engine_stop.set()
+                        t.join()
+                    writer.stop()
+                stop.set()
+                for t in loads: t.join()
+
+                latencies, missed = ipc_latencies(args, started, probe.received)
+                print(f"  {label:<10} | 화면 부하 {'있음' if loaded else '없음'} | 수신 {len(latencies):,}건, 놓침 {missed} | "
+                      f"지연 p50 {percentile(latencies, 0.5) * 1000:.0f}ms  p95 {percentile(latencies, 0.95) * 1000:.0f}ms  "
+                      f"max {max(latencies, default=0) * 1000:.0f}ms")
+    finally:
+        devnull.close()
+        shutil.rmtree(workdir, ignore_errors=True)
+
+# =========================================================
+# 7. 중앙 수집: 에이전트 수백 대 -> 수집 서버 (장애 중 로컬 보관, 재전송 멱등)
+# =========================================================
+COLLECTOR_TOKEN = "bench-token"
+COLLECTOR_PROBE = """
+import core, collector
+core.DB_PATH = {db!r}
+core.init_db()
+collector.run_collector({token!r}, "127.0.0.1", {port})
+"""
+
+def agent_records(agent, start, count, legacy_every=0):
+    # legacy_every: 그 간격마다 submitted 가 없는 행 (submitted 컬럼이 생기기 전 DB 에서 옮겨 온 기록)
+    records = [(rec[0], rec[1], f"PC-{agent:03d}", *rec[3:]) for rec in sample_records(start + count, seed=agent)[start:]]
+    if legacy_every:
+        records = [rec[:-1] + (None,) if i % legacy_every == 0 else rec for i, rec in enumerate(records)]
+    return records
+
+def collector_rows(path):
+    conn = sqlite3.connect(path)
+    try:
+        return conn.execute("SELECT COUNT(*), COUNT(DISTINCT computer_name) FROM logs").fetchone()
+    finally:
+        conn.close()
+
+def start_collector(db, port):
+    env = dict(os.environ, PYTHONPATH=os.pathsep.join(filter(None, [os.path.dirname(os.path.abspath(__file__)), os.environ.get("PYTHONPATH")])))
+    proc = subprocess.Popen([sys.executable, "-c", COLLECTOR_PROBE.format(db=db, port=port, token=COLLECTOR_TOKEN)], env=env,
+                            stdout=subprocess.PIPE, text=True)
+    proc.stdout.readline()      # "수집 서버 시작" 출력 = 접속 가능
+    return proc
+
+def stop_collector(proc):
+    proc.send_signal(signal.SIGINT if os.name != "nt" else signal.CTRL_BREAK_EVENT)
+    out = proc.communicate()[0]
+    return out.strip().splitlines()[-1] if out.strip() else ""
+
+def post_ingest(url, body, headers):
+    # 수집 서버에 직접 보내고 응답 코드만 (거절되는지 확인용)
+    request = urllib.request.Request(url + "/ingest", data=body, method="POST", headers=headers)
+    try:
+        with urllib.request.urlopen(request, timeout=10) as response:
+            return response.status
+    except urllib.error.HTTPError as e:
+        return e.code
+
+def wait_for_rows(path, expected, timeout):
+    deadline = time.perf_counter() + timeout
+    while time.perf_counter() < deadline:
+        if collector_rows(path)[0] >= expected: return True
+        time.sleep(0.1)
+    return False
+
+def bench_collector(args):
+    workdir = tempfile.mkdtemp(prefix="pm_bench_")
+    devnull = open(os.devnull, "w", encoding="utf-8")
+    half = args.jobs_per_agent // 2
+    total = args.agents * args.jobs_per_agent
+    try:
+        # 에이전트 로컬 DB: 수집 서버가 꺼져 있는 동안 앞쪽 절반이 쌓여 있음
+        agent_dbs = []
+        for agent in range(args.agents):
+            path = make_temp_db(workdir, f"agent_{agent:03d}.db")
+            conn = sqlite3.connect(path)
+            with conn: conn.executemany(core.LOG_INSERT_SQL, agent_records(agent, 0, half, legacy_every=5))
+            conn.close()
+            agent_dbs.append(path)
+        central = make_temp_db(workdir, "collector.db")
+        sock = socket.create_server(("127.0.0.1", 0))
+        port = sock.getsockname()[1]
+        sock.close()
+        url = f"http://127.0.0.1:{port}"
+        print(f"[collector] 에이전트 {args.agents}대 x {args.jobs_per_agent:,}건 (배치 {args.batch_size}건, 수집 서버 {args.outage:.0f}초 장애 후 시작)")
+
+        with contextlib.redirect_stdout(devnull):
+            uploaders = [core.Uploader(url, COLLECTOR_TOKEN, db_path=path, batch_size=args.batch_size, interval=args.interval, max_backoff=2.0)
+                         for path in agent_dbs]
+            for up in uploaders: up.start()
+            time.sleep(args.outage)
+        failures = sum(up.failures > 0 for up in uploaders)
+
+        t0 = time.perf_counter()
+        proc = start_collector(central, port)
+        with contextlib.redirect_stdout(devnull):
+            backlog_ok = wait_for_rows(central, args.agents * half, args.timeout)
+            backlog_time = time.perf_counter() - t0
+            # 수집 서버가 살아난 뒤 각 PC 에서 나머지 절반이 새로 기록됨
+            for agent, path in enumerate(agent_dbs):
+                conn = sqlite3.connect(path)
+                with conn: conn.executemany(core.LOG_INSERT_SQL, agent_records(agent, half, args.jobs_per_agent - half))
+                conn.close()
+                uploaders[agent].notify()
+            t1 = time.perf_counter()
+            complete = backlog_ok and wait_for_rows(central, total, args.timeout)
+            catchup_time = time.perf_counter() - t1
+        rows, machines = collector_rows(central)
+        raw = sum(up.bytes_raw for up in uploaders)
+        sent = sum(up.bytes_sent for up in uploaders)
+        requests = sum(up.requests for up in uploaders)
+        print(f"  장애 중 전송 실패를 겪은 에이전트: {failures}대 (로컬 DB 에 보관)")
+        print(f"  밀린 로그 {args.agents * half:,}건 수집: {backlog_time:.2f}s ({args.agents * half / backlog_time:,.0f} rows/s, 재시도 대기 포함)")
+        print(f"  새 로그 기록 완료 후 마지막 건 수집까지: {catchup_time:.2f}s")
+        print(f"  수집 완료 {'OK' if complete else '시간 초과'}: {rows:,}/{total:,}건, PC {machines}대, 요청 {requests:,}회")
+        print(f"  전송량: JSON {raw / 1024:,.0f}KB -> gzip {sent / 1024:,.0f}KB ({sent / max(raw, 1):.0%})")
+
+        # 올린 뒤에 끝난 작업: 에이전트에서 고친 쪽수 / 상태 / 비용이 수집 DB 에도 반영되는지 (upload_updates)
+        t0 = time.perf_counter()
+        with contextlib.redirect_stdout(devnull):
+            for agent, path in enumerate(agent_dbs):
+                conn = sqlite3.connect(path)
+                with conn:
+                    conn.execute("INSERT OR IGNORE INTO statuses (name) VALUES ('DELETED')")
+                    conn.execute("UPDATE log_entries SET pages = pages / 2, cost = (pages / 2) * unit_cost, "
+                                 "status_id = (SELECT id FROM statuses WHERE name = 'DELETED') WHERE id % 7 = 0")
+                conn.close()
+                uploaders[agent].notify()
+            expected = [0, 0]
+            for path in agent_dbs:
+                conn = sqlite3.connect(path)
+                for i, value in enumerate(conn.execute("SELECT SUM(pages), SUM(cost) FROM log_entries").fetchone()):
+                    expected[i] += value
+                conn.close()
+            deadline = time.perf_counter() + args.timeout
+            while time.perf_counter() < deadline:
+                conn = sqlite3.connect(central)
+                central_totals = list(conn.execute("SELECT SUM(pages), SUM(cost) FROM log_entries").fetchone())
+                conn.close()
+                if central_totals == expected: break
+                time.sleep(0.1)
+        updates_ok = central_totals == expected
+        print(f"  올린 뒤 고친 행 {sum(up.updated for up in uploaders):,}건 다시 올림: 수집 DB 쪽수 / 금액 합계 "
+              f"{'일치' if updates_ok else f'불일치 {central_totals} != {expected}'} ({time.perf_counter() - t0:.2f}s)")
+
+        # 재전송: 업로드 위치를 잃어버린 상황 -> 전부 다시 보내도 수집 DB 는 그대로 (submitted 가 없는 예전 기록 포함)
+        with contextlib.redirect_stdout(devnull):
+            for up in uploaders: up.stop()
+        for path in agent_dbs[:args.resend]:
+            conn = sqlite3.connect(path)
+            with conn: conn.execute("DELETE FROM upload_state")
+            conn.close()
+        resent = [core.Uploader(url, COLLECTOR_TOKEN, db_path=path, batch_size=args.batch_size) for path in agent_dbs[:args.resend]]
+        t0 = time.perf_counter()
+        with contextlib.redirect_stdout(devnull):
+            for up in resent: up.start()
+            while any(up.pending() for up in resent):
+                time.sleep(0.1)
+            for up in resent: up.stop()
+        after, _ = collector_rows(central)
+        print(f"  재전송 {len(resent)}대: 다시 보냄 {sum(up.duplicates + up.sent for up in resent):,}건 -> 중복 처리 "
+              f"{sum(up.duplicates for up in resent):,}건, 수집 DB {rows:,} -> {after:,}건 ({time.perf_counter() - t0:.2f}s)")
+        # 토큰이 없거나 틀린 요청 / 풀면 한도를 넘는 gzip 은 기록 전에 거절
+        row = [9_999_999, *agent_records(0, 0, 1)[0]]
+        forged = gzip.compress(json.dumps({"columns": core.UPLOAD_COLUMNS, "rows": [row]}).encode("utf-8"))
+        bomb = gzip.compress(b" " * (collector.MAX_INGEST_BYTES + 1024 * 1024), compresslevel=9)
+        gzip_headers = {"Content-Type": "application/json", "Content-Encoding": "gzip"}
+        refused = {
+            "토큰 없음": (post_ingest(url, forged, gzip_headers), 401),
+            "토큰 틀림": (post_ingest(url, forged, {**gzip_headers, core.COLLECTOR_TOKEN_HEADER: "wrong"}), 401),
+            f"gzip 폭탄 {len(bomb) // 1024}KB": (post_ingest(url, bomb, {**gzip_headers, core.COLLECTOR_TOKEN_HEADER: COLLECTOR_TOKEN}), 413),
+        }
+        refused_ok = all(got == want for got, want in refused.values()) and collector_rows(central)[0] == after
+        print("  거절: " + ", ".join(f"{name} -> {got}" for name, (got, _) in refused.items()) +
+              f" | 수집 DB {collector_rows(central)[0]:,}건 {'그대로' if refused_ok else '바뀜'}")
+        print(f"  {stop_collector(proc)}")
+        assert complete and updates_ok and refused_ok and after == rows == total
+    finally:
+        devnull.close()
+        shutil.rmtree(workdir, ignore_errors=True)
+
+# =========================================================
+# 8. 내보내기: 기간 크기별 처리량 / 최대 RSS (fetchall 로 한 번에 읽는 방식과 비교)
+# =========================================================
+EXPORT_PROBE = """
+import json, resource, sys, time, csv
+import core
+core.DB_PATH = {db!r}
+filters = {{"start_date": {start!r}, "end_date": {end!r}}}
+t0 = time.perf_counter()
+if {mode!r} == "fetchall":
+    import sqlite3
+    rows = sqlite3.connect(core.DB_PATH).execute(
+        "SELECT " + ", ".join(core.EXPORT_COLUMNS) + " FROM logs WHERE print_ts BETWEEN ? AND ? ORDER BY id",
+        (core.to_epoch({start!r} + " 00:00:00"), core.to_epoch({end!r} + " 23:59:59"))).fetchall()
+    with open({out!r}, "w", encoding="utf-8-sig", newline="") as f:
+        w = csv.writer(f)
+        w.writerow(core.EXPORT_COLUMNS)
+        w.writerows(rows)
+    count = len(rows)
+elif {mode!r} == "report":
+    count = core.write_rows({out!r}, core.REPORT_COLUMNS, core.iter_report("user", filters))
+else:
+    count = core.write_rows({out!r}, core.EXPORT_COLUMNS, core.iter_logs(filters), {mode!r})
+elapsed = time.perf_counter() - t0
+rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+rss = rss / 1024 / 1024 if sys.platform == "darwin" else rss / 1024
+if sys.platform.startswith("linux"):    # ru_maxrss 는 exec 전 부모 프로세스의 최대치를 물려받음
+    with open("/proc/self/status") as f:
+        rss = int(next(line for line in f if line.startswith("VmHWM")).split()[1]) / 1024
+print(json.dumps({{"count": count, "elapsed": elapsed, "rss": rss}}))
+"""
+
+def probe_export(db, mode, start, end, out):
+    code = EXPORT_PROBE.format(db=db, mode=mode, start=start, end=end, out=out)
+    env = dict(os.environ, PYTHONPATH=os.pathsep.join(filter(None, [os.path.dirname(os.path.abspath(__file__)), os.environ.get("PYTHONPATH")])))
+    result = json.loads(subprocess.run([sys.executable, "-c", code], env=env, capture_output=True, text=True, check=True).stdout)
+    result["size"] = os.path.getsize(out)
+    os.remove(out)
+    return result
+
+def bench_export(args):
+    workdir = tempfile.mkdtemp(prefix="pm_bench_")
+    try:
+        db = make_temp_db(workdir, "export.db")
+        t0 = time.perf_counter()
+        fill_synthetic_logs(db, args.rows, days=365)
+        print(f"[export] 로그 {args.rows:,}건 (365일) 생성 {time.perf_counter() - t0:.1f}s")
+        end = datetime.date(2024, 12, 31)
+        print(f"  {'기간':>6} | {'방식':>9} | {'행':>10} | {'시간':>7} | {'rows/s':>9} | {'파일':>8} | 최대 RSS")
+        for days in (30, 180, 365):
+            start = (end - datetime.timedelta(days=days - 1)).isoformat()
+            for mode in ("fetchall", "csv", "jsonl", "report"):
+                if mode == "fetchall" and args.skip_fetchall: continue
+                r = probe_export(db, mode, start, end.isoformat(), os.path.join(workdir, f"out.{mode}"))
+                print(f"  {days:>5}일 | {mode:>9} | {r['count']:>10,} | {r['elapsed']:>6.2f}s | {r['count'] / r['elapsed']:>9,.0f} | "
+                      f"{r['size'] / 1024 / 1024:>6.1f}MB | {r['rss']:.1f}MB")
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+# =========================================================
+# 9. 저장 구조: 예전 logs 테이블(문자열) vs log_entries(정수 id / epoch) 크기 / 조회 속도
+# =========================================================
+LEGACY_LOGS_SQL = [
+    '''CREATE TABLE logs (id INTEGER PRIMARY KEY AUTOINCREMENT, job_id INTEGER, printer_name TEXT, computer_name TEXT,
+       user_name TEXT, document_name TEXT, pages INTEGER, paper_size TEXT, is_color INTEGER, unit_cost INTEGER,
+       cost INTEGER, print_time TEXT, status TEXT, submitted TEXT)''',
+    "CREATE UNIQUE INDEX ux_logs_job ON logs (printer_name, job_id, submitted, computer_name)",
+    "CREATE INDEX idx_logs_user ON logs (user_name, id)",
+    "CREATE INDEX idx_logs_printer ON logs (printer_name, id)",
+    "CREATE INDEX idx_logs_computer ON logs (computer_name, id)",
+    "CREATE INDEX idx_logs_spec ON logs (is_color, paper_size, id)",
+    "CREATE INDEX idx_logs_print_time ON logs (print_time, paper_size, is_color, pages, cost)",
+]
+
+def table_sizes(conn):
+    # 테이블별 (인덱스 포함) 바이트. dbstat 이 없는 빌드면 빈 dict
+    try:
+        return dict(conn.execute("SELECT m.tbl_name, SUM(s.pgsize) FROM dbstat s JOIN sqlite_master m ON m.name = s.name "
+                                 "GROUP BY m.tbl_name").fetchall())
+    except sqlite3.OperationalError:
+        return {}
+
+def schema_queries(conn, legacy, start, end, last_id):
+    # 같은 결과를 내는 조회를 예전 / 새 구조에 맞게 실행 (기간 집계, 전체 내보내기, 사용자 이력 페이지)
+    if legacy:
+        time_range = (f"{start} 00:00:00", f"{end} 23:59:59")
+        stats = lambda: sorted(conn.execute("SELECT paper_size, is_color, SUM(pages), SUM(cost) FROM logs "
+                                            "WHERE print_time BETWEEN ? AND ? GROUP BY paper_size, is_color", time_range))
+        history = lambda: conn.execute(f"SELECT {core.HISTORY_COLUMNS} FROM logs WHERE user_name = ? AND id < ? "
+                                       "ORDER BY id DESC LIMIT 200", ("user42", last_id)).fetchall()
+    else:
+        stats = lambda: sorted(conn.execute(f"SELECT {core.PAPER_SQL.format('paper')}, is_color, SUM(pages), SUM(cost) "
+                                            "FROM log_entries WHERE print_ts BETWEEN ? AND ? GROUP BY paper, is_color",
+                                            epoch_range(start, end)))
+        history = lambda: core.query_history({"user": "user42"}, last_id, 200, conn)
+    scan = lambda: sum(1 for _ in conn.execute("SELECT " + ", ".join(core.EXPORT_COLUMNS) + " FROM logs ORDER BY id"))
+    return [("30일 집계", stats), ("전체 읽기", scan), ("사용자 이력", history)]
+
+def bench_schema(args):
+    workdir = tempfile.mkdtemp(prefix="pm_bench_")
+    try:
+        path = os.path.join(workdir, "schema.db")
+        conn = sqlite3.connect(path)
+        conn.execute("PRAGMA journal_mode=WAL")
+        for sql in LEGACY_LOGS_SQL: conn.execute(sql)
+        t0 = time.perf_counter()
+        for batch in chunked(synthetic_records(args.rows), 50000):
+            with conn: conn.executemany(core.LOG_INSERT_SQL, batch)
+        conn.execute("VACUUM")
+        print(f"[schema] 예전 구조 로그 {args.rows:,}건 생성 {time.perf_counter() - t0:.1f}s")
+
+        end = datetime.date(2024, 12, 31)
+        start = (end - datetime.timedelta(days=29)).isoformat()
+        last_id = args.rows // 2
+        before = {name: timed(fn, args.repeat) for name, fn in schema_queries(conn, True, start, end.isoformat(), last_id)}
+        before_tables = table_sizes(conn)
+        conn.close()
+        before_size = os.path.getsize(path)
+
+        # init_db 가 예전 logs 테이블을 찾아 변환 (FTS 색인 / 일별 집계도 이때 만들어짐)
+        t0 = time.perf_counter()
+        with contextlib.redirect_stdout(open(os.devnull, "w")):
+            core.DB_PATH = path
+            core.init_db()
+        print(f"  변환 (init_db, VACUUM 포함) {time.perf_counter() - t0:.1f}s")
+
+        conn = sqlite3.connect(path)
+        after = {name: timed(fn, args.repeat) for name, fn in schema_queries(conn, False, start, end.isoformat(), last_id)}
+        after_tables = table_sizes(conn)
+        conn.close()
+        after_size = os.path.getsize(path)
+
+        for name in before:
+            assert before[name][1] == after[name][1], f"{name} 결과 불일치"
+        mb = lambda n: f"{n / 1024 / 1024:.1f}MB"
+        if before_tables:
+            logs_after = sum(after_tables.get(t, 0) for t in ["log_entries", *core.DIMENSIONS.values()])
+            print(f"  로그 테이블 + 인덱스: {mb(before_tables['logs'])} -> {mb(logs_after)} "
+                  f"({logs_after / before_tables['logs'] * 100:.0f}%)")
+        print(f"  파일 전체: {mb(before_size)} -> {mb(after_size)} (FTS 색인 / 일별 집계 포함)")
+        print(f"  {'조회':<10} | {'예전':>9} | {'변환 후':>9}")
+        for name in before:
+            print(f"  {name:<10} | {before[name][0] * 1000:>7.1f}ms | {after[name][0] * 1000:>7.1f}ms")
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+# =========================================================
+# 10. 보관: 지난 달을 월별 보관 DB 로 옮기는 동안 기록 지연 / 옮긴 뒤 DB 크기 / 보관된 기간 조회
+# =========================================================
+def live_insert_latencies(path, stop, interval=0.005):
+    # 감시 엔진처럼 한 건씩 커밋하면서 커밋당 소요 시간을 모음
+    conn = sqlite3.connect(path)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    names = core.NameIds()
+    latencies = []
+    i = 0
+    while not stop.is_set():
+        t = datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        t0 = time.perf_counter()
+        core.insert_logs(conn, [(i, "Printer-LIVE", "PC-LIVE", "user1", f"live_{i}.pdf", 1, "A4", 0, 50, 50, t, "PRINTED", t)], names)
+        latencies.append(time.perf_counter() - t0)
+        i += 1
+        time.sleep(interval)
+    conn.close()
+    return latencies
+
+def latency_summary(values):
+    values = sorted(values)
+    return f"p50 {percentile(values, 0.5) * 1000:.1f}ms / p99 {percentile(values, 0.99) * 1000:.1f}ms / 최대 {values[-1] * 1000:.1f}ms"
+
+def bench_retention(args):
+    workdir = tempfile.mkdtemp(prefix="pm_bench_")
+    try:
+        path = make_temp_db(workdir, "retention.db")
+        today = datetime.date.today()
+        t0 = time.perf_counter()
+        fill_synthetic_logs(path, args.rows, days=args.months * 31, end=today - datetime.timedelta(days=1))
+        conn = sqlite3.connect(path)
+        conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+        size_before = os.path.getsize(path)
+        print(f"[retention] 로그 {args.rows:,}건 / {args.months}개월 생성 {time.perf_counter() - t0:.1f}s, DB {size_before / 1024 / 1024:.1f}MB")
+
+        old_month = (today - datetime.timedelta(days=(args.months - 2) * 31)).strftime("%Y-%m")
+        filters = {"start_date": f"{old_month}-01", "end_date": f"{old_month}-28", "user": "user42"}
+        history_before, page = timed(lambda: core.query_history(filters, None, 200, conn), args.repeat)
+
+        stop = threading.Event()
+        result = {}
+        probe = threading.Thread(target=lambda: result.update(base=live_insert_latencies(path, stop)))
+        probe.start()
+        time.sleep(args.baseline)
+        stop.set()
+        probe.join()
+
+        stop = threading.Event()
+        probe = threading.Thread(target=lambda: result.update(live=live_insert_latencies(path, stop)))
+        probe.start()
+        t0 = time.perf_counter()
+        with contextlib.redirect_stdout(open(os.devnull, "w")):
+            moved = core.archive_old_logs(args.retention, chunk_size=args.chunk_size, db_path=path)
+        elapsed = time.perf_counter() - t0
+        stop.set()
+        probe.join()
+
+        conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+        size_after = os.path.getsize(path)
+        archive_dir = os.path.dirname(core.archive_path(old_month))
+        archive_size = sum(os.path.getsize(os.path.join(archive_dir, f)) for f in os.listdir(archive_dir))
+        history_after, archived_page = timed(lambda: core.query_history(filters, None, 200, conn), args.repeat)
+        assert page == archived_page, "보관 후 이력 조회 결과 불일치"
+        conn.close()
+        with contextlib.redirect_stdout(open(os.devnull, "w")):
+            _, skipped = core.recalculate_db_costs(f"{old_month}-01", today.isoformat())
+        assert old_month in skipped, "보관된 달을 건너뛴 것을 알리지 않음"
+
+        print(f"  보관: {moved:,}건 ({len(os.listdir(archive_dir))}개월) {elapsed:.1f}s, {moved / elapsed:,.0f} rows/s (구간 {args.chunk_size}건)")
+        print(f"  지금 DB: {size_before / 1024 / 1024:.1f}MB -> {size_after / 1024 / 1024:.1f}MB, 보관 DB 합계 {archive_size / 1024 / 1024:.1f}MB")
+        print(f"  한 건 기록 (평소):    {latency_summary(result['base'])}")
+        print(f"  한 건 기록 (보관 중): {latency_summary(result['live'])}")
+        print(f"  {old_month} ~ 오늘 재계산: 보관된 {len(skipped)}개월({', '.join(skipped)})은 건너뜀으로 알림")
+        print(f"  보관된 달 이력 조회 ({old_month}, user42): {history_before * 1000:.1f}ms -> {history_after * 1000:.1f}ms (ATTACH 포함)")
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+# =========================================================
+# 11. 계측: 메트릭 갱신 비용 / 엔진 처리량 영향 / 스크레이프 / 프로파일러 켠 동안 영향
+# =========================================================
+def replay_throughput(args, workdir, name):
+    # 결정적 재생 (bench_engine (1) 과 같음) -> 초당 폴링 수
+    spooler = make_spooler(args, speed=None)
+    writer = core.LogWriter(db_path=make_temp_db(workdir, name))
+    writer.start()
+    processed = core.JobDedup()
+    devnull = open(os.devnull, "w", encoding="utf-8")
+    t0 = time.perf_counter()
+    with contextlib.redirect_stdout(devnull):
+        core.poll_once(spooler, writer, processed, "PC-BENCH")
+        while spooler.step():
+            core.poll_once(spooler, writer, processed, "PC-BENCH")
+    elapsed = time.perf_counter() - t0
+    writer.stop()
+    devnull.close()
+    return len(spooler.frames) / elapsed
+
+@contextlib.contextmanager
+def metrics_disabled():
+    # 계측 호출을 빈 함수로 바꿔서 "계측 없음" 기준을 잰다
+    patched = [m for m in core.METRICS.metrics if isinstance(m, (core.Counter, core.Histogram))]
+    for metric in patched:
+        metric.inc = metric.observe = lambda *a, **k: None
+    try:
+        yield
+    finally:
+        for metric in patched:
+            del metric.inc, metric.observe
+
+def bench_metrics(args):
+    import diagnostics
+    # (1) 호출 하나당 비용
+    counter = core.Counter("bench_total", "", ("printer",))
+    histogram = core.Histogram("bench_seconds", "", ("printer",))
+    n = args.calls
+    for title, fn in (("Counter.inc(printer)", lambda: counter.inc("Printer-1")),
+                      ("Histogram.observe(printer)", lambda: histogram.observe(0.003, "Printer-1")),
+                      ("Histogram.observe()", lambda: histogram.observe(0.003))):
+        t0 = time.perf_counter()
+        for _ in range(n):
+            fn()
+        print(f"[metrics] {title:<28} {(time.perf_counter() - t0) / n * 1e9:,.0f}ns/회")
+
+    workdir = tempfile.mkdtemp(prefix="pm_bench_")
+    try:
+        # (2) 엔진 처리량: 계측 있음 / 없음 / 프로파일러 켬 (번갈아 repeat 번, 중앙값)
+        runs = {"계측 없음": [], "계측": [], "계측 + 프로파일러": []}
+        for i in range(args.repeat):
+            with metrics_disabled():
+                runs["계측 없음"].append(replay_throughput(args, workdir, f"off{i}.db"))
+            runs["계측"].append(replay_throughput(args, workdir, f"on{i}.db"))
+            with contextlib.redirect_stdout(open(os.devnull, "w", encoding="utf-8")):
+                diagnostics.PROFILER.start(args.profile_interval)
+            runs["계측 + 프로파일러"].append(replay_throughput(args, workdir, f"prof{i}.db"))
+            with contextlib.redirect_stdout(open(os.devnull, "w", encoding="utf-8")):
+                diagnostics.PROFILER.stop()
+        base = percentile(runs["계측 없음"], 0.5)
+        print(f"[metrics] 결정적 재생 (프린터 {args.printers}대, 작업 {args.jobs:,}건, {args.repeat}회 중앙값)")
+        for title, values in runs.items():
+            value = percentile(values, 0.5)
+            print(f"  {title:<16} {value:>9,.0f} polls/s  ({(value / base - 1) * 100:+.1f}%)")
+
+        # (3) 스크레이프: 지금까지 쌓인 값 (프린터 수만큼 라벨) 을 HTTP 로
+        with contextlib.redirect_stdout(open(os.devnull, "w", encoding="utf-8")):
+            server = diagnostics.start_metrics_server(0)
+        port = server.server_address[1]
+        try:
+            text = diagnostics.request(port, "/metrics")
+            times = []
+            for _ in range(args.scrapes):
+                t0 = time.perf_counter()
+                diagnostics.request(port, "/metrics")
+                times.append(time.perf_counter() - t0)
+            t0 = time.perf_counter()
+            diagnostics.format_report(diagnostics.parse_metrics(text))
+            report = time.perf_counter() - t0
+        finally:
+            server.close()
+        print(f"[metrics] /metrics {len(text) / 1024:,.0f}KB, {text.count(chr(10)):,}줄: 스크레이프 p50 {percentile(times, 0.5) * 1000:.1f}ms"
+              f"  p99 {percentile(times, 0.99) * 1000:.1f}ms  | 요약 화면 변환 {report * 1000:.1f}ms")
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+# =========================================================
+# 11-1. 월 한도: 기록 한 건 반영 / 감시 루프의 작업당 확인 비용 (DB 없이 메모리 누계만)
+# =========================================================
+def bench_quota(args):
+    workdir = tempfile.mkdtemp(prefix="pm_bench_")
+    try:
+        path = make_temp_db(workdir, "quota.db")
+        core.update_setting("quota_user_pages", 500)
+        core.update_setting("quota_pause", 1)
+        quotas = core.QuotaTracker(path)
+        quotas.reseed()
+        month = datetime.date.today().strftime("%Y-%m")
+        rnd = random.Random(args.seed)
+        rows = [{"id": i + 1, "print_time": f"{month}-01 09:00:00", "user_name": f"user{rnd.randint(1, args.users):04d}",
+                 "computer_name": f"PC-{rnd.randint(1, args.users // 4 or 1):04d}", "pages": rnd.randint(1, 20), "cost": 500}
+                for i in range(args.rows)]
+        devnull = open(os.devnull, "w", encoding="utf-8")
+        with contextlib.redirect_stdout(devnull):     # 한도 초과 알림은 찍지 않음
+            t0 = time.perf_counter()
+            for start in range(0, len(rows), args.batch):
+                quotas.record(rows[start:start + args.batch])
+            record = (time.perf_counter() - t0) / len(rows)
+        devnull.close()
+        users = [row["user_name"] for row in rows[:10000]]
+        t0 = time.perf_counter()
+        for _ in range(args.rows // len(users)):
+            for user in users:
+                quotas.should_pause(user, "PC-0001")
+        check = (time.perf_counter() - t0) / (args.rows // len(users) * len(users))
+        print(f"[quota] 사용자 {args.users:,}명, 기록 {args.rows:,}건 (배치 {args.batch}): 한 건 반영 {record * 1e9:,.0f}ns"
+              f" | 작업당 확인(should_pause) {check * 1e9:,.0f}ns | 한도 초과 {len(quotas.blocked['user']):,}명")
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+# =========================================================
+# 11-2. 작업 수명: 쪽수가 한 장씩 늘어나는 작업 / 취소 / 오류 / 인쇄 후 보관을 재생해서 기록의 최종 쪽수·상태 확인
+#       + 큐가 그대로일 때 지난 조회와 비교하는 비용 (틀린 기록이 있으면 종료 코드 1)
+# =========================================================
+JOB_SPOOLING, JOB_PRINTING = 0x8, 0x10
+LIFECYCLE_OUTCOMES = (("printed", 0.6), ("kept", 0.1), ("deleted", 0.15), ("cancel_spooling", 0.05), ("error", 0.1))
+
+def lifecycle_frames(printers=5, jobs=400, steps=600, seed=0):
+    # 프레임(조회 한 번)마다 스풀 중에는 TotalPages, 인쇄 중에는 PagesPrinted 가 한 장씩 늘어남
+    # -> (결정적 재생용 SimulatedSpooler, {(프린터, JobId): (최종 쪽수, 상태)})
+    rnd = random.Random(seed)
+    names = [f"LifePrinter-{i:02d}" for i in range(printers)]
+    base = datetime.datetime(2024, 1, 1, 9, 0, 0)
+    snapshots = [{name: [] for name in names} for _ in range(steps)]
+    outcomes, weights = zip(*LIFECYCLE_OUTCOMES)
+    expected = {}
+    for job_id in range(1, jobs + 1):
+        name = rnd.choice(names)
+        pages = rnd.randint(1, 30)
+        outcome = rnd.choices(outcomes, weights)[0]
+        job = {"JobId": job_id, "pUserName": f"user{rnd.randint(1, 50):03d}", "pDocument": f"{outcome}_{job_id}.pdf",
+               "Submitted": base + datetime.timedelta(seconds=job_id), "pDevMode": core.SimDevMode(Color=rnd.choice((1, 2)))}
+        # 조회마다 보이는 (TotalPages, PagesPrinted, Status)
+        states = [(n, 0, JOB_SPOOLING) for n in range(pages + 1)]
+        if outcome == "cancel_spooling":
+            cut = rnd.randint(1, pages)
+            states = states[:cut + 1] + [(cut, 0, JOB_SPOOLING | core.JOB_STATUS_DELETING)]
+            final = (0, "DELETED")
+        else:
+            printing = [(pages, n, JOB_PRINTING) for n in range(pages + 1)]
+            if outcome in ("deleted", "error"):
+                done = rnd.randint(0, pages - 1)
+                flag = core.JOB_STATUS_DELETING if outcome == "deleted" else core.JOB_STATUS_ERROR
+                states += printing[:done + 1] + [(pages, done, JOB_PRINTING | flag)]
+                final = (done, "DELETED" if outcome == "deleted" else "ERROR")
+            else:
+                states += printing
+                if outcome == "kept": states += [(pages, pages, core.JOB_STATUS_PRINTED)] * 3   # 인쇄 후 문서 보관
+                final = (pages, "PRINTED")
+        start = rnd.randint(0, steps - len(states) - 1)     # 끝난 뒤 적어도 한 프레임은 큐에서 빠져 있게
+        for offset, (total, printed, status) in enumerate(states):
+            snapshots[start + offset][name].append(dict(job, TotalPages=total, PagesPrinted=printed, Status=status))
+        expected[(name, job_id)] = final
+    return core.SimulatedSpooler([(float(t), snapshot) for t, snapshot in enumerate(snapshots)], speed=None), expected
+
+def replay_lifecycle(path, spooler, restart_at=None, down=0, crash=False):
+    # 프레임마다 poll_once. restart_at 프레임에서 엔진을 새로 띄운 것처럼 기록기를 멈추고 중복 집합 / 지난 조회 결과를 버린 뒤
+    # down 프레임 동안 조회하지 않음 (그 사이 끝나거나 사라진 작업은 시작할 때 읽은 PRINTING 기록으로 마무리)
+    # crash: 진행 중 작업을 저장(save_open_jobs)하지 못하고 꺼진 경우 (PRINTING 행은 처음 기록한 쪽수 그대로)
+    # 돌려주는 값: (기록 건수, 고친 건수, 한도 누계, 다시 시작할 때 이어받은 PRINTING 작업 수)
+    quotas = core.QuotaTracker(path)
+    quotas.reseed()
+    writer = core.LogWriter(db_path=path, on_commit=quotas.record, on_update=quotas.update)
+    writer.start()
+    committed = updated = restored = 0
+    processed, snapshots = core.JobDedup(), {}
+    with contextlib.redirect_stdout(open(os.devnull, "w", encoding="utf-8")):
+        frame = 0
+        while True:
+            if frame == restart_at:
+                if not crash: core.save_open_jobs(snapshots, writer, "PC-BENCH")
+                writer.stop()
+                committed, updated = committed + writer.committed, updated + writer.updated
+                for _ in range(down):
+                    if spooler.step(): frame += 1
+                writer = core.LogWriter(db_path=path, on_commit=quotas.record, on_update=quotas.update)
+                writer.start()
+                processed = core.JobDedup()
+                snapshots = core.restore_open_jobs(processed, "PC-BENCH", path)
+                restored = sum(len(jobs.restored) for jobs in snapshots.values())
+            core.poll_once(spooler, writer, processed, "PC-BENCH", snapshots=snapshots)
+            if not spooler.step(): break
+            frame += 1
+        core.poll_once(spooler, writer, processed, "PC-BENCH", snapshots=snapshots)
+    writer.stop()
+    return committed + writer.committed, updated + writer.updated, quotas, restored
+
+def check_lifecycle(path, expected, quotas, exact=True):
+    # 틀린 항목 설명 목록 (비었으면 통과). exact=False 면 작업별로는 기록이 있는지만 확인
+    conn = sqlite3.connect(path)
+    rows = {(printer, job_id): (pages, status, cost, unit_cost) for printer, job_id, pages, status, cost, unit_cost
+            in conn.execute("SELECT printer_name, job_id, pages, status, cost, unit_cost FROM logs")}
+    if exact:
+        problems = [f"{key}: 기록 {rows[key][:2] if key in rows else '없음'} / 기대 {want}"
+                    for key, want in expected.items() if rows.get(key, (None, None))[:2] != want]
+    else:
+        problems = [f"{key}: 기록 없음" for key in expected if key not in rows]
+    problems += [f"{key}: 비용 {cost} != {pages} x {unit_cost}" for key, (pages, _, cost, unit_cost) in rows.items() if cost != pages * unit_cost]
+    problems += [f"{key}: 끝났는데 PRINTING 으로 남음" for key, (_, status, _, _) in rows.items() if status == "PRINTING"]
+    summary = conn.execute("SELECT IFNULL(SUM(pages), 0), IFNULL(SUM(cost), 0) FROM daily_summary").fetchone()
+    actual = conn.execute("SELECT IFNULL(SUM(pages), 0), IFNULL(SUM(cost), 0) FROM log_entries").fetchone()
+    if summary != actual: problems.append(f"일별 집계 {summary} != 로그 합계 {actual}")
+    conn.close()
+    # 월 한도 누계 (기록 + 고침 알림으로만 더한 값) 가 DB 에서 다시 읽은 값과 같은지
+    fresh = core.QuotaTracker(path)
+    fresh.reseed()
+    if quotas.totals != fresh.totals:
+        diff = {key: (quotas.totals.get(key), fresh.totals.get(key)) for key in quotas.totals.keys() | fresh.totals.keys()
+                if quotas.totals.get(key) != fresh.totals.get(key)}
+        problems.append(f"한도 누계 불일치 {len(diff)}건: {list(diff.items())[:3]}")
+    return problems
+
+class NullWriter:
+    def submit(self, record): pass
+    def submit_update(self, update): pass
+
+def diff_cost(queue_size, cycles):
+    # 작업 queue_size 개가 그대로 있는 큐를 cycles 번 처리: (작업당 ns, 조회 한 번에 새로 잡은 메모리 바이트)
+    import tracemalloc
+    base = datetime.datetime(2024, 1, 1, 9, 0, 0)
+    jobs = [{"JobId": i, "pUserName": "user001", "pDocument": f"doc_{i}.pdf", "TotalPages": 5, "PagesPrinted": 0,
+             "Status": JOB_PRINTING, "Submitted": base + datetime.timedelta(seconds=i), "pDevMode": core.SimDevMode()} for i in range(queue_size)]
+    results = {}
+    for title, snapshot in (("지난 조회와 비교", core.PrinterJobs()), ("중복 집합만 (예전)", None)):
+        writer, processed = NullWriter(), core.JobDedup()
+        with contextlib.redirect_stdout(open(os.devnull, "w", encoding="utf-8")):
+            core.process_jobs("Printer-1", jobs, writer, processed, "PC-BENCH", snapshot=snapshot)
+        t0 = time.perf_counter()
+        for _ in range(cycles):
+            core.process_jobs("Printer-1", jobs, writer, processed, "PC-BENCH", snapshot=snapshot)
+        per_job = (time.perf_counter() - t0) / cycles / queue_size
+        tracemalloc.start()
+        core.process_jobs("Printer-1", jobs, writer, processed, "PC-BENCH", snapshot=snapshot)
+        allocated = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+        results[title] = (per_job, allocated)
+    return results
+
+class SteppedSpooler(core.SimulatedSpooler):
+    # 결정적 재생을 감시 스레드(monitor_loop)로: 모든 프린터가 지금 프레임을 한 번씩 조회했는지 기록
+    def __init__(self, frames):
+        super().__init__(frames, speed=None)
+        self.polled = set()     # (프레임, 프린터)
+
+    def enum_jobs(self, handle, first_job=0, count=100):
+        index = self.index
+        jobs = super().enum_jobs(handle, first_job, count)
+        self.polled.add((index, handle))
+        return jobs
+
+    def wait_polled(self, timeout=5.0):
+        # 모든 프린터가 지금 프레임을 볼 때까지
+        deadline = time.monotonic() + timeout
+        while any((self.index, name) not in self.polled for name in self.printers):
+            if time.monotonic() > deadline: raise TimeoutError(f"프레임 {self.index} 을 조회하지 않음")
+            time.sleep(0.001)
+
+    def step_when_polled(self, timeout=5.0):
+        # 모두 본 뒤에 다음 프레임으로 (감시 스레드가 프레임을 건너뛰지 않게)
+        self.wait_polled(timeout)
+        return self.step()
+
+def run_in_process(path, spooler, frames, quotas):
+    # 창 내부 감시와 같은 구성(기록기 + 감시 스레드 + 한도)으로 frames 프레임만큼 재생한 뒤 창을 닫을 때처럼 종료
+    # (gui.App.on_close 와 같은 core.stop_monitor). 돌려주는 값: (기록 건수, 고친 건수, 종료 후 PRINTING 으로 남긴 작업 수, 틀린 항목)
+    writer = core.LogWriter(db_path=path, on_commit=quotas.record, on_update=quotas.update)
+    writer.start()
+    stop_event = threading.Event()
+    thread = threading.Thread(target=core.monitor_loop, args=(writer, stop_event, spooler),
+                              kwargs={"quotas": quotas, "poll_interval": 0.01}, daemon=True)
+    thread.start()
+    for _ in range(frames):
+        if not spooler.step_when_polled(): break
+    spooler.wait_polled()      # 마지막 프레임도 본 뒤에 닫음
+    core.stop_monitor(stop_event, thread, writer)
+    conn = sqlite3.connect(path)
+    rows = {(printer, job_id): (pages, status) for printer, job_id, pages, status
+            in conn.execute("SELECT printer_name, job_id, pages, status FROM logs")}
+    conn.close()
+    # 닫을 때 큐에 있던 (오류 / 삭제 중이 아닌, 쪽수가 잡힌) 작업은 마지막으로 본 쪽수로 저장되어 있어야 함
+    problems = [f"{(name, job['JobId'])}: 닫은 뒤 {rows.get((name, job['JobId']), ('없음',))[0]}쪽 / 마지막으로 본 쪽수 "
+                f"{max(job['TotalPages'], job['PagesPrinted'])}"
+                for name, jobs in spooler.frames[spooler.index][1].items() for job in jobs
+                if max(job["TotalPages"], job["PagesPrinted"]) and not job["Status"] & (core.JOB_STATUS_ERROR | core.JOB_STATUS_DELETING)
+                and rows.get((name, job["JobId"]), (None,))[0] != max(job["TotalPages"], job["PagesPrinted"])]
+    left = sum(status == "PRINTING" for _, status in rows.values())
+    return writer.committed, writer.updated, left, problems
+
+def bench_lifecycle(args):
+    workdir = tempfile.mkdtemp(prefix="pm_bench_")
+    failed = 0
+    try:
+        # 꺼진 동안 끝남: 그 사이 시작해서 끝난 작업은 볼 수 없고, 진행 중이던 작업은 마지막으로 본 쪽수로 마무리되므로
+        # 작업별 최종 값 대신 PRINTING 이 남지 않았는지와 비용 / 일별 집계 / 한도 누계가 서로 맞는지만 확인
+        # 비정상 종료: 저장하지 못한 쪽수 / 오류 상태는 알 수 없으므로 모든 작업이 기록되고 PRINTING 이 남지 않았는지만
+        for title, restart_at, down, crash in (("연속 실행", None, 0, False), ("중간에 재시작", args.steps // 2, 0, False),
+                                               ("꺼진 동안 끝남", args.steps // 3, args.steps // 10, False),
+                                               ("비정상 종료 후 재시작", args.steps // 2, 0, True)):
+            spooler, expected = lifecycle_frames(args.printers, args.jobs, args.steps, args.seed)
+            path = make_temp_db(workdir, f"lifecycle_{restart_at}_{down}_{crash}.db")
+            t0 = time.perf_counter()
+            committed, updated, quotas, restored = replay_lifecycle(path, spooler, restart_at, down, crash)
+            elapsed = time.perf_counter() - t0
+            problems = check_lifecycle(path, {} if down else expected, quotas, exact=not crash)
+            if restart_at is not None and not restored:
+                problems.append("다시 시작할 때 이어받은 PRINTING 작업이 없음 (재시작 시점을 바꿔야 함)")
+            counts = collections.Counter(status for _, status in expected.values())
+            print(f"[lifecycle] {title}: 작업 {len(expected):,}건 ({', '.join(f'{k} {v}' for k, v in sorted(counts.items()))}),"
+                  f" 프레임 {len(spooler.frames)}개 {elapsed:.2f}s | 기록 {committed:,} / 고침 {updated:,}"
+                  f"{f' / 이어받은 PRINTING {restored}건' if restart_at is not None else ''}"
+                  f" | {'통과' if not problems else f'틀림 {len(problems)}건'}")
+            for problem in problems[:10]:
+                print(f"  {problem}")
+            failed += bool(problems)
+
+        # 창 내부 감시: 창을 닫고(on_close 순서) 다시 열기. 감시 스레드가 닫으면서 넘긴 진행 중 작업의 쪽수가
+        # 기록기 종료 전에 저장되어야 다시 열었을 때 이어서 정확한 최종 값이 나옴
+        spooler, expected = lifecycle_frames(args.printers, args.jobs // 4, args.steps // 4, args.seed)
+        spooler = SteppedSpooler(spooler.frames)
+        path = make_temp_db(workdir, "lifecycle_gui.db")
+        database = core.DB_PATH
+        core.DB_PATH = path     # monitor_loop 는 DB_PATH 에서 지난 실행의 PRINTING 작업 / 요금표를 읽음
+        try:
+            quotas = core.QuotaTracker(path)
+            quotas.reseed()
+            t0 = time.perf_counter()
+            with contextlib.redirect_stdout(open(os.devnull, "w", encoding="utf-8")):
+                first = run_in_process(path, spooler, len(spooler.frames) // 2, quotas)
+                second = run_in_process(path, spooler, len(spooler.frames), quotas)
+            elapsed = time.perf_counter() - t0
+        finally:
+            core.DB_PATH = database
+        problems = first[3] + check_lifecycle(path, expected, quotas)
+        if not first[2]:
+            problems.append("창을 닫을 때 진행 중인 작업이 없음 (시점을 바꿔야 함)")
+        print(f"[lifecycle] 창 닫고 다시 열기 (감시 스레드): 작업 {len(expected):,}건, 프레임 {len(spooler.frames)}개 {elapsed:.2f}s"
+              f" | 닫을 때 PRINTING {first[2]}건 | 기록 {first[0] + second[0]:,} / 고침 {first[1] + second[1]:,}"
+              f" | {'통과' if not problems else f'틀림 {len(problems)}건'}")
+        for problem in problems[:10]:
+            print(f"  {problem}")
+        failed += bool(problems)
+
+        for title, (per_job, allocated) in diff_cost(args.queue, args.cycles).items():
+            print(f"[lifecycle] 그대로인 큐 {args.queue:,}건 처리 ({title}): 작업당 {per_job * 1e9:,.0f}ns, 조회 한 번에 새로 잡는 메모리 {allocated:,}B")
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+    return 1 if failed else 0
+
+# =========================================================
+# 12. 회귀 측정 묶음: 규모별(10k / 1M / 10M) 합성 DB 로 저장 / 조회 / 리포트 경로를 재고 JSON 으로 남겨 비교
+# =========================================================
+SUITE_END = datetime.date(2024, 12, 31)
+
+def parse_rows(text):
+    # "10k" / "1m" / "2.5M" / "12000" -> 행 수
+    text = text.strip().lower()
+    scale = {"k": 1000, "m": 1000000}.get(text[-1:], 1)
+    return int(float(text.rstrip("km")) * scale)
+
+def rows_label(rows):
+    for unit, scale in (("m", 1000000), ("k", 1000)):
+        if rows >= scale and rows % scale == 0: return f"{rows // scale}{unit}"
+    return str(rows)
+
+def generate_db(path, rows, days=365, seed=0, end=SUITE_END):
+    # realistic_records 로 print_log.db 형식의 DB 를 만든다 (창 / main.py --db 로 그대로 열림, 보관은 꺼 둠)
+    tmp = path + ".part"
+    for suffix in ("", "-wal", "-shm"):
+        if os.path.exists(tmp + suffix): os.remove(tmp + suffix)
+    core.DB_PATH = tmp
+    core.init_db()
+    core.update_setting("retention_months", 0)
+    t0 = time.perf_counter()
+    last = [t0]
+    def progress(n):
+        if time.perf_counter() - last[0] >= 10:
+            last[0] = time.perf_counter()
+            print(f"  ... {n:,}/{rows:,}건 ({n / (last[0] - t0):,.0f}건/s)")
+    bulk_load(tmp, realistic_records(rows, days, end, seed), progress=progress)
+    os.replace(tmp, path)   # 다 만들어진 것만 재사용 대상
+    print(f"[generate] {path}: {rows:,}건 / {days}일, {time.perf_counter() - t0:.1f}s, {os.path.getsize(path) / 1024 / 1024:,.1f}MB")
+    return path
+
+def suite_fixture(data_dir, rows, days, seed):
+    os.makedirs(data_dir, exist_ok=True)
+    path = os.path.join(data_dir, f"print_log_{rows_label(rows)}_{days}d_s{seed}.db")
+    if os.path.exists(path):
+        print(f"[suite] 합성 DB 재사용: {path}")
+        return path
+    return generate_db(path, rows, days, seed)
+
+def measure(fn, repeat, min_time=0.5, max_runs=200):
+    # 호출마다 걸린 초 (첫 호출 포함). 빠른 항목은 min_time 초를 채울 때까지 더 돌려서 중앙값을 안정시킴
+    values = []
+    started = time.perf_counter()
+    while len(values) < repeat or (time.perf_counter() - started < min_time and len(values) < max_runs):
+        t0 = time.perf_counter()
+        fn()
+        values.append(time.perf_counter() - t0)
+    return values
+
+def suite_cases(path, repeat, workdir):
+    # [(이름, 단위, 더 좋은 쪽, 측정값 목록)]
+    core.DB_PATH = path
+    core.init_db()      # 예전에 만든 합성 DB 에도 새 테이블 (quota_limits 등)
+    conn = sqlite3.connect(path)
+    last_id = conn.execute("SELECT MAX(id) FROM log_entries").fetchone()[0]
+    top_user = conn.execute("SELECT name FROM users WHERE id = (SELECT user_id FROM log_entries GROUP BY user_id ORDER BY COUNT(*) DESC LIMIT 1)").fetchone()[0]
+    top_printer = conn.execute("SELECT name FROM printers WHERE id = (SELECT printer_id FROM log_entries GROUP BY printer_id ORDER BY COUNT(*) DESC LIMIT 1)").fetchone()[0]
+    end = SUITE_END.isoformat()
+    day = lambda n: (SUITE_END - datetime.timedelta(days=n - 1)).isoformat()
+    month = {"start_date": day(31), "end_date": end}
+    cases = []
+
+    def add(name, fn, unit="s", better="lower"):
+        cases.append((name, unit, better, measure(fn, repeat)))
+
+    # 대시보드 (refresh_dashboard_stats -> dashboard_snapshot)
+    for n in (1, 30, 365):
+        add(f"dashboard_{n}d", lambda: core.dashboard_snapshot(day(n), end, conn))
+    # 이력 화면 (show_history -> query_history 한 페이지)
+    add("history_first_page", lambda: core.query_history({}, None, 100, conn))
+    add("history_deep_page", lambda: core.query_history({}, last_id // 2, 100, conn))
+    add("history_top_user", lambda: core.query_history({"user": top_user}, None, 100, conn))
+    add("history_printer_month", lambda: core.query_history({"printer": top_printer, **month}, None, 100, conn))
+    add("history_doc_search", lambda: core.query_history({"doc": "견적"}, None, 100, conn))
+    # 리포트 / 내보내기
+    add("report_user_year", lambda: list(core.iter_report("user", {"start_date": day(365), "end_date": end}, conn)))
+    devnull = open(os.devnull, "w", encoding="utf-8")
+    with contextlib.redirect_stdout(devnull):
+        add("export_month_csv", lambda: core.export_logs(os.path.join(workdir, "export.csv"), month))
+    # 월 한도: 엔진 / 화면 시작 때 이번 달 사용자 / PC 별 사용량을 한 번 읽음 (QuotaTracker.reseed)
+    add("quota_seed_month", lambda: core.QuotaTracker(path).reseed(SUITE_END))
+    conn.close()
+
+    # 단가 재계산 (recalculate_db_costs): 요금표를 번갈아 바꿔서 매번 한 달 치가 모두 바뀌게
+    values = []
+    for i in range(repeat):
+        tariff = {k: core.current_settings[k] for k in core.TARIFF_KEYS}
+        tariff["cost_bw_a4"] += 10 if i % 2 == 0 else -10
+        with contextlib.redirect_stdout(devnull):
+            core.add_tariff(tariff, f"{day(31)} 00:00:00")
+            t0 = time.perf_counter()
+            core.recalculate_db_costs(day(31), end)
+        values.append(time.perf_counter() - t0)
+    cases.append(("recalc_month", "s", "lower", values))
+
+    # 기록 경로 (monitor_loop -> LogWriter): 큰 DB 뒤에 이어서 넣는 처리량 / 한 건씩 커밋할 때 지연
+    records = list(realistic_records(20000, 7, SUITE_END + datetime.timedelta(days=7), seed=99))
+    values = []
+    for i in range(repeat):
+        writer = core.LogWriter(db_path=path)
+        writer.start()
+        batch = [(job_id + 1000000 * (i + 1), *rest) for job_id, *rest in records]
+        t0 = time.perf_counter()
+        for record in batch:
+            writer.submit(record)
+        writer.stop()
+        values.append(len(batch) / (time.perf_counter() - t0))
+    cases.append(("insert_writer_rows_per_s", "rows/s", "higher", values))
+    stop = threading.Event()
+    threading.Timer(3.0, stop.set).start()
+    cases.append(("insert_commit_latency", "s", "lower", live_insert_latencies(path, stop)))
+    devnull.close()
+    return cases
+
+def suite_metadata(args):
+    try:
+        commit = subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=os.path.dirname(os.path.abspath(__file__)),
+                                capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+    return {"created": datetime.datetime.now().isoformat(timespec="seconds"), "commit": commit,
+            "python": sys.version.split()[0], "sqlite": sqlite3.sqlite_version, "platform": sys.platform,
+            "cpus": os.cpu_count(), "sizes": args.sizes, "days": args.days, "seed": args.seed, "repeat": args.repeat}
+
+def bench_suite(args):
+    sizes = [parse_rows(size) for size in args.sizes.split(",")]
+    results = {"meta": suite_metadata(args), "results": {}}
+    for rows in sizes:
+        fixture = suite_fixture(args.data_dir, rows, args.days, args.seed)
+        workdir = tempfile.mkdtemp(prefix="pm_bench_")
+        try:
+            # 재계산 / 기록이 DB 를 바꾸므로 복사본에서
+            path = os.path.join(workdir, "print_log.db")
+            shutil.copyfile(fixture, path)
+            cases = suite_cases(path, args.repeat, workdir)
+        finally:
+            shutil.rmtree(workdir, ignore_errors=True)
+        label = rows_label(rows)
+        results["results"][label] = {
+            "rows": rows, "db_mb": round(os.path.getsize(fixture) / 1024 / 1024, 1),
+            "cases": {name: {"unit": unit, "better": better, "median": percentile(values, 0.5),
+                             "p90": percentile(values, 0.9), "values": values} for name, unit, better, values in cases},
+        }
+        print(f"[suite] {label} ({rows:,}건, {results['results'][label]['db_mb']:,}MB)")
+        for name, unit, better, values in cases:
+            print(f"  {name:<26} {format_case(unit, percentile(values, 0.5))}")
+
+    out = args.out or os.path.join("bench_results", f"suite-{datetime.datetime.now():%Y%m%d-%H%M%S}"
+                                   + (f"-{results['meta']['commit']}" if results['meta']['commit'] else "") + ".json")
+    os.makedirs(os.path.dirname(out) or ".", exist_ok=True)
+    with open(out, "w", encoding="utf-8") as f:
+        json.dump(results, f, ensure_ascii=False, indent=1)
+    print(f"[suite] 결과 저장: {out}")
+    if args.compare:
+        return compare_results(load_results(args.compare), results, args.threshold, args.min_delta, args.stat)
+    return 0
+
+def format_case(unit, value):
+    if unit == "s": return f"{value * 1000:>10.2f}ms"
+    return f"{value:>10,.0f} {unit}"
+
+def load_results(path):
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+def case_value(case, stat):
+    if stat == "min": return (max if case["better"] == "higher" else min)(case["values"])   # 가장 좋은 값
+    return case["median"]
+
+def compare_results(old, new, threshold=0.2, min_delta=0.001, stat="median"):
+    # stat(중앙값 / 최소값) 기준으로 threshold 넘게 나빠진 항목이 있으면 1 (종료 코드로 사용)
+    # 시간 항목은 min_delta 초 이상 차이 날 때만 (1ms 미만 조회는 잡음이 더 큼)
+    # 다른 작업과 CPU 를 나눠 쓰는 PC 라면 stat="min" 이 덜 흔들림
+    print(f"[compare] {old['meta'].get('commit')} ({old['meta']['created']}) -> {new['meta'].get('commit')} ({new['meta']['created']})")
+    regressions = 0
+    for label, result in new["results"].items():
+        before = old["results"].get(label)
+        if not before: continue
+        print(f"  {label}")
+        for name, case in result["cases"].items():
+            prev = before["cases"].get(name)
+            if not prev: continue
+            before_value, value = case_value(prev, stat), case_value(case, stat)
+            change = value / before_value - 1 if before_value else 0.0
+            worse = change > threshold if case["better"] == "lower" else change < -threshold
+            if case["unit"] == "s" and abs(value - before_value) < min_delta: worse = False
+            regressions += worse
+            print(f"    {name:<26} {format_case(case['unit'], before_value)} -> {format_case(case['unit'], value)}"
+                  f"  {change * 100:+6.1f}%" + ("  <-- 느려짐" if worse else ""))
+    print(f"[compare] 기준 {threshold * 100:.0f}% 초과 악화 {regressions}건")
+    return 1 if regressions else 0
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Print Manager 성능 측정")
+    sub = parser.add_subparsers(dest="cmd", required=True)
+
+    p = sub.add_parser("writer", help="로그 기록 처리량 (작업당 커밋 vs 배치 커밋)")
+    p.add_argument("--jobs", type=int, default=5000)
+    p.add_argument("--batch-size", type=int, default=200)
+    p.add_argument("--flush-interval", type=float, default=0.5)
+
+    p = sub.add_parser("writer-lock", help="DB 가 잠긴 동안 작업이 계속 들어올 때 기록기 다시 시도 / batch 크기 (틀리면 예외)")
+    p.add_argument("--lock", type=float, default=3.0, help="다른 연결이 DB 를 잡고 있는 초")
+    p.add_argument("--tail", type=float, default=3.0, help="잠김이 풀린 뒤에도 계속 제출하는 초")
+    p.add_argument("--rate", type=int, default=1000, help="초당 제출 건수")
+    p.add_argument("--batch-size", type=int, default=200)
+    p = sub.add_parser("engine", help="감시 엔진 처리량 / 탐지 지연 (시뮬레이터 스풀러)")
+    p.add_argument("--printers", type=int, default=100)
+    p.add_argument("--jobs", type=int, default=5000)
+    p.add_argument("--duration", type=float, default=60.0, help="합성 시나리오 길이(초)")
+    p.add_argument("--speed", type=float, default=10.0, help="시간 재생 배속")
+    p.add_argument("--poll-interval", type=float, default=0.1)
+    p.add_argument("--seed", type=int, default=0)
+    p.add_argument("--replay", help="record_spooler 로 남긴 기록 파일 (지정 시 합성 대신 사용)")
+
+    p = sub.add_parser("spooler", help="기본 스풀러(Win32Spooler)로 monitor_loop 가 도는지 확인 (pywin32 없으면 대역 모듈, 실패 시 종료 코드 1)")
+    p.add_argument("--printers", type=int, default=3)
+    p.add_argument("--jobs", type=int, default=60)
+    p.add_argument("--duration", type=float, default=3.0)
+    p.add_argument("--speed", type=float, default=2.0)
+    p.add_argument("--seed", type=int, default=0)
+
+    p = sub.add_parser("dashboard", help="대시보드 기간 집계 (기간 길이별 조회 시간)")
+    p.add_argument("--rows", type=int, default=2_000_000)
+    p.add_argument("--days", type=int, default=365)
+    p.add_argument("--repeat", type=int, default=3)
+
+    p = sub.add_parser("poller", help="프린터 폴링 방식별 탐지 지연 / CPU (느린·불통 프린터 포함)")
+    p.add_argument("--printers", type=int, default=300)
+    p.add_argument("--jobs", type=int, default=1500)
+    p.add_argument("--duration", type=float, default=20.0)
+    p.add_argument("--linger", type=float, default=5.0, help="작업이 큐에 머무는 시간(초)")
+    p.add_argument("--slow", type=int, default=5)
+    p.add_argument("--slow-delay", type=float, default=2.0)
+    p.add_argument("--unreachable", type=int, default=5)
+    p.add_argument("--big-queue", type=int, default=350)
+    p.add_argument("--poll-interval", type=float, default=1.0)
+    p.add_argument("--workers", type=int, default=8)
+    p.add_argument("--timeout", type=float, default=1.0)
+    p.add_argument("--seed", type=int, default=0)
+
+    p = sub.add_parser("history", help="이력 페이지 조회 시간 (테이블 크기별)")
+    p.add_argument("--sizes", default="1000,100000,1000000", help="쉼표로 구분한 로그 건수")
+    p.add_argument("--page-size", type=int, default=200)
+    p.add_argument("--repeat", type=int, default=5)
+
+    p = sub.add_parser("ui", help="새 로그 폭주 시 화면 갱신 메인 스레드 시간 (디스플레이 필요)")
+    p.add_argument("--burst", type=int, default=200)
+    p.add_argument("--wait", type=float, default=4.0, help="대시보드 폭주 감지를 기다리는 시간(초)")
+    p.add_argument("--legacy-samples", type=int, default=10)
+
+    p = sub.add_parser("dedup", help="중복 감지 구조 메모리 (30일 모의 운영 + 재시작)")
+    p.add_argument("--days", type=int, default=30)
+    p.add_argument("--jobs-per-day", type=int, default=4000)
+    p.add_argument("--printers", type=int, default=20)
+    p.add_argument("--max-job-id", type=int, default=2000)
+    p.add_argument("--seed", type=int, default=0)
+
+    p = sub.add_parser("startup", help="모드별 import 시간 / 최대 RSS 예산 확인 (초과 시 종료 코드 1)")
+    p.add_argument("--duration", type=float, default=2.0, help="headless 모드 실행 시간(초)")
+    p.add_argument("--repeat", type=int, default=3)
+    p.add_argument("--skip-gui", action="store_true", help="GUI 모듈이 없는 환경에서 headless 만 측정")
+
+    p = sub.add_parser("ipc", help="화면 부하 중 탐지 지연 (창 내부 스레드 vs 엔진 프로세스 + 이벤트 채널)")
+    p.add_argument("--printers", type=int, default=50)
+    p.add_argument("--jobs", type=int, default=600)
+    p.add_argument("--duration", type=float, default=30.0, help="합성 시나리오 길이(초)")
+    p.add_argument("--speed", type=float, default=2.0, help="시간 재생 배속")
+    p.add_argument("--poll-interval", type=float, default=0.5)
+    p.add_argument("--load-threads", type=int, default=4)
+    p.add_argument("--busy", type=float, default=0.2, help="화면 부하: 한 번에 GIL 을 잡는 시간(초)")
+    p.add_argument("--idle", type=float, default=0.01)
+    p.add_argument("--seed", type=int, default=0)
+
+    p = sub.add_parser("collector", help="중앙 수집 부하 시험 (에이전트 수백 대, 장애 중 보관 / 재전송 멱등)")
+    p.add_argument("--agents", type=int, default=300)
+    p.add_argument("--jobs-per-agent", type=int, default=400)
+    p.add_argument("--batch-size", type=int, default=100)
+    p.add_argument("--interval", type=float, default=1.0)
+    p.add_argument("--outage", type=float, default=2.0, help="처음 이 시간(초) 동안 수집 서버를 띄우지 않음")
+    p.add_argument("--resend", type=int, default=50, help="업로드 위치를 지우고 다시 보낼 에이전트 수")
+    p.add_argument("--timeout", type=float, default=120.0)
+
+    p = sub.add_parser("export", help="내보내기 처리량 / 최대 RSS (기간 크기별, fetchall 방식과 비교)")
+    p.add_argument("--rows", type=int, default=1_000_000)
+    p.add_argument("--skip-fetchall", action="store_true")
+
+    p = sub.add_parser("schema", help="저장 구조 변환 전후 DB 크기 / 조회 속도")
+    p.add_argument("--rows", type=int, default=1_000_000)
+    p.add_argument("--repeat", type=int, default=3)
+
+    p = sub.add_parser("retention", help="월별 보관 중 기록 지연 / 보관 후 DB 크기 / 보관된 기간 조회")
+    p.add_argument("--rows", type=int, default=300_000)
+    p.add_argument("--months", type=int, default=24, help="합성 로그 기간 (개월)")
+    p.add_argument("--retention", type=int, default=12)
+    p.add_argument("--chunk-size", type=int, default=100)
+    p.add_argument("--baseline", type=float, default=10.0, help="보관 전 평소 기록 지연 측정 시간(초)")
+    p.add_argument("--repeat", type=int, default=3)
+
+    p = sub.add_parser("metrics", help="계측 비용: 호출당 비용 / 엔진 처리량 영향 / 프로파일러 / 스크레이프")
+    p.add_argument("--calls", type=int, default=1000000)
+    p.add_argument("--printers", type=int, default=100)
+    p.add_argument("--jobs", type=int, default=5000)
+    p.add_argument("--duration", type=float, default=60.0, help="합성 시나리오 길이(초)")
+    p.add_argument("--seed", type=int, default=0)
+    p.add_argument("--replay", help="record_spooler 로 남긴 기록 파일 (지정 시 합성 대신 사용)")
+    p.add_argument("--profile-interval", type=float, default=0.005)
+    p.add_argument("--scrapes", type=int, default=200)
+    p.add_argument("--repeat", type=int, default=5)
+
+    p = sub.add_parser("quota", help="월 한도 누계: 기록 한 건 반영 / 작업당 확인 비용")
+    p.add_argument("--rows", type=int, default=200000)
+    p.add_argument("--users", type=int, default=2000)
+    p.add_argument("--batch", type=int, default=200)
+    p.add_argument("--seed", type=int, default=0)
+
+    p = sub.add_parser("lifecycle", help="작업 수명 재생 (쪽수 증가 / 취소 / 오류) 후 최종 기록 확인 + 큐 비교 비용 (틀리면 종료 코드 1)")
+    p.add_argument("--printers", type=int, default=5)
+    p.add_argument("--jobs", type=int, default=400)
+    p.add_argument("--steps", type=int, default=600, help="프레임(조회) 수")
+    p.add_argument("--seed", type=int, default=0)
+    p.add_argument("--queue", type=int, default=1000, help="비교 비용: 큐에 그대로 있는 작업 수")
+    p.add_argument("--cycles", type=int, default=200)
+
+    p = sub.add_parser("generate", help="현실적인 합성 로그 DB 만들기 (사용자 / 프린터 쏠림, 시간대 몰림)")
+    p.add_argument("--rows", default="1m", help="행 수 (10k / 1m / 10m 처럼)")
+    p.add_argument("--days", type=int, default=365)
+    p.add_argument("--seed", type=int, default=0)
+    p.add_argument("--out", required=True)
+
+    p = sub.add_parser("suite", help="규모별 합성 DB 로 대시보드 / 이력 / 리포트 / 재계산 / 기록 경로 측정 -> JSON")
+    p.add_argument("--sizes", default="10k,1m", help="쉼표로 구분 (예: 10k,1m,10m)")
+    p.add_argument("--days", type=int, default=365)
+    p.add_argument("--seed", type=int, default=0)
+    p.add_argument("--repeat", type=int, default=5)
+    p.add_argument("--data-dir", default="bench_data", help="합성 DB 보관 위치 (있으면 재사용)")
+    p.add_argument("--out", help="결과 JSON (기본: bench_results/suite-<시각>-<커밋>.json)")
+    p.add_argument("--compare", metavar="JSON", help="이전 결과와 비교 (악화 시 종료 코드 1)")
+    p.add_argument("--threshold", type=float, default=0.2, help="악화로 볼 중앙값 변화 비율")
+    p.add_argument("--min-delta", type=float, default=0.001, help="시간 항목은 이 초 이상 차이 날 때만 악화로 봄")
+    p.add_argument("--stat", choices=("median", "min"), default="median", help="비교 기준 (min: 가장 좋은 값)")
+
+    p = sub.add_parser("compare", help="suite 결과 JSON 두 개 비교 (악화 시 종료 코드 1)")
+    p.add_argument("old")
+    p.add_argument("new")
+    p.add_argument("--threshold", type=float, default=0.2)
+    p.add_argument("--min-delta", type=float, default=0.001)
+    p.add_argument("--stat", choices=("median", "min"), default="median")
+
+    p = sub.add_parser("record", help="실제 스풀러 상태를 재생용 파일로 기록 (Windows)")
+    p.add_argument("--out", required=True)
+    p.add_argument("--duration", type=float, default=600.0)
+    p.add_argument("--interval", type=float, default=1.0)
+
+    args = parser.parse_args()
+    if args.cmd == "record":
+        frames = core.record_spooler(core.Win32Spooler(), args.out, args.duration, args.interval)
+        print(f"[record] 프레임 {frames}개 -> {args.out}")
+    elif args.cmd == "writer":
+        bench_writer(args.jobs, args.batch_size, args.flush_interval)
+    elif args.cmd == "writer-lock":
+        bench_writer_lock(args)
+    elif args.cmd == "engine":
+        bench_engine(args)
+    elif args.cmd == "spooler":
+        sys.exit(bench_spooler(args))
+    elif args.cmd == "dashboard":
+        bench_dashboard(args)
+    elif args.cmd == "poller":
+        bench_poller(args)
+    elif args.cmd == "history":
+        bench_history(args)
+    elif args.cmd == "ui":
+        bench_ui(args)
+    elif args.cmd == "dedup":
+        bench_dedup(args)
+    elif args.cmd == "startup":
+        bench_startup(args)
+    elif args.cmd == "ipc":
+        bench_ipc(args)
+    elif args.cmd == "collector":
+        bench_collector(args)
+    elif args.cmd == "export":
+        bench_export(args)
+    elif args.cmd == "schema":
+        bench_schema(args)
+    elif args.cmd == "retention":
+        bench_retention(args)
+    elif args.cmd == "metrics":
+        bench_metrics(args)
+    elif args.cmd == "quota":
+        bench_quota(args)
+    elif args.cmd == "lifecycle":
+        sys.exit(bench_lifecycle(args))
+    elif args.cmd == "generate":
+        os.makedirs(os.path.dirname(os.path.abspath(args.out)), exist_ok=True)
+        generate_db(args.out, parse_rows(args.rows), args.days, args.seed)
+    elif args.cmd == "suite":
+        sys.exit(bench_suite(args))
+    elif args.cmd == "compare":
+        sys.exit(compare_results(load_results(args.old), load_results(args.new), args.threshold, args.min_delta, args.stat))
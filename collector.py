@@ -0,0 +1,117 @@
+import http.server
+import threading
+import signal
+import json
+import zlib
+import hmac
+
+import core
+
+
+# =========================================================
+# 중앙 수집 서버 (main.py collector 로 실행할 때만 import)
+# =========================================================
+MAX_INGEST_BYTES = 32 * 1024 * 1024     # 받은 본문 / 압축을 푼 본문 각각의 한도 (gzip 폭탄 방지)
+
+class IngestHandler(http.server.BaseHTTPRequestHandler):
+    # POST /ingest : gzip(JSON {"columns": [...], "rows": [[...], ...]}) -> 커밋 후 {"inserted", "updated", "duplicates"}
+    # columns 는 core.UPLOAD_COLUMNS (맨 앞이 보낸 PC 의 logs.id) 또는 예전 에이전트의 LEGACY_UPLOAD_COLUMNS
+    # 요금 기록을 쓰는 요청이므로 core.COLLECTOR_TOKEN_HEADER 의 공유 토큰이 맞아야 받음
+    protocol_version = "HTTP/1.1"
+    disable_nagle_algorithm = True     # 헤더/본문을 따로 쓰므로 Nagle + 지연 ACK 로 요청마다 40ms 씩 늦어짐
+
+    def do_POST(self):
+        if self.path != "/ingest":
+            return self._reply(404, {"error": "not found"})
+        if not hmac.compare_digest(self.headers.get(core.COLLECTOR_TOKEN_HEADER, "").encode("utf-8"), self.server.token):
+            return self._reply(401, {"error": "bad token"})
+        length = int(self.headers.get("Content-Length") or 0)
+        if length <= 0 or length > MAX_INGEST_BYTES:
+            return self._reply(413, {"error": "bad length"})
+        body = self.rfile.read(length)
+        try:
+            if self.headers.get("Content-Encoding") == "gzip":
+                inflater = zlib.decompressobj(wbits=31)     # gzip 헤더
+                body = inflater.decompress(body, MAX_INGEST_BYTES)
+                if inflater.unconsumed_tail:
+                    return self._reply(413, {"error": "too large"})
+                if not inflater.eof:
+                    return self._reply(400, {"error": "truncated gzip"})
+            payload = json.loads(body)
+            columns, rows = payload["columns"], payload["rows"]
+            if columns not in (list(core.UPLOAD_COLUMNS), list(core.LEGACY_UPLOAD_COLUMNS)):
+                return self._reply(400, {"error": "column mismatch"})
+            if any(len(r) != len(columns) for r in rows):
+                return self._reply(400, {"error": "bad row"})
+            if len(columns) == len(core.UPLOAD_COLUMNS):
+                records = [core.IngestRow(r[0], tuple(r[1:])) for r in rows]
+            else:
+                records = [tuple(r) for r in rows]
+        except (OSError, ValueError, KeyError, TypeError, zlib.error) as e:
+            return self._reply(400, {"error": str(e)})
+
+        ticket = self.server.writer.submit_many(records)
+        if not ticket.wait(30) or ticket.error:
+            return self._reply(503, {"error": str(ticket.error or "timeout")})   # 에이전트는 나중에 다시 보냄
+        self._reply(200, {"inserted": ticket.inserted, "updated": ticket.updated,
+                          "duplicates": len(records) - ticket.inserted - ticket.updated})
+
+    def _reply(self, status, result):
+        if status in (401, 404, 413):
+            self.close_connection = True    # 본문을 다 읽지 않고 거절했을 수 있으므로 이 연결은 다시 쓰지 않음
+        data = json.dumps(result).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, format, *args):
+        pass    # 요청마다 찍지 않음
+
+class CollectorServer(http.server.ThreadingHTTPServer):
+    daemon_threads = True
+    request_queue_size = 1024  # 에이전트가 한꺼번에 몰려도 접속 대기열이 넘치지 않게
+
+    def __init__(self, address, writer, token):
+        self.writer = writer
+        self.token = token.encode("utf-8")
+        super().__init__(address, IngestHandler)
+
+def run_collector(token, host="127.0.0.1", port=core.COLLECTOR_PORT, stop_event=None, events_port=None, metrics_port=None):
+    # 수집 서버: 받은 로그를 하나의 DB 에 모아서 기록 (대시보드/이력은 이 DB 로 여러 PC 를 한꺼번에 조회)
+    # 같은 PC 에서 창을 --db 로 이 DB 에 붙이면 이벤트 채널로 실시간 반영
+    # token: 에이전트(headless --collector-token)와 같은 공유 토큰. 다른 PC 에서 받으려면 host 를 LAN 주소로
+    if not token:
+        raise ValueError("수집 서버 토큰이 비어 있음")
+    server = None
+    if events_port is not None:
+        try:
+            server = core.EventServer(port=events_port)
+        except OSError as e:
+            print(f"[에러] 이벤트 채널을 열 수 없음: {e}")
+    stop_event = stop_event or threading.Event()
+    previous = core.install_shutdown_handlers(stop_event)
+    writer = core.LogWriter(batch_size=2000, flush_interval=0.05, on_commit=server.publish if server else None,
+                            on_update=(lambda rows: server.publish(rows, "updates")) if server else None)
+    writer.start()
+    metrics = core.start_diagnostics(metrics_port)
+    archiver = core.Archiver()
+    archiver.start()
+    httpd = CollectorServer((host, port), writer, token)
+    threading.Thread(target=httpd.serve_forever, args=(0.2,), name="Collector", daemon=True).start()
+    print(f"[시스템] 수집 서버 시작: http://{host}:{httpd.server_address[1]}/ingest -> {core.DB_PATH}")
+    try:
+        while not stop_event.wait(0.5):     # 타임아웃 없이 기다리면 윈도우에서 Ctrl+C 가 늦게 처리됨
+            pass
+    finally:
+        httpd.shutdown()
+        httpd.server_close()
+        archiver.stop()
+        writer.stop()
+        if server: server.close()
+        if metrics: metrics.close()
+        for signum, old in previous.items():
+            signal.signal(signum, old)
+        print(f"[시스템] 수집 서버 종료. 기록 {writer.committed:,}건 (고침 {writer.updated:,}건, 중복 {writer.duplicates:,}건)")
+    return writer.committed
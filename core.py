@@ -0,0 +1,2869 @@
+import sqlite3
+import threading
+import socket
+import subprocess
+import os
+import sys
+import gzip
+import queue
+import time
+import datetime
+import platform
+import json
+import csv
+import random
+import signal
+import bisect
+import collections
+import concurrent.futures
+import contextlib
+
+
+# =========================================================
+# [전역 설정] 기본값 (DB에서 로드됨)
+# =========================================================
+DB_PATH = "print_log.db"
+
+current_settings = {
+    "cost_bw_a4": 50,      # A4 흑백 단가
+    "cost_color_a4": 200,  # A4 컬러 단가
+    "mult_a3_bw": 2.0,     # A3 흑백 배수
+    "mult_a3_color": 2.0,  # A3 컬러 배수
+    "retention_months": 0,  # 보관 기간 (개월, 0: 보관 안 함 - 설정에서 켬)
+    "quota_user_pages": 0,      # 사용자별 월 한도 (쪽 / 금액, 0: 제한 없음)
+    "quota_user_cost": 0,
+    "quota_computer_pages": 0,  # PC 별 월 한도
+    "quota_computer_cost": 0,
+    "quota_warn_percent": 80,   # 한도의 이 비율을 넘으면 대시보드에 근접으로 표시
+    "quota_pause": 0            # 1: 한도를 넘은 사용자 / PC 의 대기 중인 작업을 일시 정지
+}
+
+# =========================================================
+# 1. 데이터베이스 및 설정 관리
+# =========================================================
+# logs 변경을 daily_summary 에 반영하는 트리거 (INSERT / DELETE / UPDATE)
+def _summary_key(row):
+    # log_entries 행(NEW / OLD) -> daily_summary 키 (이름/문자열 형태)
+    return (f"date({row}.print_ts, 'unixepoch')", f"IFNULL((SELECT name FROM printers WHERE id = {row}.printer_id), '')",
+            f"IFNULL((SELECT name FROM computers WHERE id = {row}.computer_id), '')",
+            f"IFNULL({PAPER_SQL.format(row + '.paper')}, '')", f"IFNULL({row}.is_color, 0)")
+
+_SUMMARY_ADD = '''
+        INSERT INTO daily_summary (day, printer_name, computer_name, paper_size, is_color, jobs, pages, cost)
+        VALUES ({}, {}, {}, {}, {}, 1, IFNULL(NEW.pages, 0), IFNULL(NEW.cost, 0))
+        ON CONFLICT (day, printer_name, computer_name, paper_size, is_color) DO UPDATE SET
+            jobs = jobs + 1, pages = pages + excluded.pages, cost = cost + excluded.cost;
+'''
+_SUMMARY_SUB = '''
+        UPDATE daily_summary SET jobs = jobs - 1, pages = pages - IFNULL(OLD.pages, 0), cost = cost - IFNULL(OLD.cost, 0)
+        WHERE (day, printer_name, computer_name, paper_size, is_color) = ({0}, {1}, {2}, {3}, {4});
+        DELETE FROM daily_summary
+        WHERE (day, printer_name, computer_name, paper_size, is_color) = ({0}, {1}, {2}, {3}, {4}) AND jobs <= 0;
+'''
+
+def summary_triggers():
+    add = _SUMMARY_ADD.format(*_summary_key("NEW"))
+    sub = _SUMMARY_SUB.format(*_summary_key("OLD"))
+    return [
+        "CREATE TRIGGER IF NOT EXISTS trg_entries_summary_insert AFTER INSERT ON log_entries BEGIN" + add + "END",
+        # 보관 DB 로 옮기는 삭제는 집계에서 빼지 않음 (log_archiving 에 표시가 있는 동안)
+        "CREATE TRIGGER IF NOT EXISTS trg_entries_summary_delete AFTER DELETE ON log_entries "
+        "WHEN NOT EXISTS (SELECT 1 FROM log_archiving) BEGIN" + sub + "END",
+        "CREATE TRIGGER IF NOT EXISTS trg_entries_summary_update "
+        "AFTER UPDATE OF print_ts, printer_id, computer_id, paper, is_color, pages, cost ON log_entries BEGIN"
+        + sub + add + "END",
+    ]
+
+# =========================================================
+# 1-0a. 로그 저장 구조 (차원 테이블 + 정수 코드, logs 는 호환용 뷰)
+# =========================================================
+# 반복되는 이름은 차원 테이블 id 로, 시각은 epoch 초(현지 시각 그대로, 시간대 변환 없음),
+# 용지는 코드로 저장. 예전 모양(문자열 컬럼)의 조회는 logs 뷰가 그대로 받아 준다.
+DIMENSIONS = {"printer_name": "printers", "computer_name": "computers", "user_name": "users",
+              "document_name": "documents", "status": "statuses"}
+PAPER_CODES = {"A4": 0, "A3": 1, "Etc": 2}
+PAPER_SQL = "CASE {} WHEN 0 THEN 'A4' WHEN 1 THEN 'A3' WHEN 2 THEN 'Etc' END"
+EPOCH = datetime.datetime(1970, 1, 1)
+
+def to_epoch(text):
+    # "YYYY-MM-DD HH:MM:SS" -> 정수 초. SQL 의 datetime(x, 'unixepoch') 로 같은 문자열이 나옴
+    if text is None: return None
+    try:
+        return int((datetime.datetime.fromisoformat(text) - EPOCH).total_seconds())
+    except ValueError:
+        return None
+
+def table_type(cursor, name):
+    row = cursor.execute("SELECT type FROM sqlite_master WHERE name = ?", (name,)).fetchone()
+    return row[0] if row else None
+
+def create_log_storage(cursor):
+    for table in DIMENSIONS.values():
+        cursor.execute(f"CREATE TABLE IF NOT EXISTS {table} (id INTEGER PRIMARY KEY, name TEXT NOT NULL UNIQUE)")
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS log_entries (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            job_id INTEGER,
+            printer_id INTEGER,
+            computer_id INTEGER,
+            user_id INTEGER,
+            document_id INTEGER,
+            pages INTEGER,
+            paper INTEGER,
+            is_color INTEGER,
+            unit_cost INTEGER,
+            cost INTEGER,
+            print_ts INTEGER,
+            status_id INTEGER,
+            submitted_ts INTEGER
+        )
+    ''')
+
+LOG_VIEW_SQL = [
+    # 예전 logs 컬럼 + 조건용 저장 컬럼(printer_id / computer_id / user_id / paper / print_ts)
+    f'''
+    CREATE VIEW IF NOT EXISTS logs AS
+    SELECT e.id, e.job_id, p.name AS printer_name, c.name AS computer_name, u.name AS user_name,
+           d.name AS document_name, e.pages, {PAPER_SQL.format("e.paper")} AS paper_size, e.is_color,
+           e.unit_cost, e.cost, datetime(e.print_ts, 'unixepoch') AS print_time, s.name AS status,
+           datetime(e.submitted_ts, 'unixepoch') AS submitted,
+           e.printer_id, e.computer_id, e.user_id, e.paper, e.print_ts
+    FROM log_entries e
+    LEFT JOIN printers p ON p.id = e.printer_id
+    LEFT JOIN computers c ON c.id = e.computer_id
+    LEFT JOIN users u ON u.id = e.user_id
+    LEFT JOIN documents d ON d.id = e.document_id
+    LEFT JOIN statuses s ON s.id = e.status_id
+    ''',
+    # 예전처럼 logs 에 INSERT 해도 되도록 (외부 스크립트 / 대량 적재용). 기록기는 encode_log 로 직접 넣음
+    '''
+    CREATE TRIGGER IF NOT EXISTS trg_logs_view_insert INSTEAD OF INSERT ON logs BEGIN
+    ''' + "".join(f'''
+        INSERT OR IGNORE INTO {table} (name) SELECT NEW.{column} WHERE NEW.{column} IS NOT NULL;''' for column, table in DIMENSIONS.items()) + '''
+        INSERT INTO log_entries (job_id, printer_id, computer_id, user_id, document_id, pages, paper, is_color,
+                                 unit_cost, cost, print_ts, status_id, submitted_ts)
+        VALUES (NEW.job_id, (SELECT id FROM printers WHERE name = NEW.printer_name),
+                (SELECT id FROM computers WHERE name = NEW.computer_name), (SELECT id FROM users WHERE name = NEW.user_name),
+                (SELECT id FROM documents WHERE name = NEW.document_name), NEW.pages,
+                CASE WHEN NEW.paper_size IS NULL THEN NULL WHEN NEW.paper_size = 'A4' THEN 0
+                     WHEN NEW.paper_size = 'A3' THEN 1 ELSE 2 END, NEW.is_color,
+                NEW.unit_cost, NEW.cost, CAST(strftime('%s', NEW.print_time) AS INTEGER),
+                (SELECT id FROM statuses WHERE name = NEW.status), CAST(strftime('%s', NEW.submitted) AS INTEGER));
+    END
+    ''',
+]
+
+class NameIds:
+    # 이름 -> 차원 테이블 id (연결마다 하나). 롤백하면 clear() - 방금 만든 id 가 사라졌을 수 있음
+    def __init__(self, max_size=20000):
+        self.max_size = max_size
+        self.ids = {table: {} for table in DIMENSIONS.values()}
+
+    def get(self, cursor, table, name):
+        if name is None: return None
+        ids = self.ids[table]
+        rid = ids.get(name)
+        if rid is None:
+            row = cursor.execute(f"SELECT id FROM {table} WHERE name = ?", (name,)).fetchone()
+            if row:
+                rid = row[0]
+            else:
+                cursor.execute(f"INSERT INTO {table} (name) VALUES (?)", (name,))
+                rid = cursor.lastrowid
+            if len(ids) >= self.max_size: ids.clear()     # 문서명처럼 매번 다른 값이 끝없이 쌓이지 않게
+            ids[name] = rid
+        return rid
+
+    def clear(self):
+        for ids in self.ids.values(): ids.clear()
+
+LOG_ENTRY_INSERT_SQL = '''
+    INSERT OR IGNORE INTO log_entries (job_id, printer_id, computer_id, user_id, document_id, pages, paper, is_color,
+                                       unit_cost, cost, print_ts, status_id, submitted_ts)
+    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+'''
+
+def encode_log(cursor, names, record):
+    # LOG_INSERT_SQL 순서의 기록(이름/문자열) -> LOG_ENTRY_INSERT_SQL 순서의 저장 값
+    (job_id, printer, computer, user, document, pages, paper_size, is_color,
+     unit_cost, cost, print_time, status, submitted) = record
+    return (job_id, names.get(cursor, "printers", printer), names.get(cursor, "computers", computer),
+            names.get(cursor, "users", user), names.get(cursor, "documents", document), pages,
+            None if paper_size is None else PAPER_CODES.get(paper_size, PAPER_CODES["Etc"]), is_color,
+            unit_cost, cost, to_epoch(print_time), names.get(cursor, "statuses", status), to_epoch(submitted))
+
+def insert_logs(conn, records, names=None):
+    # 대량 적재 (한 트랜잭션). 중복은 무시
+    names = names or NameIds()
+    with conn:
+        cursor = conn.cursor()
+        cursor.executemany(LOG_ENTRY_INSERT_SQL, [encode_log(cursor, names, r) for r in records])
+
+def migrate_logs(conn, chunk_size=20000):
+    # 예전 logs 테이블 -> log_entries. id 를 그대로 옮겨 FTS 색인 / 일별 집계 / 업로드 위치가 그대로 맞음
+    # 구간마다 커밋하므로 중간에 끊겨도 다음 실행 때 이어서 진행, 끝나면 logs 테이블을 지우고 뷰로 바꿈
+    cursor = conn.cursor()
+    columns = [row[1] for row in cursor.execute("PRAGMA table_info(logs)")]
+    submitted = "submitted" if "submitted" in columns else "NULL"     # submitted 컬럼이 생기기 전 DB
+    total = cursor.execute("SELECT COUNT(*) FROM logs").fetchone()[0]
+    done_id = cursor.execute("SELECT IFNULL(MAX(id), 0) FROM log_entries").fetchone()[0]
+    print(f"[시스템] 로그 저장 구조 변환 시작 ({total:,}건)")
+    names = NameIds()
+    moved = 0
+    t0 = time.perf_counter()
+    while True:
+        rows = cursor.execute(f'''
+            SELECT id, job_id, printer_name, computer_name, user_name, document_name, pages, paper_size, is_color,
+                   unit_cost, cost, print_time, status, {submitted}
+            FROM logs WHERE id > ? ORDER BY id LIMIT ?
+        ''', (done_id, chunk_size)).fetchall()
+        if not rows: break
+        with conn:
+            conn.executemany("INSERT INTO log_entries (id, job_id, printer_id, computer_id, user_id, document_id, pages, paper, "
+                             "is_color, unit_cost, cost, print_ts, status_id, submitted_ts) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                             [(row[0], *encode_log(cursor, names, row[1:])) for row in rows])
+        done_id = rows[-1][0]
+        moved += len(rows)
+        if moved % (chunk_size * 10) == 0: print(f"[시스템] 변환 중... {moved:,} / {total:,}")
+
+    with conn:
+        # AUTOINCREMENT 순번도 이어받음 (지워진 로그 id 를 다시 쓰지 않도록)
+        row = cursor.execute("SELECT seq FROM sqlite_sequence WHERE name = 'logs'").fetchone()
+        if row:
+            cursor.execute("UPDATE sqlite_sequence SET seq = MAX(seq, ?) WHERE name = 'log_entries'", (row[0],))
+            if cursor.rowcount == 0:
+                cursor.execute("INSERT INTO sqlite_sequence (name, seq) VALUES ('log_entries', ?)", (row[0],))
+        cursor.execute("DROP TABLE logs")     # 예전 인덱스 / 트리거도 함께 삭제
+    print(f"[시스템] 변환 완료: {moved:,}건, {time.perf_counter() - t0:.1f}s. 빈 공간 정리(VACUUM) 중...")
+    conn.execute("VACUUM")
+
+# =========================================================
+# 1-0. 출력 이력 조회 (필터 인덱스 / 문서명 전문 검색)
+# =========================================================
+HISTORY_INDEXES = [
+    ("idx_entries_user", "user_id, id"),
+    ("idx_entries_printer", "printer_id, id"),
+    ("idx_entries_computer", "computer_id, id"),
+    ("idx_entries_spec", "is_color, paper, id"),
+]
+HISTORY_FTS = None      # 문서명 색인: "trigram" / "unicode61" / None(FTS5 없음). 검색에 쓰는 것은 trigram 뿐 (doc_matches 참고)
+
+def init_history_search(cursor):
+    # logs(뷰)를 원본으로 하는 FTS5 색인 (한글 부분 검색이 되도록 trigram 우선). rowid = 로그 id
+    global HISTORY_FTS
+    cursor.execute("SELECT sql FROM sqlite_master WHERE name='logs_fts'")
+    row = cursor.fetchone()
+    if row is None:
+        for tokenizer in ("trigram", "unicode61"):
+            try:
+                cursor.execute(f"CREATE VIRTUAL TABLE logs_fts USING fts5(document_name, content='logs', content_rowid='id', tokenize='{tokenizer}')")
+                break
+            except sqlite3.OperationalError:
+                continue
+        else:
+            HISTORY_FTS = None
+            return
+        cursor.execute("INSERT INTO logs_fts(logs_fts) VALUES ('rebuild')")
+        cursor.execute("SELECT sql FROM sqlite_master WHERE name='logs_fts'")
+        row = cursor.fetchone()
+    HISTORY_FTS = "trigram" if "trigram" in row[0] else "unicode61"
+
+    cursor.execute('''
+        CREATE TRIGGER IF NOT EXISTS trg_entries_fts_insert AFTER INSERT ON log_entries BEGIN
+            INSERT INTO logs_fts (rowid, document_name) VALUES (NEW.id, (SELECT name FROM documents WHERE id = NEW.document_id));
+        END
+    ''')
+    cursor.execute('''
+        CREATE TRIGGER IF NOT EXISTS trg_entries_fts_delete AFTER DELETE ON log_entries BEGIN
+            INSERT INTO logs_fts (logs_fts, rowid, document_name) VALUES ('delete', OLD.id, (SELECT name FROM documents WHERE id = OLD.document_id));
+        END
+    ''')
+    cursor.execute('''
+        CREATE TRIGGER IF NOT EXISTS trg_entries_fts_update AFTER UPDATE OF document_id ON log_entries BEGIN
+            INSERT INTO logs_fts (logs_fts, rowid, document_name) VALUES ('delete', OLD.id, (SELECT name FROM documents WHERE id = OLD.document_id));
+            INSERT INTO logs_fts (rowid, document_name) VALUES (NEW.id, (SELECT name FROM documents WHERE id = NEW.document_id));
+        END
+    ''')
+
+HISTORY_COLUMNS = ("logs.id, logs.print_time, logs.printer_name, logs.user_name, logs.document_name, "
+                   "logs.paper_size, logs.is_color, logs.pages, logs.unit_cost, logs.cost")
+
+def history_where(filters, schema=None):
+    # 이력 필터 -> (FROM 절, 정렬/키셋 컬럼, WHERE 조건 목록, 인자). 이력 화면 / 내보내기 / 리포트가 같은 조건을 씀
+    # filters: user / printer / computer / paper / color / start_date / end_date / doc
+    # schema: ATTACH 한 보관 DB 이름 (그쪽 logs 뷰를 읽음, 문서명 색인이 없으므로 LIKE)
+    filters = filters or {}
+    source, order_col = (f"{schema}.logs AS logs" if schema else "logs"), "logs.id"
+    where, params = [], []
+
+    doc = (filters.get("doc") or "").strip()
+    if doc:
+        # 검색어 전체를 대소문자 구분 없이 부분 문자열로 (doc_matches 와 같은 조건)
+        # trigram 구문 검색이 곧 부분 문자열 검색. unicode61 은 단어 앞부분 검색이라 조건이 달라서 쓰지 않음
+        if not schema and HISTORY_FTS == "trigram" and len(doc) >= 3:
+            source, order_col = "logs_fts JOIN logs ON logs.id = logs_fts.rowid", "logs_fts.rowid"
+            where.append("logs_fts MATCH ?")
+            params.append('"' + doc.replace('"', '""') + '"')
+        else:
+            # trigram 은 3글자 미만 검색어를 못 쓰므로 LIKE 로 대신 (%, _ 는 글자 그대로)
+            where.append("logs.document_name LIKE ? ESCAPE '\\'")
+            params.append("%" + doc.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_") + "%")
+
+    # 이름은 차원 테이블 id 로, 용지는 코드로, 기간은 epoch 로 바꿔서 비교 (log_entries 인덱스 사용)
+    for key, column, table in (("user", "user_id", "users"), ("printer", "printer_id", "printers"), ("computer", "computer_id", "computers")):
+        value = filters.get(key)
+        if value not in (None, ""):
+            where.append(f"logs.{column} = (SELECT id FROM {table} WHERE name = ?)")
+            params.append(value)
+    if filters.get("paper") not in (None, ""):
+        where.append("logs.paper = ?")
+        params.append(PAPER_CODES.get(filters["paper"], PAPER_CODES["Etc"]))
+    if filters.get("color") not in (None, ""):
+        where.append("logs.is_color = ?")
+        params.append(filters["color"])
+    if filters.get("start_date"):
+        where.append("logs.print_ts >= ?")
+        params.append(to_epoch(f"{filters['start_date']} 00:00:00"))
+    if filters.get("end_date"):
+        where.append("logs.print_ts <= ?")
+        params.append(to_epoch(f"{filters['end_date']} 23:59:59"))
+    return source, order_col, where, params
+
+def _history_page(conn, filters, before_id, limit, schema=None):
+    source, order_col, where, params = history_where(filters, schema)
+    if before_id is not None:
+        where.append(f"{order_col} < ?")
+        params.append(before_id)
+
+    sql = f"SELECT {HISTORY_COLUMNS} FROM {source}"
+    if where: sql += " WHERE " + " AND ".join(where)
+    sql += f" ORDER BY {order_col} DESC LIMIT ?"
+    params.append(limit)
+    return conn.execute(sql, params).fetchall()
+
+def query_history(filters=None, before_id=None, limit=100, conn=None):
+    # id 역순 키셋 페이지 조회: before_id 보다 작은 id 중 필터에 맞는 limit 건
+    own_conn = conn is None
+    if own_conn: conn = sqlite3.connect(DB_PATH)
+    try:
+        rows = _history_page(conn, filters, before_id, limit)
+        # 보관된 달: 필터 기간과 겹치고 이 페이지에 들어올 id 가 있을 수 있는 것만 붙여서 합침 (id 큰 달부터)
+        for month, min_id, max_id in archived_months(conn, filters):
+            if before_id is not None and min_id >= before_id: continue
+            if len(rows) >= limit and max_id < rows[-1][0]: break
+            with attached_archive(conn, month) as schema:
+                rows = sorted(rows + _history_page(conn, filters, before_id, limit, schema), key=lambda r: r[0], reverse=True)[:limit]
+        return rows
+    finally:
+        if own_conn: conn.close()
+
+def history_row_matches(filters, row):
+    # 새로 기록된 행(dict)이 이력 화면 필터 조건에 맞는지 (query_history 와 같은 조건)
+    for key, column in (("user", "user_name"), ("printer", "printer_name"), ("computer", "computer_name"),
+                        ("paper", "paper_size"), ("color", "is_color")):
+        value = filters.get(key)
+        if value not in (None, "") and row[column] != value: return False
+    day = row["print_time"][:10]
+    if filters.get("start_date") and day < filters["start_date"]: return False
+    if filters.get("end_date") and day > filters["end_date"]: return False
+    return doc_matches(filters.get("doc"), row["document_name"])
+
+def doc_matches(doc, name):
+    # 문서명 검색 조건 (history_where 의 trigram 구문 검색 / LIKE 와 같음): 검색어 전체가 대소문자 구분 없이 들어 있음
+    doc = (doc or "").strip().lower()
+    return not doc or doc in (name or "").lower()
+
+def init_db():
+    conn = sqlite3.connect(DB_PATH)
+    cursor = conn.cursor()
+
+    # 보관 후 남는 빈 페이지를 조금씩 돌려줄 수 있도록 증분 auto_vacuum (새 DB 는 테이블을 만들기 전에 설정하면 끝)
+    cursor.execute("PRAGMA auto_vacuum = INCREMENTAL")
+    
+    # 로그 저장 테이블 (이름은 차원 테이블 id, 시각은 epoch 초, 용지는 코드) + 예전 모양의 logs 뷰
+    create_log_storage(cursor)
+    if table_type(cursor, "logs") == "table":
+        # 예전 DB: 문자열 그대로 저장한 logs 테이블 -> log_entries 로 옮기고 뷰로 바꿈
+        conn.commit()
+        migrate_logs(conn)
+    for sql in LOG_VIEW_SQL:
+        cursor.execute(sql)
+    if cursor.execute("PRAGMA auto_vacuum").fetchone()[0] != 2:
+        # 예전 DB: auto_vacuum 은 VACUUM 을 한 번 해야 바뀜
+        print("[시스템] 증분 정리(auto_vacuum) 설정을 위해 VACUUM 중...")
+        conn.commit()
+        conn.execute("VACUUM")
+
+    # 월별 보관 DB 목록 (month = "YYYY-MM", 옮긴 로그 id 범위) + 보관 중 표시 (일별 집계 트리거가 확인)
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS log_archives (
+            month TEXT PRIMARY KEY,
+            rows INTEGER NOT NULL,
+            min_id INTEGER,
+            max_id INTEGER,
+            archived_at TEXT
+        )
+    ''')
+    cursor.execute("CREATE TABLE IF NOT EXISTS log_archiving (flag INTEGER)")
+
+    # 같은 작업의 중복 기록 방지 (재시작 후 큐에 남은 작업은 INSERT OR IGNORE 로 걸러짐)
+    # submitted 가 없는 예전 기록은 NULL 이라 서로 충돌하지 않는다.
+    cursor.execute('''
+        CREATE UNIQUE INDEX IF NOT EXISTS ux_entries_job
+        ON log_entries (printer_id, job_id, submitted_ts, computer_id)
+    ''')
+
+    # 진행 중(PRINTING) 기록만 담는 작은 인덱스: 엔진 시작 때 지난 실행에서 끝나지 않은 작업을 바로 찾음
+    # (부분 인덱스 조건은 상수여야 해서 이 DB 의 상태 id 를 그대로 넣음. 차원 id 는 바뀌지 않음)
+    cursor.execute("INSERT OR IGNORE INTO statuses (name) VALUES ('PRINTING')")
+    printing_id = cursor.execute("SELECT id FROM statuses WHERE name = 'PRINTING'").fetchone()[0]
+    cursor.execute(f"CREATE INDEX IF NOT EXISTS idx_entries_open ON log_entries (computer_id) WHERE status_id = {int(printing_id)}")
+
+    # 이력 화면 필터용 인덱스 (id 를 뒤에 붙여 필터 + id 역순 페이지 조회를 인덱스만으로)
+    for name, columns in HISTORY_INDEXES:
+        cursor.execute(f"CREATE INDEX IF NOT EXISTS {name} ON log_entries ({columns})")
+    init_history_search(cursor)
+
+    # 기간 조회용 커버링 인덱스 (테이블을 읽지 않고 인덱스만으로 집계)
+    cursor.execute('''
+        CREATE INDEX IF NOT EXISTS idx_entries_print_ts
+        ON log_entries (print_ts, paper, is_color, pages, cost)
+    ''')
+
+    # 일별 집계 테이블 (날짜/프린터/PC/용지/컬러 단위 누계) - log_entries 트리거로 같은 트랜잭션에서 갱신
+    cursor.execute("SELECT 1 FROM sqlite_master WHERE type='table' AND name='daily_summary'")
+    summary_is_new = cursor.fetchone() is None
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS daily_summary (
+            day TEXT NOT NULL,
+            printer_name TEXT NOT NULL,
+            computer_name TEXT NOT NULL,
+            paper_size TEXT NOT NULL,
+            is_color INTEGER NOT NULL,
+            jobs INTEGER NOT NULL DEFAULT 0,
+            pages INTEGER NOT NULL DEFAULT 0,
+            cost INTEGER NOT NULL DEFAULT 0,
+            PRIMARY KEY (day, printer_name, computer_name, paper_size, is_color)
+        ) WITHOUT ROWID
+    ''')
+    row = cursor.execute("SELECT sql FROM sqlite_master WHERE name = 'trg_entries_summary_delete'").fetchone()
+    if row and "log_archiving" not in row[0]:
+        cursor.execute("DROP TRIGGER trg_entries_summary_delete")     # 보관 중 조건이 없던 예전 트리거
+    for sql in summary_triggers():
+        cursor.execute(sql)
+    if summary_is_new:
+        # 기존 print_log.db 에 처음 생긴 경우 과거 로그로 채워 넣기
+        rebuild_daily_summary(conn)
+    
+    # 설정 테이블
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS settings (
+            key TEXT PRIMARY KEY,
+            value REAL
+        )
+    ''')
+    
+    # 기본 설정값 초기화
+    defaults = {
+        "cost_bw_a4": 50,
+        "cost_color_a4": 200,
+        "mult_a3_bw": 2.0,
+        "mult_a3_color": 2.0,
+        "retention_months": 0,     # N: 이번 달 + 지난 N개월만 남기고 그 전 달은 월별 보관 DB 로 (0: 보관 안 함, 설정에서 켬)
+        "quota_user_pages": 0,
+        "quota_user_cost": 0,
+        "quota_computer_pages": 0,
+        "quota_computer_cost": 0,
+        "quota_warn_percent": 80,
+        "quota_pause": 0,
+    }
+    
+    for key, val in defaults.items():
+        cursor.execute("SELECT value FROM settings WHERE key=?", (key,))
+        if not cursor.fetchone():
+            cursor.execute("INSERT INTO settings (key, value) VALUES (?, ?)", (key, val))
+    
+    # 요금표 (적용 시작 시각별 버전) - 단가 변경은 새 버전 한 줄 추가로 끝남
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS tariffs (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            effective_from TEXT NOT NULL,
+            cost_bw_a4 REAL NOT NULL,
+            cost_color_a4 REAL NOT NULL,
+            mult_a3_bw REAL NOT NULL,
+            mult_a3_color REAL NOT NULL,
+            created_at TEXT
+        )
+    ''')
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_tariffs_effective ON tariffs (effective_from, id)")
+    cursor.execute("SELECT COUNT(*) FROM tariffs")
+    if cursor.fetchone()[0] == 0:
+        # 기존 settings 의 단가를 '처음부터 적용'되는 첫 버전으로 옮겨 둔다
+        cursor.execute("SELECT key, value FROM settings")
+        values = {**defaults, **dict(cursor.fetchall())}
+        cursor.execute(
+            "INSERT INTO tariffs (effective_from, cost_bw_a4, cost_color_a4, mult_a3_bw, mult_a3_color, created_at) VALUES (?, ?, ?, ?, ?, ?)",
+            (TARIFF_EPOCH, *(values[k] for k in TARIFF_KEYS), datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S")))
+
+    # 사용자 / PC 별 월 한도 (없으면 settings 의 기본 한도, 값이 NULL 이면 그 항목만 기본값, 0 은 제한 없음)
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS quota_limits (
+            scope TEXT NOT NULL,
+            name TEXT NOT NULL,
+            max_pages INTEGER,
+            max_cost INTEGER,
+            PRIMARY KEY (scope, name)
+        )
+    ''')
+
+    # 수집 서버 쪽: 받은 행의 출처 (보낸 PC, 그 PC 의 logs.id). 응답 유실 / 재전송 / 업로드 위치 초기화에도 한 번만 기록
+    # (submitted 가 없는 예전 기록은 ux_entries_job 으로 걸러지지 않으므로 이것으로 멱등)
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS ingest_origins (
+            computer_id INTEGER NOT NULL,
+            origin_id INTEGER NOT NULL,
+            entry_id INTEGER NOT NULL,
+            PRIMARY KEY (computer_id, origin_id)
+        ) WITHOUT ROWID
+    ''')
+
+    # 중앙 수집 서버로 올려 보낸 위치 (수집 서버 주소별 마지막 logs.id)
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS upload_state (
+            collector TEXT PRIMARY KEY,
+            last_id INTEGER NOT NULL
+        )
+    ''')
+    # 수집 서버를 쓰는 PC: 기록 뒤에 바뀐 행 (끝난 작업의 최종 쪽수 / 상태, 단가 재계산) 을 다시 올리도록 표시
+    # 업로더가 올린 뒤 지우고, 보관 DB 로 옮겨진 행의 표시는 보관할 때 지움
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS upload_updates (
+            seq INTEGER PRIMARY KEY AUTOINCREMENT,
+            collector TEXT NOT NULL,
+            entry_id INTEGER NOT NULL
+        )
+    ''')
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_upload_updates_entry ON upload_updates (collector, entry_id)")
+    cursor.execute('''
+        CREATE TRIGGER IF NOT EXISTS trg_entries_upload_update AFTER UPDATE OF pages, unit_cost, cost, status_id ON log_entries
+        BEGIN
+            INSERT INTO upload_updates (collector, entry_id) SELECT collector, NEW.id FROM upload_state;
+        END
+    ''')
+    
+    conn.commit()
+    conn.close()
+    load_settings()
+
+# =========================================================
+# 1-1. 요금표 (적용 시작 시각별 버전)
+# =========================================================
+TARIFF_KEYS = ("cost_bw_a4", "cost_color_a4", "mult_a3_bw", "mult_a3_color")
+TARIFF_EPOCH = "0000-01-01 00:00:00"   # 첫 버전: 모든 과거 기록에 적용
+
+def calc_unit_cost(tariff, paper_size, is_color):
+    base_cost = tariff["cost_color_a4"] if is_color else tariff["cost_bw_a4"]
+    multiplier = 1.0
+    if paper_size == "A3":
+        multiplier = tariff["mult_a3_color"] if is_color else tariff["mult_a3_bw"]
+    return int(base_cost * multiplier)
+
+class TariffBook:
+    # 적용 시작 시각 순으로 정렬된 요금표. at(시각)은 그 시각에 유효한 버전을 이분 탐색으로 찾는다.
+    def __init__(self, versions):
+        self.versions = versions or [(TARIFF_EPOCH, {k: current_settings[k] for k in TARIFF_KEYS})]
+        self.starts = [start for start, _ in self.versions]
+
+    def at(self, print_time):
+        i = bisect.bisect_right(self.starts, print_time) - 1
+        return self.versions[max(i, 0)][1]
+
+    def unit_cost(self, print_time, paper_size, is_color):
+        return calc_unit_cost(self.at(print_time), paper_size, is_color)
+
+tariff_book = None
+
+def load_tariffs(conn):
+    rows = conn.execute(
+        "SELECT effective_from, cost_bw_a4, cost_color_a4, mult_a3_bw, mult_a3_color FROM tariffs ORDER BY effective_from, id"
+    ).fetchall()
+    return TariffBook([(row[0], dict(zip(TARIFF_KEYS, row[1:]))) for row in rows])
+
+def add_tariff(values, effective_from=None):
+    # 단가 변경 = 새 버전 추가 (과거 기록은 건드리지 않음)
+    effective_from = effective_from or datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+    conn = sqlite3.connect(DB_PATH)
+    with conn:
+        conn.execute(
+            "INSERT INTO tariffs (effective_from, cost_bw_a4, cost_color_a4, mult_a3_bw, mult_a3_color, created_at) VALUES (?, ?, ?, ?, ?, ?)",
+            (effective_from, *(float(values[k]) for k in TARIFF_KEYS), datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S")))
+    conn.close()
+    load_settings()
+
+def load_settings():
+    # current_settings = settings 값 + 지금 유효한 요금표 버전
+    global tariff_book
+    conn = sqlite3.connect(DB_PATH)
+    cursor = conn.cursor()
+    cursor.execute("SELECT key, value FROM settings")
+    rows = cursor.fetchall()
+    for key, value in rows:
+        current_settings[key] = value
+    tariff_book = load_tariffs(conn)
+    conn.close()
+    current_settings.update(tariff_book.at(datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S")))
+
+def reload_tariffs(db_path=None):
+    # 엔진이 화면과 다른 프로세스일 때: 화면에서 추가한 요금표 버전을 주기적으로 다시 읽음 (표가 작아서 통째로)
+    global tariff_book
+    conn = sqlite3.connect(db_path or DB_PATH)
+    try:
+        book = load_tariffs(conn)
+    finally:
+        conn.close()
+    if tariff_book is not None and book.versions == tariff_book.versions: return False
+    tariff_book = book
+    current_settings.update(book.at(datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S")))
+    return True
+
+def update_setting(key, value):
+    conn = sqlite3.connect(DB_PATH)
+    cursor = conn.cursor()
+    cursor.execute("INSERT OR REPLACE INTO settings (key, value) VALUES (?, ?)", (key, value))
+    conn.commit()
+    conn.close()
+    # 설정 저장 후 로드까지 수행
+    load_settings()
+
+# 일별 집계 다시 계산용 (보관 DB 분까지 더하므로 같은 키는 누적)
+SUMMARY_REBUILD_SQL = '''
+    INSERT INTO daily_summary (day, printer_name, computer_name, paper_size, is_color, jobs, pages, cost)
+    SELECT substr(print_time, 1, 10), IFNULL(printer_name, ''), IFNULL(computer_name, ''),
+           IFNULL(paper_size, ''), IFNULL(is_color, 0), COUNT(*), SUM(IFNULL(pages, 0)), SUM(IFNULL(cost, 0))
+    FROM {source} WHERE true
+    GROUP BY 1, 2, 3, 4, 5
+    ON CONFLICT (day, printer_name, computer_name, paper_size, is_color) DO UPDATE SET
+        jobs = jobs + excluded.jobs, pages = pages + excluded.pages, cost = cost + excluded.cost
+'''
+
+def rebuild_daily_summary(conn=None):
+    # 일별 집계를 logs 원본(+ 월별 보관 DB)에서 다시 계산 (python main.py rebuild-summary)
+    own_conn = conn is None
+    if own_conn: conn = sqlite3.connect(DB_PATH)
+    try:
+        months = archived_months(conn)
+        conn.execute("DELETE FROM daily_summary")
+        conn.execute(SUMMARY_REBUILD_SQL.format(source="logs"))
+        conn.commit()
+        for month, _, _ in months:
+            with attached_archive(conn, month) as schema:
+                with conn: conn.execute(SUMMARY_REBUILD_SQL.format(source=f"{schema}.logs"))
+        return conn.execute("SELECT COUNT(*) FROM daily_summary").fetchone()[0]
+    finally:
+        if own_conn: conn.close()
+
+# 기간별 용지/컬러 집계 (A4_BW, A3_BW, A4_Col, A3_Col 네 묶음) - 일별 집계에서 날짜 수만큼만 읽음
+DASHBOARD_STATS_SQL = '''
+    SELECT CASE WHEN paper_size = 'A3' THEN 'A3' ELSE 'A4' END
+           || CASE WHEN is_color THEN '_Col' ELSE '_BW' END AS bucket,
+           SUM(pages), SUM(cost)
+    FROM daily_summary
+    WHERE day BETWEEN ? AND ?
+    GROUP BY bucket
+'''
+
+def stats_bucket(paper_size, is_color):
+    # DASHBOARD_STATS_SQL 과 같은 기준 (A3 외 용지는 A4 로 묶음)
+    return ("A3" if paper_size == "A3" else "A4") + ("_Col" if is_color else "_BW")
+
+def query_dashboard_stats(start_date, end_date, conn=None):
+    stats = {
+        "A4_BW": {"cnt":0, "cost":0}, "A3_BW": {"cnt":0, "cost":0},
+        "A4_Col": {"cnt":0, "cost":0}, "A3_Col": {"cnt":0, "cost":0}
+    }
+    own_conn = conn is None
+    if own_conn: conn = sqlite3.connect(DB_PATH)
+    try:
+        rows = conn.execute(DASHBOARD_STATS_SQL, (start_date, end_date)).fetchall()
+    finally:
+        if own_conn: conn.close()
+
+    for key, pages, cost in rows:
+        stats[key]["cnt"] = pages or 0
+        stats[key]["cost"] = cost or 0
+    return stats
+
+# 지정 기간(기본: 전체) 로그의 비용을 각 출력 시각에 유효했던 요금표로 다시 계산.
+# id 구간 단위로 나눠 짧은 트랜잭션으로 처리하므로 백그라운드 스레드에서 돌려도 기록이 막히지 않는다.
+# 월별 보관 DB 로 옮겨진 달은 대상이 아님 (보관 DB 와 일별 집계 모두 보관 당시 금액 그대로라 서로 맞음)
+# -> (바꾼 건수, 기간 중 보관되어 건너뛴 달 목록) : 건너뛴 달이 있으면 화면에서 알림
+def recalculate_db_costs(start_date=None, end_date=None, progress=None, cancel=None, chunk_size=2000):
+    query_start = f"{start_date} 00:00:00" if start_date else TARIFF_EPOCH
+    query_end = f"{end_date} 23:59:59" if end_date else "9999-12-31 23:59:59"
+    book = tariff_book
+
+    conn = sqlite3.connect(DB_PATH, timeout=30)
+    cursor = conn.cursor()
+    skipped = sorted(month for month, _, _ in archived_months(conn, {"start_date": start_date, "end_date": end_date}))
+    if skipped:
+        print(f"[시스템] 보관된 {len(skipped)}개월({skipped[0]} ~ {skipped[-1]})은 재계산하지 않음 (보관 당시 금액 그대로)")
+    ts_start, ts_end = to_epoch(query_start) if start_date else None, to_epoch(query_end) if end_date else None
+    ts_range = "print_ts BETWEEN IFNULL(?, print_ts) AND IFNULL(?, print_ts)"
+    cursor.execute(f"SELECT MIN(id), MAX(id) FROM log_entries WHERE {ts_range}", (ts_start, ts_end))
+    first_id, last_id = cursor.fetchone()
+    if first_id is None:
+        conn.close()
+        return 0, skipped
+
+    changed = 0
+    done_id = first_id - 1
+    while done_id < last_id:
+        if cancel and cancel.is_set(): break
+        upper = min(done_id + chunk_size, last_id)
+        cursor.execute('''
+            SELECT id, pages, paper_size, is_color, print_time, unit_cost, cost FROM logs
+            WHERE id > ? AND id <= ? AND {ts_range}
+        '''.format(ts_range=ts_range), (done_id, upper, ts_start, ts_end))
+
+        updates = []
+        for rid, pages, size, is_color, print_time, old_unit, old_cost in cursor.fetchall():
+            unit_cost = book.unit_cost(print_time, size, is_color)
+            cost = int((pages or 0) * unit_cost)
+            if unit_cost != old_unit or cost != old_cost:
+                updates.append((unit_cost, cost, rid))
+        if updates:
+            with conn:
+                conn.executemany("UPDATE log_entries SET unit_cost=?, cost=? WHERE id=?", updates)
+            changed += len(updates)
+
+        done_id = upper
+        if progress: progress(done_id - first_id + 1, last_id - first_id + 1)
+
+    conn.close()
+    print(f"[시스템] {query_start[:10]} ~ {query_end[:10]} 로그 {changed}건 재계산 완료.")
+    return changed, skipped
+
+# =========================================================
+# 1-2. 내보내기 / 월별 정산 리포트 (CSV, JSONL)
+# =========================================================
+EXPORT_COLUMNS = ("id", "print_time", "computer_name", "user_name", "printer_name", "document_name",
+                  "paper_size", "is_color", "pages", "unit_cost", "cost", "status")
+
+REPORT_GROUPS = {"user": "user_name", "printer": "printer_name", "computer": "computer_name"}
+REPORT_COLUMNS = ("month", "name", "jobs", "pages", "pages_bw", "pages_color", "pages_a3", "cost")
+
+def iter_logs(filters=None, conn=None, chunk_size=5000):
+    # 필터에 맞는 로그를 id 순으로 chunk_size 건씩 읽어 한 줄씩 넘김 (전체를 메모리에 올리지 않음)
+    # 기간이 보관된 달에 걸치면 그 달 보관 DB 를 하나씩 ATTACH 해서 먼저 (오래된 달부터) 넘김
+    def select(schema=None):
+        source, order_col, where, params = history_where(filters, schema)
+        sql = f"SELECT {', '.join('logs.' + c for c in EXPORT_COLUMNS)} FROM {source}"
+        if where: sql += " WHERE " + " AND ".join(where)
+        cursor = conn.execute(sql + f" ORDER BY {order_col}", params)
+        try:
+            while True:
+                rows = cursor.fetchmany(chunk_size)
+                if not rows: break
+                yield from rows
+        finally:
+            cursor.close()     # 중간에 멈춰도 DETACH 전에 문장을 정리
+
+    own_conn = conn is None
+    if own_conn: conn = sqlite3.connect(DB_PATH)
+    try:
+        for month, _, _ in reversed(archived_months(conn, filters)):
+            with attached_archive(conn, month) as schema:
+                yield from select(schema)
+        yield from select()
+    finally:
+        if own_conn: conn.close()
+
+def iter_report(group, filters=None, conn=None):
+    # 월 x (사용자 / 프린터 / PC) 별 합계. 묶음은 SQL 이 하고 결과(그룹 수만큼)만 넘김
+    # 이름 대신 정수 id / epoch 로 묶고 이름은 결과 행에서만 붙임
+    column = REPORT_GROUPS[group]
+
+    def select(schema=None):
+        source, _, where, params = history_where(filters, schema)
+        sql = f'''
+            SELECT strftime('%Y-%m', logs.print_ts, 'unixepoch') AS month, logs.{column}, COUNT(*), SUM(logs.pages),
+                   SUM(CASE WHEN logs.is_color = 0 THEN logs.pages ELSE 0 END),
+                   SUM(CASE WHEN logs.is_color = 1 THEN logs.pages ELSE 0 END),
+                   SUM(CASE WHEN logs.paper = {PAPER_CODES["A3"]} THEN logs.pages ELSE 0 END),
+                   SUM(logs.cost)
+            FROM {source}
+        '''
+        if where: sql += " WHERE " + " AND ".join(where)
+        sql += f" GROUP BY month, logs.{column.replace('_name', '_id')} ORDER BY month, SUM(logs.cost) DESC"
+        return conn.execute(sql, params).fetchall()
+
+    own_conn = conn is None
+    if own_conn: conn = sqlite3.connect(DB_PATH)
+    try:
+        months = archived_months(conn, filters)
+        if not months:
+            yield from select()
+            return
+        # 보관 DB 와 지금 DB 에 같은 달이 나뉘어 있을 수 있으므로 (보관 후 늦게 들어온 기록) 합쳐서 다시 정렬
+        totals = {}
+        def add(rows):
+            for row in rows:
+                total = totals.setdefault(row[:2], [0] * 6)
+                for i, value in enumerate(row[2:]): total[i] += value or 0
+        for month, _, _ in months:
+            with attached_archive(conn, month) as schema:
+                add(select(schema))
+        add(select())
+        for key in sorted(totals, key=lambda k: (k[0] or "", -totals[k][5])):
+            yield (*key, *totals[key])
+    finally:
+        if own_conn: conn.close()
+
+def write_rows(path, columns, rows, fmt=None, progress=None, cancel=None, every=10000):
+    # rows(이터레이터)를 파일로 바로 흘려 씀. fmt: "csv"(엑셀용 BOM 포함) / "jsonl", 없으면 확장자로 판단
+    fmt = fmt or ("jsonl" if path.lower().endswith((".jsonl", ".json")) else "csv")
+    count = 0
+    with open(path, "w", encoding="utf-8-sig" if fmt == "csv" else "utf-8", newline="") as f:
+        if fmt == "csv":
+            out = csv.writer(f)
+            out.writerow(columns)
+            write = out.writerow
+        else:
+            write = lambda row: f.write(json.dumps(dict(zip(columns, row)), ensure_ascii=False) + "\n")
+        for row in rows:
+            write(row)
+            count += 1
+            if count % every == 0:
+                if cancel and cancel.is_set(): break
+                if progress: progress(count)
+    if progress: progress(count)
+    return count
+
+def export_logs(path, filters=None, fmt=None, progress=None, cancel=None):
+    count = write_rows(path, EXPORT_COLUMNS, iter_logs(filters), fmt, progress, cancel)
+    print(f"[시스템] 로그 {count:,}건 내보내기 완료 -> {path}")
+    return count
+
+def export_report(path, group, filters=None, fmt=None):
+    count = write_rows(path, REPORT_COLUMNS, iter_report(group, filters), fmt)
+    print(f"[시스템] {group} 별 월 정산 {count:,}줄 -> {path}")
+    return count
+
+# =========================================================
+# 1-3. 보관 기간: 닫힌 달을 월별 보관 DB 로 옮기고, 조회 기간이 닿으면 ATTACH 해서 읽음
+# =========================================================
+ARCHIVE_DIR = None      # None: DB 옆의 archive 폴더
+ARCHIVE_SCHEMA = "archive"
+
+def archive_path(month):
+    # "2024-01" -> archive/print_log_2024-01.db
+    folder = ARCHIVE_DIR or os.path.join(os.path.dirname(os.path.abspath(DB_PATH)), "archive")
+    return os.path.join(folder, f"{os.path.splitext(os.path.basename(DB_PATH))[0]}_{month}.db")
+
+def month_bounds(month):
+    # "2024-01" -> 그 달의 [시작, 다음 달 시작) epoch
+    start = datetime.datetime.strptime(month, "%Y-%m")
+    end = (start + datetime.timedelta(days=32)).replace(day=1)
+    return int((start - EPOCH).total_seconds()), int((end - EPOCH).total_seconds())
+
+def retention_cutoff(months, today=None):
+    # 이번 달 + 지난 months 달은 남기고 그보다 앞선 달의 시작 epoch (이 시각 전의 로그가 보관 대상)
+    today = today or datetime.date.today()
+    index = today.year * 12 + today.month - 1 - months
+    return int((datetime.datetime(index // 12, index % 12 + 1, 1) - EPOCH).total_seconds())
+
+def archived_months(conn, filters=None):
+    # 필터 기간과 겹치는 보관 달 [(month, min_id, max_id)] - id 큰 달부터
+    filters = filters or {}
+    start, end = (filters.get("start_date") or "")[:7], (filters.get("end_date") or "")[:7]
+    try:
+        rows = conn.execute("SELECT month, min_id, max_id FROM log_archives ORDER BY max_id DESC").fetchall()
+    except sqlite3.OperationalError:
+        return []   # 보관 기능이 생기기 전 DB
+    return [row for row in rows if (not start or row[0] >= start) and (not end or row[0] <= end)
+            and os.path.exists(archive_path(row[0]))]
+
+@contextlib.contextmanager
+def attached_archive(conn, month, schema=ARCHIVE_SCHEMA):
+    conn.execute(f"ATTACH DATABASE ? AS {schema}", (archive_path(month),))
+    try:
+        yield schema
+    finally:
+        conn.execute(f"DETACH DATABASE {schema}")
+
+def init_archive(month):
+    # 보관 DB = 같은 log_entries / 차원 테이블(같은 id) + 읽기용 logs 뷰 + 이력 필터 인덱스
+    path = archive_path(month)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    conn = sqlite3.connect(path)
+    try:
+        cursor = conn.cursor()
+        create_log_storage(cursor)
+        cursor.execute(LOG_VIEW_SQL[0])
+        for name, columns in HISTORY_INDEXES:
+            cursor.execute(f"CREATE INDEX IF NOT EXISTS {name} ON log_entries ({columns})")
+        conn.commit()
+    finally:
+        conn.close()
+    return path
+
+def archive_chunk(conn, start_ts, end_ts, chunk_size):
+    # 한 구간을 보관 DB 로 복사(커밋)한 뒤 지금 DB 에서 지움. 옮긴 건수 반환
+    # 1) 복사: 보관 DB 에만 쓰는 트랜잭션 (fsync 가 있어도 기록기는 막지 않음, WAL 이라 읽기는 같이 됨)
+    # 2) 삭제: 지금 DB 의 짧은 쓰기 트랜잭션. 그 사이 바뀐 행(비용 재계산)은 남겨 두고 다음 구간에서 다시 복사
+    conn.execute("BEGIN")
+    try:
+        conn.execute("DELETE FROM temp.archive_ids")
+        conn.execute("INSERT INTO temp.archive_ids SELECT id FROM main.log_entries WHERE print_ts >= ? AND print_ts < ? LIMIT ?",
+                     (start_ts, end_ts, chunk_size))
+        for column, table in DIMENSIONS.items():
+            conn.execute(f"INSERT OR IGNORE INTO {ARCHIVE_SCHEMA}.{table} SELECT * FROM main.{table} WHERE id IN "
+                         f"(SELECT {column.replace('_name', '')}_id FROM main.log_entries WHERE id IN temp.archive_ids)")
+        conn.execute(f"INSERT OR REPLACE INTO {ARCHIVE_SCHEMA}.log_entries SELECT * FROM main.log_entries WHERE id IN temp.archive_ids")
+        conn.execute("COMMIT")
+    except BaseException:
+        conn.execute("ROLLBACK")
+        raise
+
+    conn.execute("BEGIN IMMEDIATE")
+    try:
+        # 일별 집계는 그대로 둠 (대시보드는 보관된 달도 집계 테이블만으로 조회)
+        conn.execute("INSERT INTO main.log_archiving VALUES (1)")
+        moved = conn.execute(f'''
+            DELETE FROM main.log_entries WHERE id IN temp.archive_ids AND EXISTS (
+                SELECT 1 FROM {ARCHIVE_SCHEMA}.log_entries a WHERE a.id = log_entries.id
+                AND a.unit_cost IS log_entries.unit_cost AND a.cost IS log_entries.cost)
+        ''').rowcount
+        conn.execute("DELETE FROM main.upload_updates WHERE entry_id IN temp.archive_ids")
+        conn.execute("DELETE FROM main.log_archiving")
+        conn.execute("COMMIT")
+    except BaseException:
+        conn.execute("ROLLBACK")
+        raise
+    return moved
+
+def incremental_vacuum(conn, pages=64, pause=0.02, stop=None):
+    # 빈 페이지를 pages 개씩 파일에서 돌려줌 (auto_vacuum=INCREMENTAL). 한 번에 길게 잠그지 않도록 나눠서
+    freed = 0
+    while not (stop and stop.is_set()):
+        free = conn.execute("PRAGMA freelist_count").fetchone()[0]
+        if free == 0: break
+        conn.executescript(f"PRAGMA incremental_vacuum({min(pages, free)});")    # execute 는 한 페이지만 정리됨
+        conn.execute("PRAGMA wal_checkpoint(PASSIVE)")
+        freed += min(pages, free)
+        time.sleep(pause)
+    return freed
+
+def archive_old_logs(months=None, chunk_size=100, pause=0.02, stop=None, db_path=None, today=None):
+    # 보관 기간(settings.retention_months, 0 이면 끔)이 지난 달을 오래된 달부터 한 달씩 옮김. 옮긴 건수 반환
+    # 구간마다 커밋하고 쉬므로 기록기는 길어야 구간 하나만큼 기다림
+    conn = sqlite3.connect(db_path or DB_PATH, timeout=30, isolation_level=None)
+    try:
+        if months is None:
+            row = conn.execute("SELECT value FROM settings WHERE key = 'retention_months'").fetchone()
+            months = int(row[0]) if row else 0
+        if months <= 0: return 0
+        cutoff = retention_cutoff(months, today)
+        conn.execute("PRAGMA synchronous=NORMAL")   # 기록기와 같은 설정 (WAL 커밋마다 fsync 하지 않음)
+        conn.execute("CREATE TEMP TABLE IF NOT EXISTS archive_ids (id INTEGER PRIMARY KEY)")
+        total = 0
+        while not (stop and stop.is_set()):
+            row = conn.execute("SELECT MIN(print_ts) FROM log_entries WHERE print_ts < ?", (cutoff,)).fetchone()
+            if row[0] is None: break
+            month = (EPOCH + datetime.timedelta(seconds=row[0])).strftime("%Y-%m")
+            start_ts, end_ts = month_bounds(month)
+            init_archive(month)
+            moved = 0
+            t0 = time.perf_counter()
+            with attached_archive(conn, month):
+                while not (stop and stop.is_set()):
+                    n = archive_chunk(conn, start_ts, end_ts, chunk_size)
+                    moved += n
+                    # WAL 이 커지면 다음에 커밋하는 쪽(기록기)이 체크포인트를 떠안으므로 여기서 조금씩 처리
+                    conn.execute("PRAGMA wal_checkpoint(PASSIVE)")
+                    if n == 0 and conn.execute("SELECT 1 FROM log_entries WHERE print_ts >= ? AND print_ts < ? LIMIT 1",
+                                               (start_ts, end_ts)).fetchone() is None: break
+                    time.sleep(pause)
+                count, min_id, max_id = conn.execute(f"SELECT COUNT(*), MIN(id), MAX(id) FROM {ARCHIVE_SCHEMA}.log_entries").fetchone()
+            conn.execute("INSERT OR REPLACE INTO log_archives (month, rows, min_id, max_id, archived_at) VALUES (?, ?, ?, ?, ?)",
+                         (month, count, min_id, max_id, datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S")))
+            total += moved
+            print(f"[보관] {month} 로그 {moved:,}건 -> {archive_path(month)} ({time.perf_counter() - t0:.1f}s)")
+        if total:
+            freed = incremental_vacuum(conn, stop=stop)
+            print(f"[보관] 빈 공간 {freed * conn.execute('PRAGMA page_size').fetchone()[0] / 1024 / 1024:.1f}MB 반환")
+        return total
+    finally:
+        conn.close()
+
+class Archiver(threading.Thread):
+    # 엔진 / 수집 서버 안에서 주기적으로 archive_old_logs 실행 (시작 직후 한 번, 이후 interval 초마다)
+    def __init__(self, db_path=None, interval=3600.0, **options):
+        super().__init__(name="Archiver", daemon=True)
+        self.db_path = db_path or DB_PATH
+        self.interval = interval
+        self.options = options
+        self.stop_event = threading.Event()
+
+    def stop(self, timeout=None):
+        self.stop_event.set()
+        self.join(timeout)
+
+    def run(self):
+        while not self.stop_event.is_set():
+            try:
+                archive_old_logs(stop=self.stop_event, db_path=self.db_path, **self.options)
+            except (sqlite3.Error, OSError) as e:
+                print(f"[에러] 로그 보관 실패: {e}")
+            self.stop_event.wait(self.interval)
+
+# =========================================================
+# 1-4. 월 사용량 한도 (사용자 / PC 별 쪽수·금액). 합계는 메모리에 두고 기록될 때마다 더함
+# =========================================================
+QUOTA_SCOPES = {"user": "user_name", "computer": "computer_name"}
+QUOTA_OK, QUOTA_NEAR, QUOTA_OVER = 0, 1, 2
+
+# 이번 달 사용량: 사용자 x PC 로 한 번 묶어서 읽고 나눠 더함 (print_ts 인덱스 범위)
+QUOTA_SEED_SQL = '''
+    SELECT u.name, c.name, SUM(e.pages), SUM(e.cost)
+    FROM log_entries e
+    LEFT JOIN users u ON u.id = e.user_id
+    LEFT JOIN computers c ON c.id = e.computer_id
+    WHERE e.print_ts >= ? AND e.print_ts < ? AND e.id <= ?
+    GROUP BY e.user_id, e.computer_id
+'''
+
+def quota_defaults():
+    # settings 의 기본 한도 {"user": (쪽, 금액), "computer": (쪽, 금액)} (0: 제한 없음)
+    return {scope: (int(current_settings.get(f"quota_{scope}_pages", 0)), int(current_settings.get(f"quota_{scope}_cost", 0)))
+            for scope in QUOTA_SCOPES}
+
+def load_quota_limits(conn=None):
+    # 개별 한도 {(scope, 이름): (쪽, 금액)}. 값이 NULL 이면 그 항목만 기본 한도, 0 이면 제한 없음
+    own_conn = conn is None
+    if own_conn: conn = sqlite3.connect(DB_PATH)
+    try:
+        defaults = quota_defaults()
+        rows = conn.execute("SELECT scope, name, max_pages, max_cost FROM quota_limits").fetchall()
+    finally:
+        if own_conn: conn.close()
+    return {(scope, name): (defaults[scope][0] if pages is None else pages, defaults[scope][1] if cost is None else cost)
+            for scope, name, pages, cost in rows if scope in QUOTA_SCOPES}
+
+def set_quota_limit(scope, name, max_pages=None, max_cost=None):
+    conn = sqlite3.connect(DB_PATH)
+    with conn:
+        conn.execute("INSERT OR REPLACE INTO quota_limits (scope, name, max_pages, max_cost) VALUES (?, ?, ?, ?)",
+                     (scope, name, max_pages, max_cost))
+    conn.close()
+
+def delete_quota_limit(scope, name):
+    conn = sqlite3.connect(DB_PATH)
+    with conn:
+        conn.execute("DELETE FROM quota_limits WHERE scope = ? AND name = ?", (scope, name))
+    conn.close()
+
+class QuotaTracker:
+    # 이번 달 사용자 / PC 별 (쪽, 금액) 누계와 한도 상태.
+    # - 시작할 때 reseed() 로 DB 에서 한 번 읽고, 이후는 기록된 행(record)마다 더하기만 함
+    # - 감시 루프의 확인(should_pause)은 집합 조회 두 번
+    # - 한도 설정은 limits_interval 초, 누계는 reseed_interval 초마다 다시 읽음
+    #   (다른 프로세스의 설정 변경, 단가 재계산 / 수동 수정으로 어긋난 금액을 바로잡기 위해)
+    def __init__(self, db_path=None, limits_interval=30.0, reseed_interval=600.0, clock=time.monotonic):
+        self.db_path = db_path or DB_PATH
+        self.limits_interval = limits_interval
+        self.reseed_interval = reseed_interval
+        self.clock = clock
+        self.lock = threading.Lock()
+        self.month = None
+        self.last_id = 0                # 이 id 까지는 reseed 에 포함됨 (그 뒤에 알림이 와도 다시 더하지 않음)
+        self.totals = {}                # (scope, 이름) -> [쪽, 금액]
+        self.states = {}                # (scope, 이름) -> QUOTA_NEAR / QUOTA_OVER (정상은 없음)
+        self.blocked = {scope: set() for scope in QUOTA_SCOPES}
+        self.defaults = quota_defaults()
+        self.limits = {}
+        self.warn_ratio = 0.8
+        self.pause_jobs = False
+        self.paused = set()             # 이미 일시 정지시킨 작업 키
+        self.next_limits = self.next_reseed = 0.0
+        QUOTA_BLOCKED.fn = lambda: sum(len(names) for names in self.blocked.values())
+
+    def limit(self, key):
+        return self.limits.get(key) or self.defaults[key[0]]
+
+    def _update_state(self, key, total):
+        max_pages, max_cost = self.limit(key)
+        ratio = max(total[0] / max_pages if max_pages else 0.0, total[1] / max_cost if max_cost else 0.0)
+        state = QUOTA_OVER if ratio >= 1.0 else (QUOTA_NEAR if ratio >= self.warn_ratio else QUOTA_OK)
+        previous = self.states.get(key, QUOTA_OK)
+        if state == previous: return
+        if state == QUOTA_OK: self.states.pop(key, None)
+        else: self.states[key] = state
+        if state == QUOTA_OVER:
+            self.blocked[key[0]].add(key[1])
+            print(f"[한도] {key[1]} 이번 달 한도 초과 (쪽 {total[0]:,}/{max_pages or '-'}, 금액 {total[1]:,}/{max_cost or '-'})")
+        elif previous == QUOTA_OVER:
+            self.blocked[key[0]].discard(key[1])
+
+    def _reset(self, month):
+        self.month = month
+        self.totals = {}
+        self.states = {}
+        self.blocked = {scope: set() for scope in QUOTA_SCOPES}
+        self.paused = set()
+
+    def load_limits(self, conn=None):
+        own_conn = conn is None
+        if own_conn: conn = sqlite3.connect(self.db_path)
+        try:
+            settings = dict(conn.execute("SELECT key, value FROM settings WHERE key LIKE 'quota%'").fetchall())
+            current_settings.update(settings)
+            limits = load_quota_limits(conn)
+        finally:
+            if own_conn: conn.close()
+        with self.lock:
+            self.defaults = quota_defaults()
+            self.limits = limits
+            self.warn_ratio = float(settings.get("quota_warn_percent", 80)) / 100
+            self.pause_jobs = bool(settings.get("quota_pause", 0))
+            for key, total in self.totals.items():
+                self._update_state(key, total)
+        self.next_limits = self.clock() + self.limits_interval
+
+    def reseed(self, today=None):
+        # 이번 달 누계를 DB 에서 다시 읽음. 읽는 동안 들어온 기록 알림은 잠금에서 기다렸다가 last_id 로 걸러짐
+        month = (today or datetime.date.today()).strftime("%Y-%m")
+        start, end = month_bounds(month)
+        conn = sqlite3.connect(self.db_path)
+        try:
+            self.load_limits(conn)
+            with self.lock:
+                conn.execute("BEGIN")
+                last_id = conn.execute("SELECT IFNULL(MAX(id), 0) FROM log_entries").fetchone()[0]
+                rows = conn.execute(QUOTA_SEED_SQL, (start, end, last_id)).fetchall()
+                conn.rollback()
+                paused = self.paused if month == self.month else set()
+                self._reset(month)
+                self.paused = paused
+                self.last_id = last_id
+                for user, computer, pages, cost in rows:
+                    self._add(user, computer, pages or 0, cost or 0)
+        finally:
+            conn.close()
+        self.next_reseed = self.clock() + self.reseed_interval
+
+    def _add(self, user, computer, pages, cost):
+        for key in (("user", user), ("computer", computer)):
+            if key[1] is None: continue
+            total = self.totals.get(key)
+            if total is None: total = self.totals[key] = [0, 0]
+            total[0] += pages
+            total[1] += cost
+            self._update_state(key, total)
+
+    def record(self, rows):
+        # 기록기 on_commit (LOG_COLUMNS dict 목록): 이번 달 기록만 더함
+        with self.lock:
+            for row in rows:
+                if row["id"] <= self.last_id: continue
+                month = (row["print_time"] or "")[:7]
+                if month != self.month:
+                    if self.month is None or month < self.month: continue     # 지난달에 늦게 들어온 기록
+                    self._reset(month)
+                self._add(row["user_name"], row["computer_name"], row["pages"] or 0, row["cost"] or 0)
+
+    def update(self, rows):
+        # 기록기 on_update (작업이 끝나서 고친 행): 고치기 전과의 차이만 더함 (취소된 작업은 줄어듦)
+        with self.lock:
+            for row in rows:
+                if (row["print_time"] or "")[:7] != self.month: continue
+                self._add(row["user_name"], row["computer_name"], (row["pages"] or 0) - row["old_pages"], (row["cost"] or 0) - row["old_cost"])
+
+    def maybe_reload(self):
+        # 감시 루프에서 주기마다 호출 (대부분 시각 비교 한 번). 달이 바뀐 것도 한도를 다시 읽을 때 확인
+        now = self.clock()
+        if now < self.next_limits and now < self.next_reseed: return
+        try:
+            if now >= self.next_reseed or datetime.date.today().strftime("%Y-%m") != self.month:
+                self.reseed()
+            else:
+                self.load_limits()
+        except sqlite3.Error as e:
+            print(f"[한도] 사용량 / 한도 읽기 실패: {e}")
+            self.next_limits = now + self.limits_interval
+
+    def total(self, scope, name):
+        with self.lock:
+            return tuple(self.totals.get((scope, name), (0, 0)))
+
+    def should_pause(self, user, computer):
+        return self.pause_jobs and (user in self.blocked["user"] or computer in self.blocked["computer"])
+
+    def usage(self, min_state=QUOTA_NEAR):
+        # 한도 근접 / 초과 목록 [(scope, 이름, 쪽, 최대 쪽, 금액, 최대 금액, 상태)] 사용 비율 큰 순
+        with self.lock:
+            items = [(key, list(self.totals[key]), self.limit(key), state) for key, state in self.states.items() if state >= min_state]
+        def ratio(item):
+            _, (pages, cost), (max_pages, max_cost), _ = item
+            return max(pages / max_pages if max_pages else 0.0, cost / max_cost if max_cost else 0.0)
+        items.sort(key=ratio, reverse=True)
+        return [(scope, name, pages, max_pages, cost, max_cost, state)
+                for (scope, name), (pages, cost), (max_pages, max_cost), state in items]
+
+# =========================================================
+# 2. 로그 기록기 (전용 쓰기 스레드)
+# =========================================================
+LOG_COLUMNS = ("id", "job_id", "printer_name", "computer_name", "user_name", "document_name", "pages",
+               "paper_size", "is_color", "unit_cost", "cost", "print_time", "status", "submitted")
+
+# 예전 logs 모양 그대로의 INSERT (뷰의 INSTEAD OF 트리거가 log_entries 로 옮김). 기록기는 encode_log + LOG_ENTRY_INSERT_SQL
+LOG_INSERT_SQL = '''
+    INSERT OR IGNORE INTO logs (job_id, printer_name, computer_name, user_name, document_name, pages, paper_size, is_color, unit_cost, cost, print_time, status, submitted)
+    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+'''
+
+# 다른 연결(rebuild-summary / archive / 첫 실행 마이그레이션)이 쓰기 잠금을 오래 잡고 있을 때:
+# 연결마다 WRITER_BUSY_TIMEOUT 초까지 기다리고, 그래도 실패하면 묶음을 버리지 않고 간격을 늘려 가며 다시 시도
+WRITER_BUSY_TIMEOUT = 30.0
+WRITER_RETRY_MIN = 0.5
+WRITER_RETRY_MAX = 30.0
+
+class CommitTicket:
+    # 여러 건을 한꺼번에 넘기고 커밋될 때까지 기다릴 때 사용 (수집 서버가 에이전트에 응답하기 전)
+    def __init__(self, records):
+        self.records = records
+        self.inserted = 0
+        self.updated = 0    # 이미 받은 행인데 값이 바뀐 것 (끝난 작업 / 단가 재계산)
+        self.error = None
+        self.done = threading.Event()
+
+    def wait(self, timeout=None):
+        return self.done.wait(timeout)
+
+class JobUpdate:
+    # 이미 기록한 작업의 최종 쪽수 / 상태. 기록기가 (프린터, JobId, 제출 시각, PC) 로 찾아서 고침
+    # (비용은 그 기록의 단가 x 쪽수. 재시작 전에 기록된 작업도 같은 키로 찾아짐)
+    def __init__(self, printer_name, job_id, submitted, computer_name, pages, status):
+        self.printer_name = printer_name
+        self.job_id = job_id
+        self.submitted = submitted
+        self.computer_name = computer_name
+        self.pages = pages
+        self.status = status
+
+class IngestRow:
+    # 수집 서버가 받은 행: record 는 LOG_INSERT_SQL 순서, origin_id 는 보낸 PC 의 logs.id
+    def __init__(self, origin_id, record):
+        self.origin_id = origin_id
+        self.record = record
+
+ORIGIN_FIND_SQL = '''
+    SELECT e.id, e.pages, e.unit_cost, e.cost, e.status_id FROM ingest_origins o
+    LEFT JOIN log_entries e ON e.id = o.entry_id
+    WHERE o.computer_id = ? AND o.origin_id = ?
+'''
+ORIGIN_INSERT_SQL = "INSERT INTO ingest_origins (computer_id, origin_id, entry_id) VALUES (?, ?, ?)"
+INGEST_UPDATE_SQL = "UPDATE log_entries SET pages = ?, unit_cost = ?, cost = ?, status_id = ? WHERE id = ?"
+
+JOB_FIND_SQL = '''
+    SELECT id, pages, cost, status_id FROM log_entries
+    WHERE printer_id = ? AND job_id = ? AND submitted_ts IS ? AND computer_id IS ?
+'''
+JOB_UPDATE_SQL = "UPDATE log_entries SET pages = ?, cost = ? * IFNULL(unit_cost, 0), status_id = ? WHERE id = ?"
+LOG_ROW_SQL = f"SELECT {', '.join(LOG_COLUMNS)} FROM logs WHERE id = ?"
+
+class LogWriter(threading.Thread):
+    # 감지된 작업을 큐로 받아 하나의 연결(WAL)로 모아서 커밋한다.
+    # batch_size 건이 쌓이거나 첫 건 이후 flush_interval 초가 지나면 한 번에 기록.
+    def __init__(self, db_path=None, batch_size=200, flush_interval=0.5, on_commit=None, on_update=None):
+        super().__init__(name="LogWriter", daemon=True)
+        self.db_path = db_path or DB_PATH
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.on_commit = on_commit      # 커밋 후 호출 (실제 저장된 행을 LOG_COLUMNS 키의 dict 목록으로 전달)
+        self.on_update = on_update      # 커밋 후 호출 (고친 행: LOG_COLUMNS 키 + 고치기 전 old_pages / old_cost)
+        self.queue = queue.Queue()
+        self.committed = 0
+        self.duplicates = 0
+        self.updated = 0
+        self.batches = 0
+        self.failed = 0
+        self.retry_delay = 0.0          # 0 이 아니면 직전 기록이 실패해서 이만큼 기다렸다가 다시 시도하는 중
+        self.names = NameIds()
+        WRITER_QUEUE.fn = self.queue.qsize
+
+    def submit(self, record):
+        self.queue.put(record)
+
+    def submit_update(self, update):
+        # JobUpdate: 같은 큐로 넘기므로 먼저 넘긴 INSERT 보다 앞서 처리되는 일은 없음
+        self.queue.put(update)
+
+    def submit_many(self, records):
+        # 묶음 제출: 돌려준 ticket.wait() 가 끝나면 커밋(또는 실패)된 것. 다른 제출과 같은 트랜잭션에 묶일 수 있음
+        ticket = CommitTicket(list(records))
+        self.queue.put(ticket)
+        return ticket
+
+    def queue_depth(self):
+        return self.queue.qsize()
+
+    def stop(self, timeout=None):
+        # 큐에 남은 작업까지 모두 기록한 뒤 종료
+        self.queue.put(None)
+        self.join(timeout)
+
+    def run(self):
+        conn = sqlite3.connect(self.db_path, timeout=WRITER_BUSY_TIMEOUT)
+        try:
+            conn.execute("PRAGMA journal_mode=WAL")     # DB 에 남으므로 처음 한 번만 바뀜. 그때 잠겨 있으면 다음 실행 때
+        except sqlite3.OperationalError as e:
+            print(f"[에러] WAL 로 바꾸지 못함 (다음 실행 때 다시): {e}")
+        conn.execute("PRAGMA synchronous=NORMAL")
+
+        batch = []
+        tickets = []
+        deadline = 0.0
+        try:
+            while True:
+                # 시각이 되면 큐가 비기를 기다리지 않고 기록 (작업이 계속 들어와도 다시 시도가 밀리지 않게)
+                # 다시 시도를 기다리는 중에는 batch_size 까지만 모으고 나머지는 큐에 남겨 둠 (batch 가 끝없이 커지지 않게)
+                if batch and (time.monotonic() >= deadline or (self.retry_delay and len(batch) >= self.batch_size)):
+                    time.sleep(max(0.0, deadline - time.monotonic()))
+                    if self._flush(conn, batch, tickets):
+                        batch = []
+                    else:
+                        deadline = time.monotonic() + self.retry_delay
+                    tickets = []
+                    continue
+                timeout = max(0.0, deadline - time.monotonic()) if batch else None
+                try:
+                    record = self.queue.get(timeout=timeout)
+                except queue.Empty:
+                    continue
+
+                if record is None:
+                    break
+                if not batch:
+                    deadline = time.monotonic() + self.flush_interval
+                if isinstance(record, CommitTicket):
+                    tickets.append((record, len(batch)))
+                    batch.extend(record.records)
+                else:
+                    batch.append(record)
+                # 기다리는 제출자가 있으면 큐가 빌 때 바로 커밋 (그 사이 들어온 것끼리는 한 트랜잭션으로)
+                # 다시 시도를 기다리는 중이면 그 시각까지는 쌓기만 함 (위에서)
+                if not self.retry_delay and (len(batch) >= self.batch_size or (tickets and self.queue.empty())):
+                    if self._flush(conn, batch, tickets):
+                        batch = []
+                    else:
+                        deadline = time.monotonic() + self.retry_delay
+                    tickets = []
+
+            # 종료 신호 이후에 들어온 작업까지 비우기
+            while True:
+                try:
+                    record = self.queue.get_nowait()
+                except queue.Empty:
+                    break
+                if isinstance(record, CommitTicket):
+                    tickets.append((record, len(batch)))
+                    batch.extend(record.records)
+                elif record is not None:
+                    batch.append(record)
+            if not self._flush(conn, batch, tickets):
+                self._give_up(batch)
+        finally:
+            conn.close()
+
+    def _give_up(self, batch):
+        INSERT_ROWS.inc("error", amount=len(batch))
+        self.failed += len(batch)
+        print(f"[에러] 종료 시점까지 기록하지 못한 로그 {len(batch)}건을 버림")
+
+    def _flush(self, conn, batch, tickets=()):
+        # 커밋했으면 True. 잠김 같은 일시적인 오류면 False 를 돌려주고 batch 는 그대로 (부른 쪽이 retry_delay 뒤에 다시)
+        # 기다리는 제출자(tickets)에게는 실패를 바로 알림: 수집 서버는 503 으로 답하고 에이전트가 나중에 다시 보냄
+        if not batch: return True
+        # 한 트랜잭션으로 묶되, 중복(이미 기록된 작업)으로 무시된 행은 알림에서 뺀다
+        inserted = []
+        updated = []
+        updates = 0
+        flags = []
+        started = time.perf_counter()
+        try:
+            with conn:
+                cursor = conn.cursor()
+                for record in batch:
+                    if isinstance(record, JobUpdate):
+                        updates += 1
+                        flags.append(0)
+                        row = self._update(cursor, record)
+                        if row: updated.append(row)
+                        continue
+                    if isinstance(record, IngestRow):
+                        entry_id, row = self._ingest(cursor, record)
+                        record = record.record
+                        if row:
+                            updates += 1
+                            flags.append(2)
+                            updated.append(row)
+                            continue
+                    else:
+                        cursor.execute(LOG_ENTRY_INSERT_SQL, encode_log(cursor, self.names, record))
+                        entry_id = cursor.lastrowid if cursor.rowcount == 1 else None
+                    flags.append(1 if entry_id is not None else 0)
+                    if entry_id is not None:
+                        inserted.append(dict(zip(LOG_COLUMNS, (entry_id, *record))))
+        except sqlite3.Error as e:
+            self.names.clear()
+            for ticket, start in tickets:
+                ticket.error = e
+                ticket.done.set()
+            if isinstance(e, sqlite3.OperationalError):
+                # 잠김 / 디스크 가득 참 등: 이미 중복 집합에 들어간 작업이라 버리면 다시 감지되지 않음
+                self.retry_delay = min(max(self.retry_delay * 2, WRITER_RETRY_MIN), WRITER_RETRY_MAX)
+                WRITER_RETRIES.inc()
+                print(f"[에러] 로그 {len(batch)}건 기록 실패, {self.retry_delay:g}초 뒤 다시 시도: {e}")
+                return False
+            # 기록 자체가 잘못된 경우 (다시 해도 같음)
+            INSERT_ROWS.inc("error", amount=len(batch))
+            self.failed += len(batch)
+            print(f"[에러] 로그 {len(batch)}건 기록 실패: {e}")
+            return True
+
+        self.retry_delay = 0.0
+        INSERT_SECONDS.observe(time.perf_counter() - started)
+        INSERT_ROWS.inc("inserted", amount=len(inserted))
+        INSERT_ROWS.inc("duplicate", amount=len(batch) - updates - len(inserted))
+        if updated: INSERT_ROWS.inc("updated", amount=len(updated))
+        for ticket, start in tickets:
+            results = flags[start:start + len(ticket.records)]
+            ticket.inserted, ticket.updated = results.count(1), results.count(2)
+            ticket.done.set()
+        self.committed += len(inserted)
+        self.duplicates += len(batch) - updates - len(inserted)
+        self.updated += len(updated)
+        self.batches += 1
+        # 알림 받는 쪽(화면 / 이벤트 채널 / 한도)의 오류로 기록 스레드가 죽지 않도록
+        for callback, rows in ((self.on_commit, inserted), (self.on_update, updated)):
+            if callback and rows:
+                try:
+                    callback(rows)
+                except Exception as e:
+                    print(f"[에러] 기록 알림 처리 실패: {e!r}")
+        return True
+
+    def _ingest(self, cursor, row):
+        # (새 id, None): 처음 받은 (PC, origin_id) 라 기록함
+        # (None, 고친 행): 이미 받은 행인데 에이전트 쪽에서 바뀜 (끝난 작업의 최종 쪽수 / 상태, 단가 재계산) -> 그 값으로 고침
+        # (None, None): 이미 받은 그대로 (재전송) 또는 보관 DB 로 옮겨진 행
+        computer_id = self.names.get(cursor, "computers", row.record[2])
+        found = cursor.execute(ORIGIN_FIND_SQL, (computer_id, row.origin_id)).fetchone()
+        if found:
+            entry_id, pages, unit_cost, cost, status_id = found
+            if entry_id is None: return None, None
+            record = row.record
+            new_status = self.names.get(cursor, "statuses", record[11])
+            if (pages, unit_cost, cost, status_id) == (record[5], record[8], record[9], new_status): return None, None
+            cursor.execute(INGEST_UPDATE_SQL, (record[5], record[8], record[9], new_status, entry_id))
+            result = dict(zip(LOG_COLUMNS, cursor.execute(LOG_ROW_SQL, (entry_id,)).fetchone()))
+            result["old_pages"], result["old_cost"] = pages or 0, cost or 0
+            return None, result
+        values = encode_log(cursor, self.names, row.record)
+        cursor.execute(LOG_ENTRY_INSERT_SQL, values)
+        entry_id = cursor.lastrowid if cursor.rowcount == 1 else None
+        # 같은 작업을 origin_id 없이 올리던 예전 에이전트가 먼저 보낸 경우: 그 행에 출처만 연결
+        target = entry_id or cursor.execute(JOB_FIND_SQL, (values[1], values[0], values[12], computer_id)).fetchone()[0]
+        cursor.execute(ORIGIN_INSERT_SQL, (computer_id, row.origin_id, target))
+        return entry_id, None
+
+    def _update(self, cursor, update):
+        # 바뀐 것이 없거나 기록이 없으면 (보관 DB 로 옮겨짐 등) None
+        names = self.names
+        row = cursor.execute(JOB_FIND_SQL, (names.get(cursor, "printers", update.printer_name), update.job_id,
+                                            to_epoch(update.submitted), names.get(cursor, "computers", update.computer_name))).fetchone()
+        if row is None: return None
+        entry_id, pages, cost, status_id = row
+        new_status = names.get(cursor, "statuses", update.status)
+        if pages == update.pages and status_id == new_status: return None
+        cursor.execute(JOB_UPDATE_SQL, (update.pages, update.pages, new_status, entry_id))
+        result = dict(zip(LOG_COLUMNS, cursor.execute(LOG_ROW_SQL, (entry_id,)).fetchone()))
+        result["old_pages"], result["old_cost"] = pages or 0, cost or 0
+        return result
+
+# =========================================================
+# 3. 스풀러 백엔드 (win32print / 시뮬레이터)
+# =========================================================
+class Win32Spooler:
+    # 실제 Windows 스풀러. win32print 는 이 백엔드를 쓸 때만 import 한다.
+    def __init__(self):
+        import win32print
+        self.win32print = win32print
+
+    def enum_printers(self):
+        flags = self.win32print.PRINTER_ENUM_LOCAL | self.win32print.PRINTER_ENUM_CONNECTIONS
+        return [p[2] for p in self.win32print.EnumPrinters(flags)]
+
+    def open_printer(self, printer_name):
+        return self.win32print.OpenPrinter(printer_name)
+
+    def enum_jobs(self, handle, first_job=0, count=100):
+        return self.win32print.EnumJobs(handle, first_job, count, 2)
+
+    def close_printer(self, handle):
+        self.win32print.ClosePrinter(handle)
+
+    def pause_job(self, printer_name, job_id):
+        # 다른 사용자의 작업을 멈추려면 관리 권한 핸들이 필요 (조회용 핸들과 따로 열고 바로 닫음)
+        handle = self.win32print.OpenPrinter(printer_name, {"DesiredAccess": self.win32print.PRINTER_ALL_ACCESS})
+        try:
+            self.win32print.SetJob(handle, job_id, 0, None, self.win32print.JOB_CONTROL_PAUSE)
+        finally:
+            self.win32print.ClosePrinter(handle)
+
+
+class SimDevMode:
+    # EnumJobs 결과의 pDevMode 흉내 (Color: 1=흑백, 2=컬러 / PaperSize: 8=A3, 9=A4)
+    def __init__(self, Color=1, PaperSize=9):
+        self.Color = Color
+        self.PaperSize = PaperSize
+
+
+# 기록 파일에 남기는 작업 필드 (EnumJobs level 2 기준)
+SIM_JOB_FIELDS = ("JobId", "pUserName", "pDocument", "TotalPages", "PagesPrinted", "Status", "Submitted")
+
+def _job_to_json(job):
+    data = {k: job[k] for k in SIM_JOB_FIELDS if k in job}
+    if data.get("Submitted") is not None:
+        data["Submitted"] = str(data["Submitted"])
+    devmode = job.get("pDevMode")
+    if devmode:
+        data["pDevMode"] = {"Color": getattr(devmode, "Color", 1), "PaperSize": getattr(devmode, "PaperSize", 9)}
+    return data
+
+def _job_from_json(data):
+    job = dict(data)
+    if job.get("pDevMode"):
+        job["pDevMode"] = SimDevMode(**job["pDevMode"])
+    return job
+
+
+class SimulatedSpooler:
+    # 기록된(또는 합성한) 스풀러 스냅샷을 재생하는 백엔드.
+    # frames: [(t초, {프린터명: [작업 dict, ...]}), ...]  (t 오름차순)
+    # speed=None 이면 step() 호출로만 다음 프레임으로 넘어간다 (결정적 재생).
+    def __init__(self, frames, speed=1.0, clock=time.monotonic):
+        self.frames = frames
+        self.speed = speed
+        self.clock = clock
+        self.index = 0
+        self.started = None
+        self.printers = sorted({name for _, snapshot in frames for name in snapshot})
+        self.enum_calls = 0
+        self.job_calls = 0
+        self.delays = {}            # 프린터명 -> EnumJobs 응답 지연(초) (느린 네트워크 프린터 흉내)
+        self.unreachable = set()    # 여기 있는 프린터는 OpenPrinter 가 실패
+        self.paused = set()         # pause_job 으로 멈춘 (프린터, JobId): 이후 조회에서 Status 에 일시 정지 비트
+        self._lock = threading.Lock()
+
+    # --- 재생 위치 ---
+    def start(self):
+        if self.started is None:
+            self.started = self.clock()
+
+    def _advance(self):
+        if self.speed is None: return
+        with self._lock:
+            self.start()
+            elapsed = (self.clock() - self.started) * self.speed
+            while self.index + 1 < len(self.frames) and self.frames[self.index + 1][0] <= elapsed:
+                self.index += 1
+
+    def step(self):
+        if self.index + 1 < len(self.frames):
+            self.index += 1
+            return True
+        return False
+
+    def finished(self):
+        self._advance()
+        return self.index + 1 >= len(self.frames)
+
+    def frame_time(self, index):
+        # 프레임이 보이기 시작하는 시각 (clock 기준, 시간 재생 모드 전용)
+        return self.started + self.frames[index][0] / self.speed
+
+    def first_seen(self):
+        # (프린터, JobId) -> 처음 등장한 프레임 번호 (탐지 지연 측정용)
+        seen = {}
+        for i, (_, snapshot) in enumerate(self.frames):
+            for name, jobs in snapshot.items():
+                for job in jobs:
+                    seen.setdefault((name, job["JobId"]), i)
+        return seen
+
+    # --- 스풀러 인터페이스 ---
+    def enum_printers(self):
+        self.enum_calls += 1
+        self._advance()
+        return list(self.printers)
+
+    def open_printer(self, printer_name):
+        if printer_name in self.unreachable:
+            raise OSError(f"{printer_name}: 프린터에 연결할 수 없음")
+        return printer_name
+
+    def enum_jobs(self, handle, first_job=0, count=100):
+        self.job_calls += 1
+        delay = self.delays.get(handle)
+        if delay: time.sleep(delay)
+        self._advance()
+        jobs = self.frames[self.index][1].get(handle, [])[first_job:first_job + count]
+        if self.paused:
+            jobs = [dict(job, Status=job.get("Status", 0) | JOB_STATUS_PAUSED) if (handle, job["JobId"]) in self.paused else job
+                    for job in jobs]
+        return jobs
+
+    def close_printer(self, handle):
+        pass
+
+    def pause_job(self, printer_name, job_id):
+        if printer_name in self.unreachable:
+            raise OSError(f"{printer_name}: 프린터에 연결할 수 없음")
+        self.paused.add((printer_name, job_id))
+
+    # --- 기록 / 불러오기 ---
+    @classmethod
+    def load(cls, path, speed=1.0):
+        frames = []
+        with open(path, encoding="utf-8") as f:
+            for line in f:
+                if not line.strip(): continue
+                data = json.loads(line)
+                snapshot = {name: [_job_from_json(j) for j in jobs] for name, jobs in data["printers"].items()}
+                frames.append((data["t"], snapshot))
+        return cls(frames, speed=speed)
+
+    def save(self, path):
+        with open(path, "w", encoding="utf-8") as f:
+            for t, snapshot in self.frames:
+                data = {"t": t, "printers": {name: [_job_to_json(j) for j in jobs] for name, jobs in snapshot.items()}}
+                f.write(json.dumps(data, ensure_ascii=False) + "\n")
+
+    @classmethod
+    def synthetic(cls, printers=20, jobs=2000, duration=60.0, linger=3.0, resolution=0.1,
+                  color_ratio=0.2, a3_ratio=0.1, etc_ratio=0.05, seed=0, speed=1.0):
+        # 작업이 duration 초 동안 무작위로 들어와 linger 초 동안 큐에 머무는 시나리오
+        rnd = random.Random(seed)
+        printer_names = [f"SimPrinter-{i:03d}" for i in range(printers)]
+        next_job_id = {name: 1 for name in printer_names}
+        base = datetime.datetime(2024, 1, 1, 9, 0, 0)
+
+        events = []
+        for _ in range(jobs):
+            name = rnd.choice(printer_names)
+            arrive = round(rnd.uniform(0, duration) / resolution) * resolution
+            paper = 8 if rnd.random() < a3_ratio else (5 if rnd.random() < etc_ratio else 9)
+            job = {
+                "JobId": next_job_id[name],
+                "pUserName": f"user{rnd.randint(1, 200):03d}",
+                "pDocument": f"문서_{rnd.randint(1, 99999)}.pdf",
+                "TotalPages": rnd.randint(1, 40),
+                "PagesPrinted": 0,
+                "Status": 0,
+                "Submitted": base + datetime.timedelta(seconds=arrive),
+                "pDevMode": SimDevMode(Color=2 if rnd.random() < color_ratio else 1, PaperSize=paper),
+            }
+            next_job_id[name] += 1
+            events.append((arrive, arrive + linger, name, job))
+
+        # 시점마다 큐에 남아 있는 작업으로 스냅샷 생성
+        times = sorted({0.0} | {round(a, 6) for a, _, _, _ in events} | {round(d, 6) for _, d, _, _ in events})
+        events.sort(key=lambda e: e[0])
+        frames = []
+        for t in times:
+            snapshot = {name: [] for name in printer_names}
+            for arrive, depart, name, job in events:
+                if arrive > t: break
+                if t < depart:
+                    snapshot[name].append(job)
+            frames.append((t, snapshot))
+        return cls(frames, speed=speed)
+
+
+def record_spooler(spooler, path, duration=60.0, interval=1.0):
+    # 실제 스풀러 상태를 interval 초마다 찍어서 재생용 파일로 남긴다.
+    frames = []
+    started = time.monotonic()
+    while True:
+        t = time.monotonic() - started
+        if t > duration: break
+        snapshot = {}
+        for printer_name in spooler.enum_printers():
+            handle = None
+            try:
+                handle = spooler.open_printer(printer_name)
+                snapshot[printer_name] = list(spooler.enum_jobs(handle, 0, 100))
+            except Exception as e:
+                print(f"[기록] {printer_name} 조회 실패: {e}")
+            finally:
+                if handle: spooler.close_printer(handle)
+        frames.append((round(t, 3), snapshot))
+        time.sleep(interval)
+    SimulatedSpooler(frames).save(path)
+    return len(frames)
+
+# =========================================================
+# 4. 감시 엔진
+# =========================================================
+class JobDedup:
+    # 이미 기록한 작업 키 (프린터, JobId, 제출 시각) 를 최근 확인 순서로 보관.
+    # 큐에서 사라진 지 ttl 초가 지났거나 max_size 를 넘으면 오래된 것부터 버린다.
+    # (재시작 등으로 잊어버린 작업은 DB 의 ux_entries_job 고유 인덱스 - log_entries (printer_id, job_id, submitted_ts, computer_id) - 가 걸러준다)
+    def __init__(self, ttl=6 * 3600, max_size=20000, clock=time.monotonic):
+        self.ttl = ttl
+        self.max_size = max_size
+        self.clock = clock
+        self.entries = collections.OrderedDict()
+
+    def __len__(self):
+        return len(self.entries)
+
+    def seen(self, key):
+        # 처리한 적 있으면 마지막 확인 시각을 갱신하고 True
+        if key not in self.entries: return False
+        self.entries[key] = self.clock()
+        self.entries.move_to_end(key)
+        return True
+
+    def add(self, key):
+        self.entries[key] = self.clock()
+        self.entries.move_to_end(key)
+        self.expire()
+
+    def expire(self):
+        limit = self.clock() - self.ttl
+        entries = self.entries
+        while entries:
+            key, last_seen = next(iter(entries.items()))
+            if len(entries) <= self.max_size and last_seen >= limit: break
+            entries.popitem(last=False)
+
+def job_submitted(job):
+    return submitted_text(job.get('Submitted'))
+
+def submitted_text(value):
+    # EnumJobs 의 Submitted (pywintypes 시각 / datetime / 기록 파일의 문자열) -> "YYYY-MM-DD HH:MM:SS"
+    if value is None: return None
+    if hasattr(value, 'strftime'):
+        return value.strftime("%Y-%m-%d %H:%M:%S")
+    return str(value)[:19]
+
+def fetch_all_jobs(spooler, handle, page_size=100):
+    # EnumJobs 를 page_size 단위로 끝까지 읽는다 (100건 넘는 큐도 빠짐없이)
+    jobs = []
+    first_job = 0
+    while True:
+        page = spooler.enum_jobs(handle, first_job, page_size)
+        jobs.extend(page)
+        if len(page) < page_size: return jobs
+        first_job += page_size
+
+JOB_STATUS_PAUSED = 0x1
+JOB_STATUS_ERROR = 0x2
+JOB_STATUS_DELETING = 0x4
+JOB_STATUS_PRINTED = 0x80
+JOB_STATUS_DELETED = 0x100
+JOB_STATUS_FINISHED = JOB_STATUS_PRINTED | JOB_STATUS_DELETED    # 큐에 남아 있어도 끝난 작업 ("인쇄 후 문서 보관")
+FINAL_STATUS_LABELS = {"PRINTED": "인쇄 완료", "DELETED": "취소", "ERROR": "오류"}
+
+def final_status(status):
+    # 마지막으로 본 Status 비트 -> 기록할 최종 상태
+    if status & JOB_STATUS_PRINTED: return "PRINTED"
+    if status & (JOB_STATUS_DELETING | JOB_STATUS_DELETED): return "DELETED"
+    if status & JOB_STATUS_ERROR: return "ERROR"
+    return "PRINTED"    # 오류 / 취소 표시 없이 큐에서 빠짐
+
+class TrackedJob:
+    # 큐에 있는 작업 하나의 지난 조회 값. 바쁜 큐에서는 작업 수만큼 계속 들고 있으므로 __slots__
+    __slots__ = ("submitted", "document", "total", "printed", "status", "logged", "logged_pages", "final", "cycle")
+
+    def __init__(self, submitted):
+        self.submitted = submitted      # EnumJobs 의 Submitted 원래 값 (JobId 재사용 확인용)
+        self.document = None
+        self.total = self.printed = self.status = None
+        self.logged = False             # 기록기로 넘김 (상태 PRINTING)
+        self.logged_pages = 0
+        self.final = False              # 최종 쪽수 / 상태를 넘김
+        self.cycle = 0
+
+class PrinterJobs:
+    # 한 프린터 큐의 지난 조회 결과 (JobId -> TrackedJob). process_jobs 가 이번 결과와 비교
+    def __init__(self):
+        self.jobs = {}
+        self.cycle = 0
+        self.restored = {}      # (JobId, 제출 시각) -> TrackedJob: 지난 실행에서 PRINTING 으로 남은 기록 (첫 조회 때 확인)
+
+OPEN_JOBS_SQL = '''
+    SELECT p.name, e.job_id, datetime(e.submitted_ts, 'unixepoch'), e.pages, d.name FROM log_entries e
+    JOIN printers p ON p.id = e.printer_id
+    LEFT JOIN documents d ON d.id = e.document_id
+    WHERE e.status_id = {status_id} AND e.computer_id = ?
+'''     # status_id 는 idx_entries_open 의 조건과 같은 상수여야 그 인덱스를 씀
+
+def restore_open_jobs(processed_jobs, computer_name, db_path=None):
+    # 시작할 때: 엔진이 꺼져 있던 사이 끝났을 수 있는 이 PC 의 PRINTING 기록 -> {프린터명: PrinterJobs}
+    # 중복 집합에도 넣어 두므로 아직 큐에 있으면 다시 기록하지 않고 이어서 추적하고,
+    # 첫 조회 때 큐에 없으면 그 사이 끝난 것으로 마무리 (process_jobs)
+    conn = sqlite3.connect(db_path or DB_PATH)
+    try:
+        status, computer = [conn.execute(f"SELECT id FROM {table} WHERE name = ?", (name,)).fetchone()
+                            for table, name in (("statuses", "PRINTING"), ("computers", computer_name))]
+        rows = conn.execute(OPEN_JOBS_SQL.format(status_id=int(status[0])), computer).fetchall() if status and computer else []
+    finally:
+        conn.close()
+    snapshots = {}
+    for printer_name, job_id, submitted, pages, document in rows:
+        processed_jobs.add((printer_name, job_id, submitted))
+        tracked = TrackedJob(submitted)
+        tracked.total = tracked.printed = tracked.logged_pages = pages or 0
+        tracked.status, tracked.logged, tracked.document = 0, True, document
+        snapshots.setdefault(printer_name, PrinterJobs()).restored[(job_id, submitted)] = tracked
+    if rows: print(f"[엔진] 지난 실행에서 끝나지 않은 작업 {len(rows)}건 이어서 확인")
+    return snapshots
+
+def finish_job(printer_name, job_id, tracked, writer, computer_name):
+    # 끝난 작업의 기록을 고침: 인쇄 완료는 전체 쪽수, 취소 / 오류는 실제로 찍힌 쪽수만 (비용은 기록기가 단가로 다시 계산)
+    tracked.final = True
+    status = final_status(tracked.status or 0)
+    total, printed = tracked.total or 0, tracked.printed or 0
+    pages = max(total, printed) if status == "PRINTED" else min(printed, total or printed)
+    writer.submit_update(JobUpdate(printer_name, job_id, submitted_text(tracked.submitted), computer_name, pages, status))
+    JOBS_FINISHED.inc(status)
+    if status != "PRINTED" or pages != tracked.logged_pages:
+        print(f"[종료] {tracked.document} | {FINAL_STATUS_LABELS[status]} {pages}장 (처음 기록 {tracked.logged_pages}장)")
+
+def save_open_jobs(snapshots, writer, computer_name):
+    # 종료할 때: 아직 끝나지 않은 작업의 지금 쪽수를 PRINTING 그대로 기록
+    # (다음 실행이 첫 조회에서 큐에 없는 것을 보면 이 값으로 마무리 - restore_open_jobs)
+    # 오류 / 삭제 중 표시가 있는 작업은 그 사이 사라질 때의 최종 상태로 미리 기록 (다음 실행은 Status 를 모르므로).
+    # 다시 시작한 뒤에도 큐에 있으면 새 작업처럼 보이지만 INSERT 는 중복으로 걸러지고, 끝날 때 같은 키로 다시 고침
+    for printer_name, snapshot in snapshots.items():
+        for job_id, tracked in snapshot.jobs.items():
+            if not tracked.logged or tracked.final: continue
+            if (tracked.status or 0) & (JOB_STATUS_ERROR | JOB_STATUS_DELETING):
+                finish_job(printer_name, job_id, tracked, writer, computer_name)
+                continue
+            pages = max(tracked.total or 0, tracked.printed or 0)
+            if pages != tracked.logged_pages:
+                writer.submit_update(JobUpdate(printer_name, job_id, submitted_text(tracked.submitted), computer_name, pages, "PRINTING"))
+
+def hold_job(printer_name, job, unique_id, quotas, pause):
+    # 한도를 넘은 사용자 / PC 의 새 작업. True 면 멈춰 있으므로 아직 기록하지 않음
+    # (관리자가 재개하거나 정지에 실패하면 False: 평소처럼 기록)
+    if job.get('Status', 0) & JOB_STATUS_PAUSED: return True
+    if unique_id in quotas.paused: return False
+    quotas.paused.add(unique_id)
+    try:
+        pause(printer_name, job['JobId'])
+    except Exception as e:
+        PRINTER_ERRORS.inc(printer_name, "pause")
+        print(f"[한도] {printer_name} 작업 일시 정지 실패: {e}")
+        return False
+    QUOTA_PAUSED.inc(printer_name)
+    print(f"[한도] {job.get('pUserName', 'Guest')} 작업 일시 정지: {job.get('pDocument', 'Unknown Document')} ({printer_name})")
+    return True
+
+def process_jobs(printer_name, jobs, writer, processed_jobs, computer_name, quotas=None, pause=None, snapshot=None):
+    # 한 프린터의 큐 내용 중 처음 보는 작업을 기록기로 넘기고 그 수를 돌려준다.
+    # quotas(QuotaTracker) 와 pause(프린터명, JobId) 를 주면 한도를 넘은 사용자 / PC 의 새 작업은 일시 정지
+    # snapshot(PrinterJobs) 을 주면 지난 조회와 비교해서 바뀐 작업만 다시 보고, 끝났거나 큐에서 사라진 작업은
+    # 최종 쪽수 / 상태(PRINTED / DELETED / ERROR)로 기록을 고친다. 그대로인 작업은 dict 조회 한 번과 값 비교 세 번
+    detected = 0
+    if snapshot is not None:
+        entries = snapshot.jobs
+        snapshot.cycle = cycle = snapshot.cycle + 1
+        present = 0
+    for job in jobs:
+        if snapshot is not None:
+            job_id = job['JobId']
+            tracked = entries.get(job_id)
+            if tracked is not None and tracked.submitted != job.get('Submitted'):
+                # 조회 사이에 끝난 작업의 JobId 를 새 작업이 다시 씀
+                del entries[job_id]
+                if tracked.logged and not tracked.final: finish_job(printer_name, job_id, tracked, writer, computer_name)
+                tracked = None
+            if tracked is None:
+                tracked = entries[job_id] = TrackedJob(job.get('Submitted'))
+            elif tracked.cycle == cycle:
+                continue    # 페이지 경계에서 두 번 나온 작업
+            tracked.cycle = cycle
+            present += 1
+            total, printed, status = job.get('TotalPages', 0), job.get('PagesPrinted', 0), job.get('Status', 0)
+            if total == tracked.total and printed == tracked.printed and status == tracked.status: continue
+            tracked.total, tracked.printed, tracked.status = total, printed, status
+            if tracked.final: continue
+            if tracked.logged:
+                if status & JOB_STATUS_FINISHED: finish_job(printer_name, job_id, tracked, writer, computer_name)
+                continue
+
+        p_job_id = job['JobId']
+        p_submitted = job_submitted(job)
+        unique_id = (printer_name, p_job_id, p_submitted)
+
+        if processed_jobs.seen(unique_id):
+            if snapshot is not None:
+                # 큐에서 잠깐 빠졌다가 다시 보임: 기록은 그대로 두고 끝날 때 고침
+                tracked.logged, tracked.logged_pages = True, job.get('TotalPages', 0)
+                tracked.document = job.get('pDocument', 'Unknown Document')
+                if tracked.status & JOB_STATUS_FINISHED: finish_job(printer_name, p_job_id, tracked, writer, computer_name)
+            continue
+
+        p_pages = job.get('TotalPages', 0)
+        if p_pages == 0: continue
+
+        p_user = job.get('pUserName', 'Guest')
+        if pause is not None and quotas.should_pause(p_user, computer_name):
+            if hold_job(printer_name, job, unique_id, quotas, pause): continue
+        p_doc = job.get('pDocument', 'Unknown Document')
+        
+        # 컬러 감지
+        p_is_color = 0 
+        try:
+            devmode = job.get('pDevMode')
+            if devmode and getattr(devmode, 'Color', 1) == 2:
+                p_is_color = 1
+        except Exception:
+            devmode = None
+            PRINTER_ERRORS.inc(printer_name, "devmode")
+        if p_is_color == 0 and 'color' in p_doc.lower():
+            p_is_color = 1
+
+        # 용지 감지
+        p_paper_size = "A4"
+        try:
+            if devmode:
+                paper_id = getattr(devmode, 'PaperSize', 9)
+                if paper_id == 8: p_paper_size = "A3"
+                elif paper_id == 9: p_paper_size = "A4"
+                else: p_paper_size = "Etc"
+        except Exception:
+            PRINTER_ERRORS.inc(printer_name, "devmode")
+
+        # 비용 계산 (출력 시각에 유효한 요금표 버전 기준)
+        p_time = datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        unit_cost = tariff_book.unit_cost(p_time, p_paper_size, p_is_color)
+        p_cost = p_pages * unit_cost
+
+        # DB 기록은 LogWriter 스레드가 모아서 처리 (화면 갱신도 커밋 시점에). 끝날 때까지는 PRINTING
+        writer.submit((p_job_id, printer_name, computer_name, p_user, p_doc, p_pages, p_paper_size, p_is_color, unit_cost, p_cost, p_time, "PRINTING", p_submitted))
+
+        processed_jobs.add(unique_id)
+        detected += 1
+        
+        color_str = "컬러" if p_is_color else "흑백"
+        print(f"[감지] {p_doc} | {p_paper_size} {color_str} {p_pages}장 | {p_cost}원")
+        if snapshot is not None:
+            tracked.logged, tracked.logged_pages, tracked.document = True, p_pages, p_doc
+            if tracked.status & JOB_STATUS_FINISHED: finish_job(printer_name, p_job_id, tracked, writer, computer_name)
+
+    if snapshot is not None and present != len(entries):
+        # 큐에서 사라진 작업: 마지막으로 본 상태로 마무리
+        for job_id in [job_id for job_id, tracked in entries.items() if tracked.cycle != cycle]:
+            tracked = entries.pop(job_id)
+            if tracked.logged and not tracked.final: finish_job(printer_name, job_id, tracked, writer, computer_name)
+    if snapshot is not None and snapshot.restored:
+        # 시작 후 첫 조회: 지난 실행의 PRINTING 기록 중 큐에 없는 것은 꺼져 있는 동안 끝남 (마지막 기록 쪽수로)
+        queued = {(job_id, submitted_text(tracked.submitted)) for job_id, tracked in entries.items()}
+        for (job_id, submitted), tracked in snapshot.restored.items():
+            if (job_id, submitted) not in queued: finish_job(printer_name, job_id, tracked, writer, computer_name)
+        snapshot.restored = {}
+    if detected: JOBS_DETECTED.inc(printer_name, amount=detected)
+    return detected
+
+def poll_once(spooler, writer, processed_jobs, computer_name, page_size=100, quotas=None, snapshots=None):
+    # 모든 프린터 큐를 순서대로 한 바퀴 훑고 새로 감지된 작업 수를 돌려준다 (단일 스레드 경로).
+    # snapshots: {프린터명: PrinterJobs} 를 호출마다 같은 dict 로 넘기면 작업이 끝날 때 최종 쪽수 / 상태로 고침
+    detected = 0
+    for printer_name in spooler.enum_printers():
+        phandle = None
+        try:
+            started = time.perf_counter()
+            phandle = spooler.open_printer(printer_name)
+            jobs = fetch_all_jobs(spooler, phandle, page_size)
+            ENUM_JOBS_SECONDS.observe(time.perf_counter() - started, printer_name)
+            snapshot = snapshots.setdefault(printer_name, PrinterJobs()) if snapshots is not None else None
+            detected += process_jobs(printer_name, jobs, writer, processed_jobs, computer_name,
+                                     quotas, spooler.pause_job if quotas is not None else None, snapshot)
+        except Exception as e:
+            PRINTER_ERRORS.inc(printer_name, "enum")
+            print(f"[엔진] {printer_name} 조회 실패: {e}")
+        finally:
+            if phandle: spooler.close_printer(phandle)
+    processed_jobs.expire()
+    return detected
+
+
+class PrinterState:
+    # 프린터별 폴링 상태 (열린 핸들은 다음 주기에도 재사용)
+    def __init__(self, name, now, interval):
+        self.name = name
+        self.handle = None
+        self.interval = interval
+        self.next_poll = now
+        self.future = None          # 조회 중이면 Future
+        self.started = 0.0
+        self.failures = 0
+        self.timed_out = False
+        self.removed = False
+        self.jobs = PrinterJobs()   # 지난 조회 결과 (작업이 끝났는지 비교용)
+
+
+class PrinterPoller:
+    # 프린터 큐 조회(EnumJobs)를 스레드 풀로 나눠 돌리는 감시 엔진.
+    # - 큐에 작업이 있으면 active_interval 로 자주, 비어 있으면 idle_max_interval 까지,
+    #   연결이 안 되면 max_interval 까지 점점 느리게
+    # - 한 프린터 조회가 timeout 초를 넘기면 그 프린터만 뒤로 미루고 나머지는 계속 진행
+    # 조회 결과 처리(중복 확인, 비용 계산, 기록기 전달)는 이 루프 스레드에서만 한다.
+    def __init__(self, spooler, writer, computer_name, workers=8, timeout=5.0,
+                 active_interval=0.5, idle_interval=1.0, idle_max_interval=2.0, max_interval=30.0,
+                 refresh_interval=60.0, page_size=100, quotas=None, tariffs_interval=30.0, clock=time.monotonic):
+        self.spooler = spooler
+        self.writer = writer
+        self.computer_name = computer_name
+        self.timeout = timeout
+        self.active_interval = active_interval
+        self.idle_interval = idle_interval
+        self.idle_max_interval = idle_max_interval
+        self.max_interval = max_interval
+        self.refresh_interval = refresh_interval
+        self.tariffs_interval = tariffs_interval   # 요금표를 다시 읽는 간격 (한도 설정과 같은 30초)
+        self.page_size = page_size
+        self.quotas = quotas            # QuotaTracker (없으면 한도 확인 안 함)
+        self.pause = spooler.pause_job if quotas is not None else None
+        self.clock = clock
+        self.pool = concurrent.futures.ThreadPoolExecutor(max_workers=workers, thread_name_prefix="PrinterPoll")
+        self.processed_jobs = JobDedup()
+        DEDUP_ENTRIES.fn = self.processed_jobs.__len__
+        self.states = {}
+        self.next_refresh = 0.0
+        self.next_tariffs = clock() + tariffs_interval  # 시작할 때는 init_db 가 읽어 둠
+        self.restored = {}              # 프린터명 -> PrinterJobs (run 시작 때 restore_open_jobs, 그 프린터를 처음 볼 때 넘겨줌)
+        self.polls = 0
+        self.detected = 0
+
+    def refresh_printers(self, now):
+        started = time.perf_counter()
+        names = set(self.spooler.enum_printers())
+        ENUM_PRINTERS_SECONDS.observe(time.perf_counter() - started)
+        for name in names - self.states.keys():
+            self.states[name] = PrinterState(name, now, self.idle_interval)
+            if name in self.restored: self.states[name].jobs = self.restored.pop(name)
+        if self.restored:
+            # 지난 실행 뒤 없어진 프린터의 PRINTING 기록: 큐를 볼 수 없으므로 마지막 기록 그대로 마무리
+            for name, snapshot in self.restored.items():
+                for (job_id, _), tracked in snapshot.restored.items():
+                    finish_job(name, job_id, tracked, self.writer, self.computer_name)
+            self.restored = {}
+        for name in self.states.keys() - names:
+            state = self.states.pop(name)
+            state.removed = True
+            if state.future is None: self._close(state)
+        self.next_refresh = now + self.refresh_interval
+
+    def _close(self, state):
+        if state.handle is None: return
+        try: self.spooler.close_printer(state.handle)
+        except Exception as e:
+            PRINTER_ERRORS.inc(state.name, "close")
+            print(f"[엔진] {state.name} 핸들 닫기 실패: {e}")
+        state.handle = None
+
+    def _fetch(self, state):
+        # 워커 스레드: 핸들이 없을 때만 새로 연다 (걸린 시간은 실패해도 기록)
+        started = time.perf_counter()
+        try:
+            if state.handle is None:
+                state.handle = self.spooler.open_printer(state.name)
+            return fetch_all_jobs(self.spooler, state.handle, self.page_size)
+        finally:
+            ENUM_JOBS_SECONDS.observe(time.perf_counter() - started, state.name)
+
+    def _finish(self, state, future, now):
+        state.future = None
+        try:
+            jobs = future.result()
+        except Exception as e:
+            # 연결 실패/오류: 핸들을 버리고 간격을 늘려서 재시도
+            state.failures += 1
+            PRINTER_ERRORS.inc(state.name, "enum")
+            self._close(state)
+            state.interval = min(max(state.interval * 2, self.idle_interval), self.max_interval)
+            if state.failures == 1:
+                print(f"[엔진] {state.name} 조회 실패: {e}")
+        else:
+            if state.failures: print(f"[엔진] {state.name} 연결 복구")
+            state.failures = 0
+            if state.timed_out:
+                # 늦게라도 응답했으면 결과는 쓰되 간격은 늘린 그대로 유지
+                state.timed_out = False
+            elif jobs:
+                state.interval = self.active_interval
+            else:
+                state.interval = min(max(state.interval * 2, self.idle_interval), self.idle_max_interval)
+            self.polls += 1
+            self.detected += process_jobs(state.name, jobs, self.writer, self.processed_jobs, self.computer_name,
+                                          self.quotas, self.pause, state.jobs)
+
+        if state.removed:
+            self._close(state)
+        state.next_poll = now + state.interval
+
+    def run_once(self, wait=0.2):
+        started = time.perf_counter()
+        now = self.clock()
+        if now >= self.next_refresh:
+            self.refresh_printers(now)
+        if now >= self.next_tariffs:
+            self.next_tariffs = now + self.tariffs_interval
+            try:
+                if reload_tariffs(): print("[엔진] 새 요금표 반영")
+            except sqlite3.Error as e:
+                print(f"[엔진] 요금표 읽기 실패: {e}")
+        if self.quotas is not None:
+            self.quotas.maybe_reload()
+
+        # 차례가 된 프린터 조회 시작 (조회 중인 프린터는 건너뜀)
+        for state in self.states.values():
+            if state.future is None and state.next_poll <= now:
+                state.started = now
+                state.future = self.pool.submit(self._fetch, state)
+
+        # 조회 중인 것이 끝나거나 다음 프린터 차례가 올 때까지 대기
+        inflight = {state.future: state for state in self.states.values() if state.future is not None}
+        next_due = min((st.next_poll for st in self.states.values() if st.future is None), default=now + wait)
+        wait = min(max(next_due - now, 0.001), wait)
+        busy = time.perf_counter() - started
+        if inflight:
+            done, _ = concurrent.futures.wait(inflight, timeout=wait, return_when=concurrent.futures.FIRST_COMPLETED)
+        else:
+            done = set()
+            time.sleep(wait)
+
+        started = time.perf_counter()
+        now = self.clock()
+        for future in done:
+            self._finish(inflight[future], future, now)
+
+        # 응답이 없는 프린터: 다음 차례를 늦춘다 (조회는 끝날 때까지 다시 보내지 않음)
+        for future, state in inflight.items():
+            if future in done or state.timed_out: continue
+            if now - state.started > self.timeout:
+                state.timed_out = True
+                PRINTER_ERRORS.inc(state.name, "timeout")
+                state.interval = min(max(state.interval * 2, self.idle_interval), self.max_interval)
+                print(f"[엔진] {state.name} 응답 지연 ({self.timeout:.0f}초 초과)")
+
+        self.processed_jobs.expire()
+        POLL_CYCLE_SECONDS.observe(busy + time.perf_counter() - started)
+
+    def run(self, stop_event):
+        try:
+            self.restored = restore_open_jobs(self.processed_jobs, self.computer_name)
+        except sqlite3.Error as e:
+            print(f"[엔진] 지난 실행의 진행 중 작업을 읽을 수 없음: {e}")
+        while not stop_event.is_set():
+            try:
+                self.run_once()
+            except Exception as e:
+                ENGINE_ERRORS.inc()
+                print(f"[에러] {e}")
+                stop_event.wait(5)
+        self.shutdown()
+
+    def shutdown(self):
+        self.pool.shutdown(wait=False, cancel_futures=True)
+        for state in self.states.values():
+            if state.future is None: self._close(state)
+        save_open_jobs({state.name: state.jobs for state in self.states.values()}, self.writer, self.computer_name)
+
+def monitor_loop(writer, stop_event=None, spooler=None, poll_interval=1.0, **poller_options):
+    stop_event = stop_event or threading.Event()
+    spooler = spooler or Win32Spooler()
+    print("[엔진] 감시 시작... (A3/A4, 컬러/흑백 구분)")
+
+    poller_options.setdefault("active_interval", poll_interval / 2)
+    poller_options.setdefault("idle_interval", poll_interval)
+    poller_options.setdefault("idle_max_interval", poll_interval * 2)
+    poller = PrinterPoller(spooler, writer, platform.node(), **poller_options)
+    poller.run(stop_event)
+
+def stop_monitor(stop_event, monitor_thread, writer, timeout=5.0):
+    # 창 내부 감시(다른 스레드의 monitor_loop) 종료: 감시 스레드가 끝날 때까지 기다린 뒤 기록기를 멈춤
+    # (감시 스레드는 끝나면서 진행 중 작업의 쪽수를 save_open_jobs 로 넘기는데, 기록기를 먼저 멈추면 종료 신호 뒤에 들어가서 버려짐)
+    stop_event.set()
+    monitor_thread.join(timeout)
+    if monitor_thread.is_alive():
+        print(f"[종료] 감시 스레드가 {timeout:g}초 안에 끝나지 않음 (진행 중 작업은 다음 실행 때 마무리)")
+    writer.stop(timeout)
+
+# =========================================================
+# 4-1. 화면용 백그라운드 조회
+# =========================================================
+class QueryExecutor:
+    # GUI 의 DB 조회를 전용 스레드(읽기 전용 연결)에서 실행하고, 결과는 Tk after() 로 메인 스레드에 전달.
+    # - channel 마다 최신 요청만 유효: 새 요청이 오면 이전 요청은 건너뛰거나(대기 중) 중단(interrupt)하고 결과도 버림
+    # - cache_key 를 준 결과(지난 기간처럼 바뀌지 않는 조회)는 보관했다가 바로 돌려줌
+    def __init__(self, root, db_path=None, poll_ms=30):
+        self.root = root
+        self.db_path = db_path or DB_PATH
+        self.poll_ms = poll_ms
+        self.requests = queue.Queue()
+        self.results = queue.Queue()
+        self.generations = {}
+        self.cache = {}
+        self.running = None
+        self.conn = None
+        self.thread = threading.Thread(target=self._run, name="QueryExecutor", daemon=True)
+        self.thread.start()
+        self.root.after(self.poll_ms, self._poll)
+
+    def submit(self, channel, fn, args, callback, cache_key=None):
+        generation = self.generations.get(channel, 0) + 1
+        self.generations[channel] = generation
+        if cache_key is not None and cache_key in self.cache:
+            callback(self.cache[cache_key])
+            return
+        running = self.running
+        if running and running[0] == channel and self.conn is not None:
+            self.conn.interrupt()
+        self.requests.put((channel, generation, fn, args, callback, cache_key))
+
+    def cancel(self, channel):
+        self.generations[channel] = self.generations.get(channel, 0) + 1
+
+    def invalidate(self, day=None):
+        # day 가 들어간 기간의 캐시만 (None 이면 전부) 버림. cache_key 는 (이름, 시작일, 종료일)
+        if day is None:
+            self.cache.clear()
+            return
+        for key in [k for k in self.cache if k[1] <= day <= k[2]]:
+            del self.cache[key]
+
+    def stop(self):
+        self.requests.put(None)
+
+    def _run(self):
+        self.conn = sqlite3.connect(self.db_path, check_same_thread=False)
+        self.conn.execute("PRAGMA query_only = ON")
+        try:
+            while True:
+                request = self.requests.get()
+                if request is None: break
+                channel, generation, fn, args, callback, cache_key = request
+                if generation != self.generations.get(channel): continue   # 이미 새 요청이 들어옴
+                self.running = (channel, generation)
+                try:
+                    result = fn(*args, conn=self.conn)
+                except sqlite3.OperationalError as e:
+                    if self.conn.in_transaction: self.conn.rollback()
+                    if "interrupted" in str(e):
+                        # 새 요청 때문에 중단된 것이 아니면 (경합) 다시 실행
+                        if generation == self.generations.get(channel): self.requests.put(request)
+                        continue
+                    result = e
+                except Exception as e:
+                    result = e
+                finally:
+                    self.running = None
+                self.results.put((channel, generation, callback, cache_key, result))
+        finally:
+            self.conn.close()
+
+    def _poll(self):
+        while True:
+            try:
+                channel, generation, callback, cache_key, result = self.results.get_nowait()
+            except queue.Empty:
+                break
+            if generation != self.generations.get(channel): continue   # 오래된 결과
+            if isinstance(result, Exception):
+                print(f"[에러] 조회 실패: {result}")
+                continue
+            if cache_key is not None:
+                self.cache[cache_key] = result
+            callback(result)
+        try:
+            self.root.after(self.poll_ms, self._poll)
+        except Exception:
+            pass    # 창이 닫힘
+
+def dashboard_snapshot(start_date, end_date, conn):
+    # 대시보드 집계와 그 시점의 마지막 로그 id 를 같은 읽기 트랜잭션에서 가져옴
+    # (조회 중에 들어온 새 로그를 나중에 델타로 정확히 더하기 위해)
+    conn.execute("BEGIN")
+    try:
+        last_id = conn.execute("SELECT IFNULL(MAX(id), 0) FROM log_entries").fetchone()[0]
+        stats = query_dashboard_stats(start_date, end_date, conn)
+    except Exception:
+        conn.rollback()
+        raise
+    conn.commit()
+    return last_id, stats
+
+# =========================================================
+# 4-2. 헤드리스 서비스 (Tk 없이 감시 엔진만 실행)
+# =========================================================
+SHUTDOWN_SIGNALS = ("SIGINT", "SIGTERM", "SIGBREAK")   # SIGBREAK: 윈도우 콘솔 Ctrl+Break / 창 닫기
+
+def install_shutdown_handlers(stop_event):
+    # 신호가 오면 stop_event 만 세움 -> 감시 루프가 빠져나오고 기록기가 큐를 비운 뒤 종료
+    def handler(signum, frame):
+        if not stop_event.is_set():
+            print(f"[시스템] 종료 신호({signal.Signals(signum).name}) 수신, 정리 중...")
+        stop_event.set()
+    previous = {}
+    for name in SHUTDOWN_SIGNALS:
+        signum = getattr(signal, name, None)
+        if signum is None: continue
+        try:
+            previous[signum] = signal.signal(signum, handler)
+        except (ValueError, OSError):
+            pass    # 메인 스레드가 아니거나 지원하지 않는 신호
+    return previous
+
+def run_headless(spooler=None, duration=None, stop_event=None, serve_events=True, port=None, collector=None,
+                 collector_token=None, metrics_port=None, **poller_options):
+    # 서비스/작업 스케줄러용: init_db + 기록기 + 감시 엔진. 종료 시 남은 로그까지 커밋 후 반환
+    # serve_events: 커밋된 로그를 화면 프로세스(0~N개)에 전달하는 이벤트 채널도 연다
+    # collector: 중앙 수집 서버 주소 (http://host:port). 지정하면 커밋된 로그를 그곳으로도 올림 (collector_token: 공유 토큰)
+    # metrics_port: 지정하면 127.0.0.1 에 /metrics (Prometheus) 와 프로파일러 제어 엔드포인트를 연다
+    server = None
+    if serve_events:
+        try:
+            server = EventServer(port=ENGINE_PORT if port is None else port)   # 0: 빈 포트 아무거나
+        except OSError as e:
+            print(f"[에러] 이벤트 채널을 열 수 없음 (엔진이 이미 실행 중?): {e}")
+            return 0
+    stop_event = stop_event or threading.Event()
+    previous = install_shutdown_handlers(stop_event)
+    uploader = Uploader(collector, collector_token) if collector else None
+    quotas = QuotaTracker()     # 이번 달 사용자 / PC 별 사용량 (한도를 넘으면 새 작업을 일시 정지할 수 있게)
+    quotas.reseed()
+
+    def on_commit(rows):
+        quotas.record(rows)
+        if server: server.publish(rows)
+        if uploader: uploader.notify()
+
+    def on_update(rows):
+        # 끝난 작업의 최종 쪽수 / 상태 (수집 서버로는 upload_updates 표시를 따라 다시 올라감)
+        quotas.update(rows)
+        if server: server.publish(rows, "updates")
+        if uploader: uploader.notify()
+    writer = LogWriter(on_commit=on_commit, on_update=on_update)
+    writer.start()
+    if uploader: uploader.start()
+    metrics = start_diagnostics(metrics_port)
+    archiver = Archiver()      # 보관 기간이 지난 달을 백그라운드에서 조금씩 월별 보관 DB 로
+    archiver.start()
+    if duration is not None:
+        timer = threading.Timer(duration, stop_event.set)
+        timer.daemon = True
+        timer.start()
+    try:
+        monitor_loop(writer, stop_event, spooler, quotas=quotas, **poller_options)
+    finally:
+        stop_event.set()
+        archiver.stop()
+        writer.stop()
+        if server: server.close()
+        if metrics: metrics.close()
+        if uploader: uploader.stop(timeout=uploader.timeout)   # 마지막으로 한 번 더 올려 봄 (못 올린 건 다음 실행 때)
+        for signum, old in previous.items():
+            signal.signal(signum, old)
+        print(f"[시스템] 감시 종료. 기록 {writer.committed:,}건 (중복 {writer.duplicates:,}건, 끝난 작업 고침 {writer.updated:,}건)")
+    return writer.committed
+
+# =========================================================
+# 4-3. 엔진 <-> 화면 이벤트 채널 (로컬 TCP, 한 줄에 JSON 하나)
+# =========================================================
+ENGINE_HOST = "127.0.0.1"
+ENGINE_PORT = 47651
+
+def encode_event(kind, **fields):
+    return (json.dumps({"type": kind, **fields}, ensure_ascii=False) + "\n").encode("utf-8")
+
+class EventServer:
+    # 엔진 프로세스 쪽: 커밋된 로그를 접속한 화면마다 전달. 화면이 없어도 엔진은 그대로 기록
+    # - 화면마다 전송 큐/스레드를 따로 둬서 느린 화면이 기록기를 막지 않음
+    # - 큐가 넘치면 그 화면은 끊음 -> 화면이 다시 접속하면서 DB 에서 다시 읽음
+    def __init__(self, host=ENGINE_HOST, port=ENGINE_PORT, max_pending=1000, db_path=None):
+        self.db_path = db_path or DB_PATH
+        self.max_pending = max_pending
+        self.sock = socket.create_server((host, port))   # 포트를 이미 쓰고 있으면 OSError (엔진 중복 실행 방지)
+        self.port = self.sock.getsockname()[1]
+        self.clients = {}
+        self.lock = threading.Lock()
+        self.published = 0
+        self.dropped = 0
+        threading.Thread(target=self._accept, name="EventServer", daemon=True).start()
+
+    def publish(self, rows, kind="logs"):
+        # 기록 스레드에서 호출 (kind: "logs" 새 로그 / "updates" 작업이 끝나서 고친 로그)
+        message = encode_event(kind, rows=rows)
+        with self.lock:
+            clients = list(self.clients.items())
+        for conn, outbox in clients:
+            try:
+                outbox.put_nowait(message)
+            except queue.Full:
+                self.dropped += 1
+                self._drop(conn)
+        if kind == "logs": self.published += len(rows)
+
+    def viewers(self):
+        with self.lock:
+            return len(self.clients)
+
+    def close(self):
+        self.sock.close()
+        with self.lock:
+            clients = list(self.clients)
+        for conn in clients:
+            self._drop(conn)
+
+    def _accept(self):
+        while True:
+            try:
+                conn, addr = self.sock.accept()
+            except OSError:
+                return  # 서버 종료
+            outbox = queue.Queue(self.max_pending)
+            with self.lock:
+                self.clients[conn] = outbox
+            threading.Thread(target=self._send, args=(conn, outbox), name="EventClient", daemon=True).start()
+
+    def _send(self, conn, outbox):
+        try:
+            conn.sendall(encode_event("hello", pid=os.getpid(), last_id=self._last_id()))
+            while True:
+                message = outbox.get()
+                if message is None: break
+                conn.sendall(message)
+        except OSError:
+            pass    # 화면이 닫힘
+        finally:
+            self._drop(conn)
+
+    def _drop(self, conn):
+        with self.lock:
+            outbox = self.clients.pop(conn, None)
+        if outbox is None: return
+        try:
+            outbox.put_nowait(None)
+        except queue.Full:
+            pass
+        try:
+            conn.shutdown(socket.SHUT_RDWR)
+        except OSError:
+            pass
+        conn.close()
+
+    def _last_id(self):
+        conn = sqlite3.connect(self.db_path)
+        try:
+            return conn.execute("SELECT IFNULL(MAX(id), 0) FROM log_entries").fetchone()[0]
+        finally:
+            conn.close()
+
+class EventSubscriber(threading.Thread):
+    # 화면 프로세스 쪽: 엔진에 접속해 새 로그를 받음. 엔진이 꺼지거나 재시작하면 계속 다시 접속
+    # on_rows(rows) / on_state(connected, hello) / on_updates(rows) 는 이 스레드에서 호출됨
+    def __init__(self, on_rows, on_state=None, host=ENGINE_HOST, port=ENGINE_PORT, retry_interval=1.0, on_updates=None):
+        super().__init__(name="EventSubscriber", daemon=True)
+        self.on_rows = on_rows
+        self.on_state = on_state
+        self.on_updates = on_updates
+        self.address = (host, port)
+        self.retry_interval = retry_interval
+        self.stop_event = threading.Event()
+        self.sock = None
+        self.connected = False
+
+    def stop(self):
+        self.stop_event.set()
+        sock = self.sock
+        if sock is not None:
+            try:
+                sock.shutdown(socket.SHUT_RDWR)
+            except OSError:
+                pass
+
+    def run(self):
+        while not self.stop_event.is_set():
+            try:
+                self.sock = socket.create_connection(self.address, timeout=self.retry_interval)
+                self.sock.settimeout(None)
+                with self.sock, self.sock.makefile("r", encoding="utf-8") as stream:
+                    for line in stream:
+                        event = json.loads(line)
+                        if event["type"] == "hello":
+                            self._set_state(True, event)
+                        elif event["type"] == "logs" and self.on_rows:
+                            self.on_rows(event["rows"])
+                        elif event["type"] == "updates" and self.on_updates:
+                            self.on_updates(event["rows"])
+            except (OSError, ValueError):
+                pass    # 엔진이 아직 없거나 연결이 끊김
+            finally:
+                self.sock = None
+            if self.connected:
+                self._set_state(False, None)
+            self.stop_event.wait(self.retry_interval)
+
+    def _set_state(self, connected, hello):
+        self.connected = connected
+        if self.on_state and not self.stop_event.is_set():
+            self.on_state(connected, hello)
+
+def engine_running(host=ENGINE_HOST, port=ENGINE_PORT, timeout=0.5):
+    try:
+        socket.create_connection((host, port), timeout=timeout).close()
+        return True
+    except OSError:
+        return False
+
+ENGINE_LOG_MAX_BYTES = 1024 * 1024
+ENGINE_LOG_BACKUPS = 3
+
+def engine_log_path():
+    # 창이 띄운 엔진 프로세스의 출력 파일 (DB 옆 engine.log, 이전 것은 engine.log.1 ~ .3)
+    return os.path.join(os.path.dirname(os.path.abspath(DB_PATH)), "engine.log")
+
+class RotatingLog:
+    # print 출력을 받는 파일 (sys.stdout / sys.stderr 대신). 줄마다 시각을 붙이고
+    # max_bytes 를 넘으면 path.1, path.2 ... 로 밀어내고 새로 씀 (backups 개까지 보관)
+    def __init__(self, path, max_bytes=ENGINE_LOG_MAX_BYTES, backups=ENGINE_LOG_BACKUPS):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.backups = backups
+        self.lock = threading.Lock()
+        self.line_start = True
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self.file = open(path, "a", encoding="utf-8", buffering=1)
+
+    def write(self, text):
+        with self.lock:
+            stamp = time.strftime("%Y-%m-%d %H:%M:%S ")
+            parts = []
+            for i, line in enumerate(text.split("\n")):
+                if i: parts.append("\n")
+                if line and (i or self.line_start): parts.append(stamp)     # 새 줄의 시작
+                parts.append(line)
+            if text: self.line_start = text.endswith("\n")
+            self.file.write("".join(parts))
+            if self.line_start and self.file.tell() >= self.max_bytes:
+                self._rotate()
+        return len(text)
+
+    def _rotate(self):
+        self.file.close()
+        try:
+            for i in range(self.backups - 1, 0, -1):
+                if os.path.exists(f"{self.path}.{i}"):
+                    os.replace(f"{self.path}.{i}", f"{self.path}.{i + 1}")
+            os.replace(self.path, f"{self.path}.1")
+        except OSError:
+            pass    # 다른 프로그램이 열고 있으면(윈도우) 이번에는 이어서 씀
+        self.file = open(self.path, "a", encoding="utf-8", buffering=1)
+
+    def flush(self):
+        with self.lock:
+            self.file.flush()
+
+    def isatty(self):
+        return False
+
+def redirect_output(path):
+    # 이 프로세스의 print / 오류 출력을 path 로 (창이 띄운 엔진은 콘솔이 없음)
+    sys.stdout = sys.stderr = RotatingLog(path)
+    return sys.stdout
+
+def start_engine_process(port=ENGINE_PORT, metrics_port=None):
+    # 화면과 수명이 분리된 엔진 프로세스 실행 (창을 닫아도 기록은 계속됨)
+    # 콘솔이 없으므로 출력([에러] 등)은 engine_log_path() 에 남김
+    if getattr(sys, "frozen", False):
+        command = [sys.executable]     # PyInstaller 로 묶인 실행 파일
+    else:
+        command = [sys.executable, os.path.join(os.path.dirname(os.path.abspath(__file__)), "main.py")]
+    command += ["--db", DB_PATH, "--port", str(port), "--log", engine_log_path()]
+    if metrics_port is not None:
+        command += ["--metrics-port", str(metrics_port)]
+    command += ["headless"]
+    options = {"cwd": os.getcwd(), "stdin": subprocess.DEVNULL, "stdout": subprocess.DEVNULL, "stderr": subprocess.DEVNULL}
+    if platform.system() == "Windows":
+        options["creationflags"] = subprocess.DETACHED_PROCESS | subprocess.CREATE_NEW_PROCESS_GROUP
+    else:
+        options["start_new_session"] = True
+    print(f"[시스템] 감시 엔진 프로세스 시작 (포트 {port})")
+    return subprocess.Popen(command, **options)
+
+# =========================================================
+# 4-4. 중앙 수집 에이전트 (PC 별 엔진 -> 수집 서버 한 곳의 DB, 서버 쪽은 collector.py)
+# =========================================================
+COLLECTOR_PORT = 47652
+# 보내는 PC 의 logs.id 를 origin_id 로 맨 앞에 (수집 서버는 자기 id 를 새로 매기고, (PC, origin_id) 로 중복을 거름)
+UPLOAD_COLUMNS = ("origin_id", *LOG_COLUMNS[1:])
+LEGACY_UPLOAD_COLUMNS = LOG_COLUMNS[1:]     # origin_id 를 보내지 않던 에이전트 (ux_entries_job 으로만 중복 확인)
+COLLECTOR_TOKEN_HEADER = "X-Printmon-Token"   # 수집 서버가 받는 공유 토큰 (없거나 다르면 401)
+
+class Uploader(threading.Thread):
+    # 에이전트: 로컬 DB 가 곧 버퍼. 수집 서버가 받았다고 응답한 id 까지만 upload_state 에 기록하고
+    # 연결이 안 되면 간격을 늘려 가며 재시도. 재전송된 행은 수집 서버가 (PC, origin_id) 로 걸러냄 (멱등)
+    # 올린 뒤에 고친 행(upload_updates 표시: 끝난 작업의 최종 쪽수 / 상태, 단가 재계산)은 같은 방식으로 다시 올리고
+    # 수집 서버는 같은 origin_id 의 행을 그 값으로 고침
+    def __init__(self, url, token, db_path=None, batch_size=500, interval=2.0, max_backoff=60.0, timeout=10.0):
+        super().__init__(name="Uploader", daemon=True)
+        self.url = url.rstrip("/") + "/ingest"
+        self.token = token
+        self.db_path = db_path or DB_PATH
+        self.batch_size = batch_size
+        self.interval = interval
+        self.max_backoff = max_backoff
+        self.timeout = timeout
+        self.wake = threading.Event()
+        self.stop_event = threading.Event()
+        self.sent = 0
+        self.updated = 0
+        self.duplicates = 0
+        self.requests = 0
+        self.bytes_raw = 0
+        self.bytes_sent = 0
+        self.failures = 0
+
+    def pending(self, conn=None):
+        # 아직 수집 서버에 올리지 못한 로그 건수 (로컬 보관 중)
+        own = conn is None
+        conn = conn or sqlite3.connect(self.db_path)
+        try:
+            row = conn.execute("SELECT last_id FROM upload_state WHERE collector=?", (self.url,)).fetchone()
+            last_id = row[0] if row else 0
+            changed = conn.execute("SELECT COUNT(DISTINCT entry_id) FROM upload_updates WHERE collector = ? AND entry_id <= ?",
+                                   (self.url, last_id)).fetchone()[0]
+            return changed + conn.execute("SELECT COUNT(*) FROM log_entries WHERE id > ?", (last_id,)).fetchone()[0]
+        finally:
+            if own: conn.close()
+
+    def notify(self, rows=None):
+        # 기록기 on_commit 에 연결: 새 로그가 커밋되면 기다리지 않고 바로 올림
+        self.wake.set()
+
+    def stop(self, timeout=None):
+        self.stop_event.set()
+        self.wake.set()
+        self.join(timeout)
+
+    def run(self):
+        conn = sqlite3.connect(self.db_path)
+        backoff = self.interval
+        try:
+            while True:
+                try:
+                    full = self.upload_once(conn)
+                except (OSError, ValueError) as e:   # URLError / 연결 거부 / 잘못된 응답
+                    if not self.failures:
+                        print(f"[에러] 수집 서버 전송 실패, 로컬에 보관 후 재시도: {e}")
+                    self.failures += 1
+                    backoff = min(backoff * 2, self.max_backoff)
+                else:
+                    if self.failures: print("[시스템] 수집 서버 전송 재개")
+                    self.failures = 0
+                    backoff = self.interval
+                    if full and not self.stop_event.is_set(): continue   # 밀린 로그가 더 있음
+                if self.stop_event.is_set(): break
+                self.wake.wait(backoff)
+                self.wake.clear()
+        finally:
+            conn.close()
+
+    def upload_once(self, conn):
+        # 한 번에 batch_size 건: 올린 뒤 고친 행 먼저, 남는 자리에 새 행.
+        # 한 읽기 트랜잭션(같은 시점)에서 읽으므로 top 이하 표시의 변경은 보내는 값에 이미 들어 있음
+        conn.execute("BEGIN")
+        try:
+            row = conn.execute("SELECT last_id FROM upload_state WHERE collector=?", (self.url,)).fetchone()
+            last_id = row[0] if row else 0
+            top = conn.execute("SELECT IFNULL(MAX(seq), 0) FROM upload_updates WHERE collector = ?", (self.url,)).fetchone()[0]
+            marked = [r[0] for r in conn.execute(
+                "SELECT DISTINCT entry_id FROM upload_updates WHERE collector = ? AND entry_id <= ? AND seq <= ? LIMIT ?",
+                (self.url, last_id, top, self.batch_size))]
+            rows = conn.execute(f"SELECT {', '.join(LOG_COLUMNS)} FROM logs WHERE id IN ({', '.join('?' * len(marked))})",
+                                marked).fetchall() if marked else []
+            rows += conn.execute(f"SELECT {', '.join(LOG_COLUMNS)} FROM logs WHERE id > ? ORDER BY id LIMIT ?",
+                                 (last_id, self.batch_size - len(rows))).fetchall()
+        finally:
+            conn.commit()
+        if not rows and not marked: return False
+
+        raw = json.dumps({"columns": UPLOAD_COLUMNS, "rows": rows}, ensure_ascii=False).encode("utf-8")
+        body = gzip.compress(raw, compresslevel=6)
+        import urllib.request   # 수집 서버를 쓸 때만 로드 (시작 시간)
+        request = urllib.request.Request(self.url, data=body, method="POST",
+                                         headers={"Content-Type": "application/json", "Content-Encoding": "gzip",
+                                                  COLLECTOR_TOKEN_HEADER: self.token})
+        with urllib.request.urlopen(request, timeout=self.timeout) as response:
+            result = json.loads(response.read())
+
+        new_ids = [r[0] for r in rows if r[0] > last_id]
+        with conn:
+            if new_ids:
+                conn.execute("INSERT OR REPLACE INTO upload_state (collector, last_id) VALUES (?, ?)", (self.url, new_ids[-1]))
+            # 보낸 행의 표시만 지움 (보관 DB 로 옮겨져서 못 읽은 행 포함). 읽은 뒤에 또 고친 행은 top 보다 큰 표시가 남음
+            conn.executemany("DELETE FROM upload_updates WHERE collector = ? AND entry_id = ? AND seq <= ?",
+                             [(self.url, entry_id, top) for entry_id in marked + new_ids])
+        self.requests += 1
+        self.sent += result["inserted"]
+        self.updated += result.get("updated", 0)
+        self.duplicates += result["duplicates"]
+        self.bytes_raw += len(raw)
+        self.bytes_sent += len(body)
+        return len(rows) >= self.batch_size or len(marked) == self.batch_size
+
+# =========================================================
+# 4-5. 계측: 카운터 / 게이지 / 지연 히스토그램 (Prometheus 텍스트 형식, 엔드포인트는 diagnostics.py)
+# =========================================================
+METRICS_PORT = 47653
+LATENCY_BUCKETS = (0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+class Metric:
+    # 라벨 값 튜플 (만들 때 정한 labels 순서) -> 값. 감시 루프 / 워커 / 기록기 스레드가 함께 갱신하므로 잠금
+    # 라벨은 이름 대신 위치로 받음 (키워드 인자 + 정렬이 호출마다 1µs 가까이 더 듦)
+    kind = "untyped"
+
+    def __init__(self, name, help_text, labels=()):
+        self.name = name
+        self.help = help_text
+        self.labels = tuple(labels)
+        self.values = {}
+        self.lock = threading.Lock()
+
+    def samples(self):
+        # [(샘플 이름, 라벨 값 튜플, 값)]
+        with self.lock:
+            return [(self.name, key, value) for key, value in self.values.items()]
+
+class Counter(Metric):
+    kind = "counter"
+
+    def inc(self, *labels, amount=1):
+        with self.lock:
+            self.values[labels] = self.values.get(labels, 0) + amount
+
+class Gauge(Metric):
+    kind = "gauge"
+
+    def __init__(self, name, help_text, labels=(), fn=None):
+        super().__init__(name, help_text, labels)
+        self.fn = fn    # 읽을 때마다 호출해서 값을 얻음 (예: 중복 집합 크기, 대기열 길이)
+
+    def set(self, value, *labels):
+        with self.lock:
+            self.values[labels] = value
+
+    def samples(self):
+        if self.fn is None: return super().samples()
+        try:
+            return [(self.name, (), self.fn())]
+        except Exception:
+            return []   # 대상이 이미 정리됨
+
+class Histogram(Metric):
+    kind = "histogram"
+
+    def __init__(self, name, help_text, labels=(), buckets=LATENCY_BUCKETS):
+        super().__init__(name, help_text, labels)
+        self.buckets = tuple(buckets)
+
+    def observe(self, value, *labels):
+        index = bisect.bisect_left(self.buckets, value)
+        with self.lock:
+            entry = self.values.get(labels)
+            if entry is None:
+                entry = self.values[labels] = [[0] * (len(self.buckets) + 1), 0.0, 0]   # 구간별 건수, 합계, 건수
+            entry[0][index] += 1
+            entry[1] += value
+            entry[2] += 1
+
+    def samples(self):
+        with self.lock:
+            items = [(key, list(counts), total, count) for key, (counts, total, count) in self.values.items()]
+        out = []
+        for key, counts, total, count in items:
+            running = 0
+            for bound, n in zip(self.buckets + (float("inf"),), counts):
+                running += n
+                out.append((self.name + "_bucket", key + ("+Inf" if bound == float("inf") else repr(bound),), running))
+            out.append((self.name + "_sum", key, total))
+            out.append((self.name + "_count", key, count))
+        return out
+
+def escape_label(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+class MetricsRegistry:
+    def __init__(self):
+        self.metrics = []
+
+    def counter(self, name, help_text, labels=()):
+        return self._add(Counter(name, help_text, labels))
+
+    def gauge(self, name, help_text, labels=(), fn=None):
+        return self._add(Gauge(name, help_text, labels, fn))
+
+    def histogram(self, name, help_text, labels=(), buckets=LATENCY_BUCKETS):
+        return self._add(Histogram(name, help_text, labels, buckets))
+
+    def _add(self, metric):
+        self.metrics.append(metric)
+        return metric
+
+    def render(self):
+        # Prometheus 텍스트 노출 형식 (version 0.0.4)
+        lines = []
+        for metric in self.metrics:
+            lines.append(f"# HELP {metric.name} {metric.help}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            for name, values, value in metric.samples():
+                names = metric.labels + ("le",) if name.endswith("_bucket") else metric.labels
+                text = ",".join(f'{k}="{escape_label(v)}"' for k, v in zip(names, values))
+                lines.append(f"{name}{{{text}}} {value}" if text else f"{name} {value}")
+        return "\n".join(lines) + "\n"
+
+METRICS = MetricsRegistry()
+POLL_CYCLE_SECONDS = METRICS.histogram("printmon_poll_cycle_seconds", "감시 루프 한 바퀴 처리 시간 (조회 대기 제외)")
+ENUM_PRINTERS_SECONDS = METRICS.histogram("printmon_enum_printers_seconds", "EnumPrinters 소요 시간")
+ENUM_JOBS_SECONDS = METRICS.histogram("printmon_enum_jobs_seconds", "프린터별 큐 조회 (OpenPrinter + EnumJobs) 소요 시간", ("printer",))
+PRINTER_ERRORS = METRICS.counter("printmon_printer_errors_total", "프린터별 오류 (kind: enum / timeout / devmode / close / pause)", ("printer", "kind"))
+ENGINE_ERRORS = METRICS.counter("printmon_engine_errors_total", "감시 루프 자체 오류")
+JOBS_DETECTED = METRICS.counter("printmon_jobs_detected_total", "프린터별 새로 감지한 작업 수", ("printer",))
+DEDUP_ENTRIES = METRICS.gauge("printmon_dedup_entries", "중복 감지 집합 크기")
+INSERT_SECONDS = METRICS.histogram("printmon_insert_seconds", "기록기 커밋 한 번 (배치) 소요 시간")
+INSERT_ROWS = METRICS.counter("printmon_insert_rows_total", "기록 결과별 행 수 (result: inserted / duplicate / updated / error)", ("result",))
+WRITER_RETRIES = METRICS.counter("printmon_writer_retries_total", "기록기 커밋 실패 후 다시 시도한 횟수 (DB 잠김 등)")
+JOBS_FINISHED = METRICS.counter("printmon_jobs_finished_total", "최종 상태별 끝난 작업 수 (status: PRINTED / DELETED / ERROR)", ("status",))
+WRITER_QUEUE = METRICS.gauge("printmon_writer_queue_depth", "기록 대기열 길이")
+UI_APPLY_SECONDS = METRICS.histogram("printmon_ui_apply_seconds", "화면: 새 로그 반영에 쓴 메인 스레드 시간")
+QUOTA_PAUSED = METRICS.counter("printmon_quota_paused_jobs_total", "월 한도 초과로 일시 정지시킨 작업 수", ("printer",))
+QUOTA_BLOCKED = METRICS.gauge("printmon_quota_over", "이번 달 한도를 넘은 사용자 / PC 수")
+
+def start_diagnostics(port):
+    # 진단 엔드포인트 (diagnostics.py, http.server 는 켤 때만 import). port 가 None 이면 끔
+    if port is None: return None
+    import diagnostics
+    try:
+        return diagnostics.start_metrics_server(port)
+    except OSError as e:
+        print(f"[에러] 메트릭 엔드포인트를 열 수 없음 (포트 {port}): {e}")
+        return None
@@ -0,0 +1,257 @@
+import http.server
+import threading
+import urllib.request
+import collections
+import sys
+import os
+import re
+
+import core
+
+
+# =========================================================
+# 진단: 메트릭 엔드포인트 + 샘플링 프로파일러 (엔진 / 수집 서버 / 진단 화면에서 켤 때만 import)
+# - GET  /metrics        : core.METRICS 를 Prometheus 텍스트 형식으로
+# - POST /profile/start  : 프로파일러 시작 (?interval=초)
+# - POST /profile/stop   : 프로파일러 정지 후 모은 스택 (collapsed 형식, flamegraph.pl / speedscope 로 열림)
+# - GET  /profile        : 지금까지 모은 스택 (정지하지 않음)
+# 127.0.0.1 에만 열림. 인증이 없으므로 외부 주소로 바꾸지 말 것
+# =========================================================
+METRICS_HOST = "127.0.0.1"
+PROFILE_INTERVAL = 0.005
+PROFILE_MAX_DEPTH = 64
+
+class SamplingProfiler:
+    # interval 초마다 sys._current_frames() 로 모든 스레드의 스택을 찍어서 (스레드;파일:함수;...) 별로 센다.
+    # 코드에 손대지 않고 실행 중에 켜고 끌 수 있음. 대기(queue.get, wait) 중인 스레드도 그대로 찍힘 (벽시계 기준)
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.stacks = collections.Counter()
+        self.samples = 0
+        self.interval = PROFILE_INTERVAL
+        self.thread = None
+        self.stop_event = threading.Event()
+
+    @property
+    def running(self):
+        return self.thread is not None
+
+    def start(self, interval=PROFILE_INTERVAL):
+        with self.lock:
+            if self.thread is not None: return False
+            self.stacks.clear()
+            self.samples = 0
+            self.interval = max(0.001, interval)
+            self.stop_event.clear()
+            self.thread = threading.Thread(target=self._run, name="Profiler", daemon=True)
+            self.thread.start()
+        print(f"[진단] 프로파일러 시작 ({self.interval * 1000:.0f}ms 간격)")
+        return True
+
+    def stop(self):
+        with self.lock:
+            thread, self.thread = self.thread, None
+        if thread is None: return self.collapsed()
+        self.stop_event.set()
+        thread.join()
+        print(f"[진단] 프로파일러 정지 (샘플 {self.samples:,}회)")
+        return self.collapsed()
+
+    def _run(self):
+        me = threading.get_ident()
+        names = {}
+        while not self.stop_event.wait(self.interval):
+            frames = sys._current_frames()
+            if frames.keys() - names.keys():
+                names = {t.ident: t.name for t in threading.enumerate()}
+            keys = []
+            for ident, frame in frames.items():
+                if ident == me: continue
+                stack = []
+                while frame is not None and len(stack) < PROFILE_MAX_DEPTH:
+                    code = frame.f_code
+                    stack.append(f"{os.path.basename(code.co_filename)}:{code.co_name}")
+                    frame = frame.f_back
+                stack.append(names.get(ident, str(ident)))
+                keys.append(";".join(reversed(stack)))
+            del frames, frame
+            with self.lock:
+                self.stacks.update(keys)
+                self.samples += 1
+
+    def collapsed(self):
+        # "스레드;바깥 함수;...;안쪽 함수 샘플수" 한 줄에 하나
+        with self.lock:
+            return "".join(f"{stack} {count}\n" for stack, count in self.stacks.most_common())
+
+# 쉬고 있는 스레드의 맨 안쪽 프레임 (C 코드에서 기다리는 중이라 파이썬 쪽 마지막 함수가 찍힘)
+IDLE_FRAMES = {"threading.py:wait", "threading.py:_wait_for_tstate_lock", "selectors.py:select", "socket.py:accept",
+               "socket.py:readinto", "thread.py:_worker", "queue.py:get"}
+
+def top_functions(collapsed, limit=15, skip_idle=True):
+    # collapsed 텍스트 -> [(함수, 자기 자신 샘플, 포함 샘플)] 자기 자신 샘플이 많은 순 (기본은 대기 중인 스택 제외)
+    own = collections.Counter()
+    total = collections.Counter()
+    for line in collapsed.splitlines():
+        stack, _, count = line.rpartition(" ")
+        if not stack: continue
+        frames = stack.split(";")[1:]   # 맨 앞은 스레드 이름
+        if not frames or (skip_idle and frames[-1] in IDLE_FRAMES): continue
+        own[frames[-1]] += int(count)
+        for name in set(frames):
+            total[name] += int(count)
+    return [(name, n, total[name]) for name, n in own.most_common(limit)]
+
+PROFILER = SamplingProfiler()
+
+class MetricsHandler(http.server.BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def do_GET(self):
+        path, _, query = self.path.partition("?")
+        if path == "/metrics":
+            return self._reply(200, core.METRICS.render(), "text/plain; version=0.0.4; charset=utf-8")
+        if path == "/profile":
+            return self._reply(200, PROFILER.collapsed())
+        self._reply(404, "not found\n")
+
+    def do_POST(self):
+        path, _, query = self.path.partition("?")
+        if path == "/profile/start":
+            params = dict(p.partition("=")[::2] for p in query.split("&") if p)
+            try:
+                interval = float(params.get("interval") or PROFILE_INTERVAL)
+            except ValueError:
+                return self._reply(400, "bad interval\n")
+            return self._reply(200, "started\n" if PROFILER.start(interval) else "already running\n")
+        if path == "/profile/stop":
+            return self._reply(200, PROFILER.stop())
+        self._reply(404, "not found\n")
+
+    def _reply(self, status, text, content_type="text/plain; charset=utf-8"):
+        data = text.encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, format, *args):
+        pass    # 수집기가 몇 초마다 긁어 가므로 찍지 않음
+
+class MetricsServer(http.server.ThreadingHTTPServer):
+    daemon_threads = True
+
+    def close(self):
+        self.shutdown()
+        self.server_close()
+        PROFILER.stop()
+
+def start_metrics_server(port=core.METRICS_PORT, host=METRICS_HOST):
+    # 포트를 이미 쓰고 있으면 OSError
+    server = MetricsServer((host, port), MetricsHandler)
+    threading.Thread(target=server.serve_forever, args=(0.5,), name="Metrics", daemon=True).start()
+    print(f"[진단] 메트릭 엔드포인트: http://{host}:{server.server_address[1]}/metrics")
+    return server
+
+# =========================================================
+# 진단 화면 / main.py diag 쪽: 엔드포인트를 읽어서 사람이 보기 좋게
+# =========================================================
+def request(port, path, method="GET", timeout=2.0):
+    req = urllib.request.Request(f"http://{METRICS_HOST}:{port}{path}", method=method, data=b"" if method == "POST" else None)
+    with urllib.request.urlopen(req, timeout=timeout) as response:
+        return response.read().decode("utf-8")
+
+SAMPLE_RE = re.compile(r'^([A-Za-z_:][\w:]*)(?:\{(.*)\})?\s+(\S+)$')
+LABEL_RE = re.compile(r'(\w+)="((?:[^"\\]|\\.)*)"')
+
+def parse_metrics(text):
+    # Prometheus 텍스트 -> {샘플 이름: [(라벨 dict, 값)]}
+    metrics = collections.defaultdict(list)
+    for line in text.splitlines():
+        if not line or line.startswith("#"): continue
+        match = SAMPLE_RE.match(line)
+        if not match: continue
+        name, labels, value = match.groups()
+        labels = {k: re.sub(r'\\(.)', lambda m: "\n" if m.group(1) == "n" else m.group(1), v)
+                  for k, v in LABEL_RE.findall(labels or "")}
+        metrics[name].append((labels, float(value)))
+    return metrics
+
+def histograms(metrics, name, by=None):
+    # {by 라벨 값: (구간 [(상한, 누적 건수)], 합계, 건수)}
+    result = {}
+    for labels, value in metrics.get(name + "_bucket", ()):
+        key = labels.get(by, "") if by else ""
+        bound = float("inf") if labels["le"] == "+Inf" else float(labels["le"])
+        result.setdefault(key, [[], 0.0, 0])[0].append((bound, value))
+    for suffix, index in (("_sum", 1), ("_count", 2)):
+        for labels, value in metrics.get(name + suffix, ()):
+            key = labels.get(by, "") if by else ""
+            if key in result: result[key][index] = value
+    for entry in result.values():
+        entry[0].sort()
+    return result
+
+def quantile(buckets, q):
+    # histogram_quantile 과 같은 방식: q 가 걸린 구간 안에서 선형 보간 (마지막 구간이면 그 아래 상한)
+    if not buckets or buckets[-1][1] == 0: return None
+    rank = q * buckets[-1][1]
+    lower, below = 0.0, 0
+    for bound, count in buckets:
+        if count >= rank:
+            if bound == float("inf"): return lower
+            return lower + (bound - lower) * (rank - below) / max(count - below, 1)
+        lower, below = bound, count
+    return lower
+
+def counter_totals(metrics, name, by):
+    totals = collections.Counter()
+    for labels, value in metrics.get(name, ()):
+        totals[labels.get(by, "")] += value
+    return totals
+
+def format_ms(seconds):
+    return "-" if seconds is None else f"{seconds * 1000:.1f}ms"
+
+def latency_line(title, entry):
+    buckets, total, count = entry
+    mean = total / count if count else None
+    return f"{title:<16} {int(count):>9,}회   평균 {format_ms(mean):>9}   p50 {format_ms(quantile(buckets, 0.5)):>9}   p99 {format_ms(quantile(buckets, 0.99)):>9}"
+
+def format_report(metrics, printers=10):
+    # 파싱한 메트릭 -> 진단 화면 / 콘솔용 요약 텍스트
+    lines = []
+    for title, name in (("감시 루프", "printmon_poll_cycle_seconds"), ("EnumPrinters", "printmon_enum_printers_seconds"),
+                        ("기록 커밋", "printmon_insert_seconds"), ("화면 반영", "printmon_ui_apply_seconds")):
+        entry = histograms(metrics, name).get("")
+        if entry: lines.append(latency_line(title, entry))
+
+    rows = counter_totals(metrics, "printmon_insert_rows_total", "result")
+    detected = counter_totals(metrics, "printmon_jobs_detected_total", "printer")
+    gauges = {name: sum(v for _, v in metrics.get(name, ())) for name in ("printmon_dedup_entries", "printmon_writer_queue_depth")}
+    engine_errors = sum(v for _, v in metrics.get("printmon_engine_errors_total", ()))
+    retries = sum(v for _, v in metrics.get("printmon_writer_retries_total", ()))
+    if rows or detected or metrics.get("printmon_writer_queue_depth"):
+        lines.append("")
+        lines.append(f"감지 {int(sum(detected.values())):,}건 | 기록 {int(rows['inserted']):,} / 고침 {int(rows['updated']):,} / 중복 {int(rows['duplicate']):,} / 실패 {int(rows['error']):,} (재시도 {int(retries):,})"
+                     f" | 대기열 {int(gauges['printmon_writer_queue_depth']):,} | 중복 집합 {int(gauges['printmon_dedup_entries']):,} | 루프 오류 {int(engine_errors):,}")
+
+    # 프린터별: 큐 조회가 느린 순 (p99)
+    enum_jobs = histograms(metrics, "printmon_enum_jobs_seconds", by="printer")
+    errors = collections.defaultdict(collections.Counter)
+    for labels, value in metrics.get("printmon_printer_errors_total", ()):
+        errors[labels.get("printer", "")][labels.get("kind", "")] += value
+    if enum_jobs or errors:
+        lines.append("")
+        lines.append(f"프린터별 큐 조회 (느린 순 {printers}대)")
+        ranked = sorted(enum_jobs.items(), key=lambda item: quantile(item[1][0], 0.99) or 0, reverse=True)
+        for printer, entry in ranked[:printers]:
+            kinds = errors.pop(printer, {})
+            text = ", ".join(f"{kind} {int(n):,}" for kind, n in sorted(kinds.items()) if n)
+            lines.append(latency_line(printer[:16], entry) + (f"   오류: {text}" if text else ""))
+        # 위 목록에 없는데 오류가 난 프린터 (오류 많은 순)
+        for printer, kinds in sorted(errors.items(), key=lambda item: sum(item[1].values()), reverse=True)[:printers]:
+            text = ", ".join(f"{kind} {int(n):,}" for kind, n in sorted(kinds.items()) if n)
+            lines.append(f"{(printer or '(엔진)')[:16]:<16} 오류: {text}")
+    return "\n".join(lines) if lines else "(아직 수집된 값이 없음)"
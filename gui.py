@@ -0,0 +1,932 @@
+import customtkinter as ctk
+from tkinter import ttk, messagebox, filedialog
+import threading
+import sqlite3
+import time
+import datetime
+import collections
+
+import core
+
+
+# =========================================================
+# 5. GUI 애플리케이션
+# =========================================================
+ctk.set_appearance_mode("Dark")
+ctk.set_default_color_theme("blue")
+
+class App(ctk.CTk):
+    NEW_LOG_COALESCE_MS = 250   # 새 로그 알림을 모아서 한 번에 반영하는 간격
+
+    def __init__(self, spooler=None, in_process=False, port=None, metrics_port=None):
+        super().__init__()
+
+        self.title("통합 프린트 비용 관리 시스템 v2.1")
+        self.geometry("1100x750")
+
+        self.grid_columnconfigure(1, weight=1)
+        self.grid_rowconfigure(0, weight=1)
+
+        # 사이드바
+        self.sidebar_frame = ctk.CTkFrame(self, width=200, corner_radius=0)
+        self.sidebar_frame.grid(row=0, column=0, sticky="nsew")
+        self.sidebar_frame.grid_rowconfigure(6, weight=1)
+
+        self.logo_label = ctk.CTkLabel(self.sidebar_frame, text="Print Manager", font=ctk.CTkFont(size=20, weight="bold"))
+        self.logo_label.grid(row=0, column=0, padx=20, pady=(20, 10))
+
+        self.btn_dash = ctk.CTkButton(self.sidebar_frame, text="종합 대시보드", command=self.show_dashboard)
+        self.btn_dash.grid(row=1, column=0, padx=20, pady=10)
+        
+        self.btn_history = ctk.CTkButton(self.sidebar_frame, text="상세 출력 이력", command=self.show_history)
+        self.btn_history.grid(row=2, column=0, padx=20, pady=10)
+
+        self.btn_settings = ctk.CTkButton(self.sidebar_frame, text="단가/배수 설정", command=self.show_settings)
+        self.btn_settings.grid(row=3, column=0, padx=20, pady=10)
+
+        self.btn_quotas = ctk.CTkButton(self.sidebar_frame, text="월 사용 한도", command=self.show_quotas)
+        self.btn_quotas.grid(row=4, column=0, padx=20, pady=10)
+
+        self.btn_diag = ctk.CTkButton(self.sidebar_frame, text="진단", command=self.show_diagnostics)
+        self.btn_diag.grid(row=5, column=0, padx=20, pady=10)
+
+        self.engine_label = ctk.CTkLabel(self.sidebar_frame, text="엔진: 연결 중...", text_color="gray", wraplength=160, justify="left")
+        self.engine_label.grid(row=7, column=0, padx=20, pady=(10, 20))
+
+        self.main_frame = ctk.CTkFrame(self, corner_radius=0, fg_color="transparent")
+        self.main_frame.grid(row=0, column=1, sticky="nsew", padx=20, pady=20)
+
+        self.setup_treeview_style()
+        self.queries = core.QueryExecutor(self)
+        self.quotas = core.QuotaTracker()     # 이번 달 사용자 / PC 별 사용량 (처음 한 번 DB 에서 읽고, 이후는 새 로그로 더함)
+        self.show_dashboard()
+        self.run_in_background(self.quotas.reseed, self.on_quotas_loaded)
+        
+        self.bind("<<NewLog>>", self.on_new_log)
+        self.bind("<<EngineState>>", self.on_engine_state)
+        self.protocol("WM_DELETE_WINDOW", self.on_close)
+
+        # 새 로그: 기록 스레드가 pending_logs 에 쌓고, 화면 반영은 메인 스레드에서 모아서 한 번에
+        self.pending_logs = collections.deque()
+        self.pending_updates = collections.deque()     # 작업이 끝나서 최종 쪽수 / 상태로 고친 로그
+        self.pending_lock = threading.Lock()
+        self.new_log_scheduled = False
+        self.ui_timings = collections.deque(maxlen=200)    # (반영한 행 수, 메인 스레드 소요 초)
+
+        self.engine_connected = False
+        self.writer = self.events = self.diagnostics = None
+        self.metrics_port = metrics_port
+        if spooler is not None or in_process:
+            # 같은 프로세스 안에서 감시 (시뮬레이터 / 예전 방식). 창을 닫으면 감시도 멈춤
+            self.writer = core.LogWriter(on_commit=self.on_logs_committed, on_update=self.on_logs_updated)
+            self.writer.start()
+            self.archiver = core.Archiver()
+            self.archiver.start()
+            self.diagnostics = core.start_diagnostics(metrics_port)
+
+            self.stop_event = threading.Event()
+            self.monitor_thread = threading.Thread(target=core.monitor_loop, args=(self.writer, self.stop_event, spooler),
+                                                   kwargs={"quotas": self.quotas}, daemon=True)
+            self.monitor_thread.start()
+            self.engine_label.configure(text="엔진: 창 내부 실행", text_color="gray")
+        else:
+            # 감시는 별도 엔진 프로세스가 담당, 화면은 이벤트만 구독 (창을 닫아도 기록은 계속됨)
+            port = port or core.ENGINE_PORT
+            if not core.engine_running(port=port):
+                core.start_engine_process(port, metrics_port)
+            self.events = core.EventSubscriber(self.on_logs_committed, self.on_engine_event, port=port, on_updates=self.on_logs_updated)
+            self.events.start()
+
+    def on_close(self):
+        # (join 중에 다른 스레드가 event_generate로 메인 스레드를 기다리지 않도록 콜백 해제)
+        if self.events:
+            # 구독만 끊음 -> 엔진 프로세스는 계속 기록
+            self.events.on_rows = self.events.on_state = self.events.on_updates = None
+            self.events.stop()
+        if self.writer:
+            # 감시 중지 -> 감시 스레드 종료(진행 중 작업 저장)까지 기다림 -> 남은 로그 기록 -> 창 닫기
+            self.stop_event.set()
+            self.archiver.stop(timeout=5)
+            self.writer.on_commit = self.writer.on_update = None
+            core.stop_monitor(self.stop_event, self.monitor_thread, self.writer, timeout=5)
+        if self.diagnostics:
+            self.diagnostics.close()
+        self.queries.stop()
+        self.destroy()
+
+    def on_engine_event(self, connected, hello):
+        # 구독 스레드에서 호출: 상태만 바꿔 두고 화면 처리는 메인 스레드로
+        self.engine_connected = connected
+        self.event_generate("<<EngineState>>", when="tail")
+
+    def on_engine_state(self, event):
+        if not self.engine_connected:
+            # 창이 띄운 엔진의 출력([에러] 등)은 DB 옆 engine.log 에 남음
+            self.engine_label.configure(text=f"엔진: 연결 끊김 (재접속 중)\n로그: {core.engine_log_path()}", text_color="#e06c75")
+            return
+        self.engine_label.configure(text=f"엔진: 연결됨\n로그: {core.engine_log_path()}", text_color="#98c379")
+        # (재)접속 전후로 놓친 로그가 있을 수 있으니 지금 화면을 DB 에서 다시 읽음
+        self.queries.invalidate()
+        self.run_in_background(self.quotas.reseed, self.on_quotas_loaded)
+        if self.current_page == 'dashboard':
+            self.refresh_dashboard_stats()
+        elif self.current_page == 'history':
+            self.reload_history()
+
+    def setup_treeview_style(self):
+        style = ttk.Style()
+        style.theme_use("default")
+        style.configure("Treeview", background="#2b2b2b", foreground="white", fieldbackground="#2b2b2b", rowheight=30)
+        style.configure("Treeview.Heading", background="#3a3a3a", foreground="white", font=('Arial', 10, 'bold'))
+        style.map("Treeview", background=[('selected', '#1f6aa5')])
+
+    def clear_main_frame(self):
+        for widget in self.main_frame.winfo_children():
+            widget.destroy()
+
+    def on_logs_committed(self, rows):
+        # 기록 스레드에서 호출: 행을 쌓아 두고, 이미 알림이 예약돼 있으면 이벤트를 또 보내지 않음
+        self.quotas.record(rows)
+        self.queue_log_changes(self.pending_logs, rows)
+
+    def on_logs_updated(self, rows):
+        self.quotas.update(rows)
+        self.queue_log_changes(self.pending_updates, rows)
+
+    def queue_log_changes(self, pending, rows):
+        with self.pending_lock:
+            pending.extend(rows)
+            if self.new_log_scheduled: return
+            self.new_log_scheduled = True
+        self.event_generate("<<NewLog>>", when="tail")
+
+    def on_new_log(self, event):
+        self.after(self.NEW_LOG_COALESCE_MS, self.apply_new_logs)
+
+    def apply_new_logs(self):
+        with self.pending_lock:
+            rows = list(self.pending_logs)
+            updates = list(self.pending_updates)
+            self.pending_logs.clear()
+            self.pending_updates.clear()
+            self.new_log_scheduled = False
+        if not rows and not updates: return
+
+        # 지난 기간에 해당하는 로그가 들어오면 그 기간 캐시는 버림 (보통은 오늘 날짜라 해당 없음)
+        today = datetime.date.today().isoformat()
+        for day in {row["print_time"][:10] for row in rows + updates}:
+            if day < today: self.queries.invalidate(day)
+
+        # 화면 전체를 다시 그리지 않고 바뀐 부분만 반영
+        t0 = time.perf_counter()
+        if getattr(self, 'current_page', None) == 'dashboard':
+            self.apply_dashboard_delta(rows, updates)
+        elif getattr(self, 'current_page', None) == 'history':
+            self.apply_history_delta(rows, updates)
+        elapsed = time.perf_counter() - t0
+        self.ui_timings.append((len(rows) + len(updates), elapsed))
+        core.UI_APPLY_SECONDS.observe(elapsed)
+
+    # --- 대시보드 ---
+    def show_dashboard(self):
+        self.current_page = 'dashboard'
+        self.clear_main_frame()
+        
+        # 필터
+        filter_frame = ctk.CTkFrame(self.main_frame)
+        filter_frame.pack(fill="x", pady=(0, 20), ipady=5)
+        
+        ctk.CTkLabel(filter_frame, text="기간 조회:", font=("Arial", 14, "bold")).pack(side="left", padx=20)
+        
+        self.entry_start = ctk.CTkEntry(filter_frame, width=100, placeholder_text="YYYY-MM-DD")
+        self.entry_start.pack(side="left", padx=5)
+        ctk.CTkLabel(filter_frame, text="~").pack(side="left")
+        self.entry_end = ctk.CTkEntry(filter_frame, width=100, placeholder_text="YYYY-MM-DD")
+        self.entry_end.pack(side="left", padx=5)
+        
+        ctk.CTkButton(filter_frame, text="검색", width=60, command=self.refresh_dashboard_stats).pack(side="left", padx=10)
+        ctk.CTkButton(filter_frame, text="오늘", width=60, fg_color="#555555", command=lambda: self.set_date_filter("today")).pack(side="left", padx=5)
+        ctk.CTkButton(filter_frame, text="이번달", width=60, fg_color="#555555", command=lambda: self.set_date_filter("month")).pack(side="left", padx=5)
+
+        self.stats_container = ctk.CTkFrame(self.main_frame, fg_color="transparent")
+        self.stats_container.pack(fill="x", expand=False)
+        
+        self.set_date_filter("today")
+
+    def set_date_filter(self, mode):
+        today = datetime.datetime.now()
+        if mode == "today":
+            str_date = today.strftime("%Y-%m-%d")
+            self.entry_start.delete(0, 'end'); self.entry_start.insert(0, str_date)
+            self.entry_end.delete(0, 'end'); self.entry_end.insert(0, str_date)
+        elif mode == "month":
+            start_date = today.replace(day=1).strftime("%Y-%m-%d")
+            end_date = today.strftime("%Y-%m-%d")
+            self.entry_start.delete(0, 'end'); self.entry_start.insert(0, start_date)
+            self.entry_end.delete(0, 'end'); self.entry_end.insert(0, end_date)
+        
+        self.refresh_dashboard_stats()
+
+    def refresh_dashboard_stats(self):
+        # 조회는 백그라운드에서, 결과가 오면 render_dashboard_stats 로 그림
+        start_date = self.entry_start.get()
+        end_date = self.entry_end.get()
+
+        self.dashboard_range = (start_date, end_date)
+        self.dashboard_stats = None
+        self.dashboard_backlog = []     # 조회 중에 들어온 새 로그 (결과 도착 후 id 로 걸러서 반영)
+        self.dashboard_update_backlog = []
+
+        # 오늘 이전에 끝나는 기간은 더 바뀌지 않으므로 캐시
+        closed = end_date < datetime.date.today().isoformat()
+        self.queries.submit("dashboard", core.dashboard_snapshot, (start_date, end_date), self.render_dashboard_stats,
+                            cache_key=("dashboard", start_date, end_date) if closed else None)
+
+    def render_dashboard_stats(self, snapshot):
+        if getattr(self, 'current_page', None) != 'dashboard': return
+        for widget in self.stats_container.winfo_children(): widget.destroy()
+
+        start_date, end_date = self.dashboard_range
+        last_id, stats = snapshot
+        self.dashboard_stats = {key: dict(value) for key, value in stats.items()}
+        self.dashboard_labels = {}
+
+        total_frame = ctk.CTkFrame(self.stats_container, fg_color="#1f6aa5")
+        total_frame.grid(row=0, column=0, columnspan=4, sticky="ew", padx=5, pady=10)
+        ctk.CTkLabel(total_frame, text=f"기간 총 비용 ({start_date} ~ {end_date})", font=("Arial", 16, "bold"), text_color="white").pack(pady=(10,0))
+        self.dashboard_labels["total_cost"] = ctk.CTkLabel(total_frame, font=("Arial", 36, "bold"), text_color="white")
+        self.dashboard_labels["total_cost"].pack(pady=(5,10))
+        self.dashboard_labels["total_pages"] = ctk.CTkLabel(total_frame, font=("Arial", 14), text_color="white")
+        self.dashboard_labels["total_pages"].pack(pady=(0,10))
+
+        def create_card(col, key, title, color_theme):
+            f = ctk.CTkFrame(self.stats_container, border_width=2, border_color=color_theme)
+            f.grid(row=1, column=col, sticky="ew", padx=5, pady=5)
+            ctk.CTkLabel(f, text=title, font=("Arial", 14, "bold")).pack(pady=(10,5))
+            cnt_label = ctk.CTkLabel(f, font=("Arial", 20, "bold"))
+            cnt_label.pack()
+            cost_label = ctk.CTkLabel(f, font=("Arial", 16), text_color=color_theme)
+            cost_label.pack(pady=(5,10))
+            self.dashboard_labels[key] = (cnt_label, cost_label)
+
+        self.stats_container.grid_columnconfigure(0, weight=1)
+        self.stats_container.grid_columnconfigure(1, weight=1)
+        self.stats_container.grid_columnconfigure(2, weight=1)
+        self.stats_container.grid_columnconfigure(3, weight=1)
+
+        create_card(0, "A4_BW", "A4 흑백", "gray")
+        create_card(1, "A3_BW", "A3 흑백", "gray")
+        create_card(2, "A4_Col", "A4 컬러", "#E04F5F")
+        create_card(3, "A3_Col", "A3 컬러", "#E04F5F")
+
+        # 이번 달 한도에 가까운 / 넘은 사용자, PC (기간 필터와 관계없이 이번 달 기준)
+        quota_frame = ctk.CTkFrame(self.stats_container)
+        quota_frame.grid(row=2, column=0, columnspan=4, sticky="ew", padx=5, pady=10)
+        ctk.CTkLabel(quota_frame, text="이번 달 한도 근접 / 초과", font=("Arial", 14, "bold")).pack(anchor="w", padx=10, pady=(10, 0))
+        self.dashboard_labels["quotas"] = ctk.CTkLabel(quota_frame, font=("Consolas", 12), justify="left")
+        self.dashboard_labels["quotas"].pack(anchor="w", padx=10, pady=(5, 10))
+
+        backlog, self.dashboard_backlog = self.dashboard_backlog, []
+        updates, self.dashboard_update_backlog = self.dashboard_update_backlog, []
+        # 조회 전에 기록된 행의 고침은 조회에 들어갔는지 알 수 없어 버림 (다음 조회 때 맞춰짐)
+        self.apply_dashboard_delta([row for row in backlog if row["id"] > last_id], [row for row in updates if row["id"] > last_id])
+        self.update_dashboard_labels()
+
+    def update_dashboard_labels(self):
+        stats = self.dashboard_stats
+        total_pages = sum(v["cnt"] for v in stats.values())
+        total_cost = sum(v["cost"] for v in stats.values())
+        self.dashboard_labels["total_cost"].configure(text=f"{total_cost:,} 원")
+        self.dashboard_labels["total_pages"].configure(text=f"총 {total_pages:,} 장")
+        for key, (cnt_label, cost_label) in ((k, v) for k, v in self.dashboard_labels.items() if k in stats):
+            cnt_label.configure(text=f"{stats[key]['cnt']:,} 장")
+            cost_label.configure(text=f"{stats[key]['cost']:,} 원")
+        self.update_quota_list()
+
+    QUOTA_LIST_SIZE = 10
+
+    def quota_lines(self, usage):
+        lines = []
+        for scope, name, pages, max_pages, cost, max_cost, state in usage:
+            kind = "사용자" if scope == "user" else "PC"
+            status = "초과" if state == core.QUOTA_OVER else "근접"
+            lines.append(f"{status}  {kind:<4} {name[:24]:<24} {pages:>8,} / {max_pages or '-':>8} 장   {cost:>10,} / {max_cost or '-':>10} 원")
+        return lines
+
+    def update_quota_list(self):
+        label = getattr(self, 'dashboard_labels', {}).get("quotas")
+        if label is None or not label.winfo_exists(): return
+        usage = self.quotas.usage()
+        lines = self.quota_lines(usage[:self.QUOTA_LIST_SIZE])
+        if len(usage) > self.QUOTA_LIST_SIZE: lines.append(f"... 외 {len(usage) - self.QUOTA_LIST_SIZE}건")
+        label.configure(text="\n".join(lines) if lines else "한도에 가까운 사용자 / PC 없음")
+
+    def on_quotas_loaded(self, result):
+        if isinstance(result, Exception):
+            print(f"[에러] 이번 달 사용량을 읽을 수 없음: {result}")
+            return
+        if self.current_page == 'dashboard': self.update_quota_list()
+        elif self.current_page == 'quotas': self.show_quotas()
+
+    def apply_dashboard_delta(self, rows, updates=()):
+        if self.dashboard_stats is None:
+            self.dashboard_backlog.extend(rows)
+            self.dashboard_update_backlog.extend(updates)
+            return
+        start_date, end_date = self.dashboard_range
+        changed = False
+        for row in rows:
+            if not (start_date <= row["print_time"][:10] <= end_date): continue
+            bucket = self.dashboard_stats[core.stats_bucket(row["paper_size"], row["is_color"])]
+            bucket["cnt"] += row["pages"]
+            bucket["cost"] += row["cost"]
+            changed = True
+        for row in updates:
+            # 끝난 작업: 처음 기록한 쪽수 / 비용과의 차이만
+            if not (start_date <= row["print_time"][:10] <= end_date): continue
+            bucket = self.dashboard_stats[core.stats_bucket(row["paper_size"], row["is_color"])]
+            bucket["cnt"] += row["pages"] - row["old_pages"]
+            bucket["cost"] += row["cost"] - row["old_cost"]
+            changed = True
+        if changed:
+            self.update_dashboard_labels()
+        else:
+            self.update_quota_list()    # 기간 밖의 로그라도 이번 달 사용량은 바뀜
+
+    # --- 출력 이력 ---
+    HISTORY_PAGE_SIZE = 200
+
+    def show_history(self):
+        self.current_page = 'history'
+        self.clear_main_frame()
+        filters = getattr(self, 'history_filters', {})
+        
+        ctk.CTkLabel(self.main_frame, text="상세 출력 이력", font=("Arial", 20, "bold")).pack(pady=(0, 10), anchor="w")
+
+        # 필터 (모두 선택 사항, 입력한 조건만 적용)
+        filter_frame = ctk.CTkFrame(self.main_frame)
+        filter_frame.pack(fill="x", pady=(0, 10), ipady=5)
+
+        self.history_entries = {}
+        for key, label, width in (("start_date", "기간", 100), ("end_date", "~", 100), ("user", "사용자", 90),
+                                  ("printer", "프린터", 120), ("computer", "PC", 90), ("doc", "문서명", 140)):
+            ctk.CTkLabel(filter_frame, text=label).pack(side="left", padx=(10, 3))
+            entry = ctk.CTkEntry(filter_frame, width=width, placeholder_text="YYYY-MM-DD" if "date" in key else "")
+            if filters.get(key): entry.insert(0, filters[key])
+            entry.pack(side="left")
+            entry.bind("<Return>", lambda e: self.apply_history_filters())
+            self.history_entries[key] = entry
+
+        self.history_spec = ctk.CTkComboBox(filter_frame, width=110, values=["전체", "A4 흑백", "A4 컬러", "A3 흑백", "A3 컬러", "기타"])
+        self.history_spec.set(filters.get("spec", "전체"))
+        self.history_spec.pack(side="left", padx=10)
+        ctk.CTkButton(filter_frame, text="검색", width=60, command=self.apply_history_filters).pack(side="left", padx=5)
+
+        table_frame = ctk.CTkFrame(self.main_frame)
+        table_frame.pack(fill="both", expand=True)
+
+        columns = ("time", "printer", "user", "doc", "spec", "pages", "unit", "cost")
+        tree = ttk.Treeview(table_frame, columns=columns, show="headings", style="Treeview")
+
+        tree.heading("time", text="시간")
+        tree.heading("printer", text="프린터(드라이버)")
+        tree.heading("user", text="사용자")
+        tree.heading("doc", text="문서명")
+        tree.heading("spec", text="사양")
+        tree.heading("pages", text="매수")
+        tree.heading("unit", text="적용단가")
+        tree.heading("cost", text="총비용")
+
+        tree.column("time", width=130, anchor="center")
+        tree.column("printer", width=150, anchor="w")
+        tree.column("user", width=80, anchor="center")
+        tree.column("doc", width=200, anchor="w")
+        tree.column("spec", width=80, anchor="center")
+        tree.column("pages", width=50, anchor="center")
+        tree.column("unit", width=60, anchor="e")
+        tree.column("cost", width=80, anchor="e")
+
+        scrollbar = ctk.CTkScrollbar(table_frame, command=tree.yview)
+
+        def on_scroll(first, last):
+            # 맨 아래 근처까지 내리면 다음 페이지를 이어서 불러옴
+            scrollbar.set(first, last)
+            if float(last) > 0.9 and not self.history_loading and not self.history_done:
+                self.history_loading = True
+                self.after_idle(self.load_history_page)
+
+        tree.configure(yscroll=on_scroll)
+        scrollbar.pack(side="right", fill="y")
+        tree.pack(side="left", fill="both", expand=True)
+
+        self.history_tree = tree
+        self.history_loading = False
+        bottom_frame = ctk.CTkFrame(self.main_frame, fg_color="transparent")
+        bottom_frame.pack(fill="x", pady=(5, 0))
+        self.history_status = ctk.CTkLabel(bottom_frame, text="", anchor="w")
+        self.history_status.pack(side="left", fill="x", expand=True)
+
+        # 내보내기: 지금 필터 그대로 (로그 전체 / 월 x 그룹 정산)
+        report_group = ctk.CTkComboBox(bottom_frame, width=100, values=list(self.REPORT_LABELS))
+        report_group.set("사용자별")
+        ctk.CTkButton(bottom_frame, text="월 정산 내보내기", width=120, fg_color="#555555",
+                      command=lambda: self.export_history(self.REPORT_LABELS[report_group.get()])).pack(side="right", padx=5)
+        report_group.pack(side="right")
+        ctk.CTkButton(bottom_frame, text="로그 내보내기", width=110, fg_color="#555555",
+                      command=self.export_history).pack(side="right", padx=5)
+        self.reload_history()
+
+    def apply_history_filters(self):
+        filters = {key: entry.get().strip() for key, entry in self.history_entries.items()}
+        filters["spec"] = self.history_spec.get()
+        for key in ("start_date", "end_date"):
+            if filters[key]:
+                try:
+                    datetime.datetime.strptime(filters[key], "%Y-%m-%d")
+                except ValueError:
+                    messagebox.showerror("오류", "날짜는 YYYY-MM-DD 형식으로 입력해주세요.")
+                    return
+        self.history_filters = filters
+        self.reload_history()
+
+    def history_query_filters(self):
+        filters = dict(getattr(self, 'history_filters', {}))
+        spec = filters.pop("spec", "전체")
+        if spec == "기타":
+            filters["paper"] = "Etc"
+        elif spec != "전체":
+            paper, color = spec.split()
+            filters["paper"] = paper
+            filters["color"] = 1 if color == "컬러" else 0
+        return filters
+
+    REPORT_LABELS = {"사용자별": "user", "프린터별": "printer", "PC별": "computer"}
+
+    def export_history(self, report=None):
+        path = filedialog.asksaveasfilename(parent=self, defaultextension=".csv",
+                                            filetypes=[("CSV (엑셀)", "*.csv"), ("JSON Lines", "*.jsonl")])
+        if not path: return
+        filters = self.history_query_filters()
+        state = {"count": 0, "finished": False, "error": None}
+
+        def work():
+            # 백그라운드에서 파일로 바로 흘려 씀 (범위가 커도 메모리 일정)
+            try:
+                if report:
+                    state["count"] = core.export_report(path, report, filters)
+                else:
+                    state["count"] = core.export_logs(path, filters, progress=lambda n: state.update(count=n))
+            except (OSError, sqlite3.Error) as e:
+                state["error"] = e
+            state["finished"] = True
+
+        def poll():
+            visible = self.current_page == 'history' and self.history_status.winfo_exists()
+            if state["finished"]:
+                if visible: self.update_history_status()
+                if state["error"]:
+                    messagebox.showerror("오류", f"내보내기 실패: {state['error']}")
+                else:
+                    messagebox.showinfo("완료", f"{state['count']:,}줄을 저장했습니다.\n{path}")
+                return
+            if visible:
+                self.history_status.configure(text=f"내보내는 중... {state['count']:,}건")
+            self.after(200, poll)
+
+        threading.Thread(target=work, daemon=True).start()
+        poll()
+
+    def reload_history(self):
+        # 첫 페이지부터 다시 (필터 변경) - 진행 중이던 이전 조회 결과는 버려짐
+        self.history_tree.delete(*self.history_tree.get_children())
+        self.history_last_id = None
+        self.history_done = False
+        self.history_count = 0
+        self.history_loading = True
+        self.load_history_page()
+
+    def load_history_page(self):
+        if self.current_page != 'history' or self.history_done:
+            self.history_loading = False
+            return
+        self.history_status.configure(text="불러오는 중...")
+        self.queries.submit("history", core.query_history, (self.history_query_filters(), self.history_last_id, self.HISTORY_PAGE_SIZE),
+                            self.on_history_page)
+
+    def on_history_page(self, rows):
+        self.history_loading = False
+        if self.current_page != 'history': return
+        if len(rows) < self.HISTORY_PAGE_SIZE:
+            self.history_done = True
+        
+        for row in rows:
+            # 조회 중에 새 로그 델타로 이미 들어간 행은 건너뜀
+            if self.history_tree.exists(str(row[0])): continue
+            self.insert_history_row("end", row)
+        if rows:
+            self.history_last_id = rows[-1][0]
+        self.history_count += len(rows)
+        self.update_history_status()
+
+    def insert_history_row(self, index, row):
+        self.history_tree.insert("", index, iid=str(row[0]), values=self.history_row_values(row))
+
+    def history_row_values(self, row):
+        color_txt = "컬러" if row[6] else "흑백"
+        spec_txt = f"{row[5]} / {color_txt}"
+        return (row[1], row[2], row[3], row[4], spec_txt, f"{row[7]}장", f"@{row[8]}", f"{row[9]:,}원")
+
+    def update_history_status(self):
+        self.history_status.configure(text=f"{self.history_count:,}건 표시" + ("" if self.history_done else " (아래로 스크롤하면 더 불러옵니다)"))
+
+    HISTORY_ROW_COLUMNS = ("id", "print_time", "printer_name", "user_name", "document_name", "paper_size", "is_color", "pages", "unit_cost", "cost")
+
+    def apply_history_delta(self, rows, updates=()):
+        # 조건에 맞는 새 행만 맨 위에 끼워 넣음 (id 오름차순으로 오므로 차례로 0번 위치에)
+        filters = self.history_query_filters()
+        added = 0
+        for row in rows:
+            if not core.history_row_matches(filters, row) or self.history_tree.exists(str(row["id"])): continue
+            self.insert_history_row(0, [row[c] for c in self.HISTORY_ROW_COLUMNS])
+            added += 1
+        if added:
+            self.history_count += added
+            self.update_history_status()
+        # 끝난 작업: 화면에 있는 행만 최종 쪽수 / 비용으로 바꿈
+        for row in updates:
+            if self.history_tree.exists(str(row["id"])):
+                self.history_tree.item(str(row["id"]), values=self.history_row_values([row[c] for c in self.HISTORY_ROW_COLUMNS]))
+
+    # --- 설정 ---
+    def show_settings(self):
+        self.current_page = 'settings'
+        self.clear_main_frame()
+        
+        ctk.CTkLabel(self.main_frame, text="단가 및 배수 설정", font=("Arial", 24, "bold")).pack(pady=20)
+        
+        form_frame = ctk.CTkFrame(self.main_frame)
+        form_frame.pack(pady=10, padx=50, fill="x")
+
+        # 1. 기본 단가
+        ctk.CTkLabel(form_frame, text="[기본 단가 (A4)]", font=("Arial", 14, "bold")).grid(row=0, column=0, columnspan=2, pady=(10,5))
+        
+        ctk.CTkLabel(form_frame, text="A4 흑백 (원):").grid(row=1, column=0, padx=20, pady=10)
+        e_bw = ctk.CTkEntry(form_frame)
+        e_bw.insert(0, str(int(core.current_settings['cost_bw_a4'])))
+        e_bw.grid(row=1, column=1, padx=20, pady=10)
+
+        ctk.CTkLabel(form_frame, text="A4 컬러 (원):").grid(row=2, column=0, padx=20, pady=10)
+        e_col = ctk.CTkEntry(form_frame)
+        e_col.insert(0, str(int(core.current_settings['cost_color_a4'])))
+        e_col.grid(row=2, column=1, padx=20, pady=10)
+
+        # 2. A3 배수
+        ctk.CTkLabel(form_frame, text="[A3 요금 배수 (A4 대비)]", font=("Arial", 14, "bold")).grid(row=3, column=0, columnspan=2, pady=(20,5))
+
+        ctk.CTkLabel(form_frame, text="A3 흑백 배수:").grid(row=4, column=0, padx=20, pady=10)
+        combo_bw_mult = ctk.CTkComboBox(form_frame, values=["1.0", "1.5", "2.0", "2.5", "3.0"])
+        combo_bw_mult.set(str(core.current_settings['mult_a3_bw']))
+        combo_bw_mult.grid(row=4, column=1, padx=20, pady=10)
+
+        ctk.CTkLabel(form_frame, text="A3 컬러 배수:").grid(row=5, column=0, padx=20, pady=10)
+        combo_col_mult = ctk.CTkComboBox(form_frame, values=["1.0", "1.5", "2.0", "2.5", "3.0"])
+        combo_col_mult.set(str(core.current_settings['mult_a3_color']))
+        combo_col_mult.grid(row=5, column=1, padx=20, pady=10)
+
+        # 3. 적용 시점 / 과거 기록 재계산 (선택)
+        ctk.CTkLabel(form_frame, text="[적용 시점]", font=("Arial", 14, "bold")).grid(row=6, column=0, columnspan=2, pady=(20,5))
+
+        ctk.CTkLabel(form_frame, text="적용 시작일:").grid(row=7, column=0, padx=20, pady=10)
+        e_effective = ctk.CTkEntry(form_frame, placeholder_text="YYYY-MM-DD (비우면 지금부터)")
+        e_effective.grid(row=7, column=1, padx=20, pady=10)
+
+        ctk.CTkLabel(form_frame, text="재계산 기간 (선택):").grid(row=8, column=0, padx=20, pady=10)
+        recost_frame = ctk.CTkFrame(form_frame, fg_color="transparent")
+        recost_frame.grid(row=8, column=1, padx=20, pady=10)
+        e_recost_start = ctk.CTkEntry(recost_frame, width=100, placeholder_text="YYYY-MM-DD")
+        e_recost_start.pack(side="left")
+        ctk.CTkLabel(recost_frame, text="~").pack(side="left", padx=5)
+        e_recost_end = ctk.CTkEntry(recost_frame, width=100, placeholder_text="YYYY-MM-DD")
+        e_recost_end.pack(side="left")
+
+        # 4. 보관 기간 (지난 달은 월별 보관 DB 로 옮겨 지금 DB 를 작게 유지, 조회는 그대로 됨)
+        ctk.CTkLabel(form_frame, text="[로그 보관]", font=("Arial", 14, "bold")).grid(row=9, column=0, columnspan=2, pady=(20,5))
+
+        ctk.CTkLabel(form_frame, text="보관 기간 (개월, 0=무제한):").grid(row=10, column=0, padx=20, pady=10)
+        e_retention = ctk.CTkEntry(form_frame)
+        e_retention.insert(0, str(int(core.current_settings.get('retention_months', 0))))
+        e_retention.grid(row=10, column=1, padx=20, pady=10)
+
+        # 요금표 이력 (최근 5개 버전)
+        history_lines = [f"{start[:16] if start != core.TARIFF_EPOCH else '처음부터':>16}  |  흑백 {t['cost_bw_a4']:g}원 / 컬러 {t['cost_color_a4']:g}원 / "
+                         f"A3 x{t['mult_a3_bw']:g}, x{t['mult_a3_color']:g}" for start, t in core.tariff_book.versions[-5:]]
+        ctk.CTkLabel(self.main_frame, text="\n".join(reversed(history_lines)), font=("Consolas", 12), justify="left").pack(pady=(10, 0))
+
+        progress_bar = ctk.CTkProgressBar(self.main_frame, width=400)
+        progress_bar.set(0)
+        progress_label = ctk.CTkLabel(self.main_frame, text="")
+
+        def parse_date(entry, suffix):
+            text = entry.get().strip()
+            if not text: return None
+            datetime.datetime.strptime(text, "%Y-%m-%d")
+            return f"{text} {suffix}" if suffix else text
+
+        def start_recost(start_date, end_date):
+            # 선택한 기간만 백그라운드에서 구간별로 재계산, 진행률은 after() 로 화면에 반영
+            state = {"done": 0, "total": 1, "finished": False, "changed": 0, "skipped": []}
+
+            def work():
+                state["changed"], state["skipped"] = core.recalculate_db_costs(start_date, end_date, progress=lambda d, t: state.update(done=d, total=t))
+                state["finished"] = True
+
+            def poll():
+                # 다른 화면으로 넘어가도 끝날 때까지 확인해서 지난 기간 캐시를 비움
+                visible = progress_bar.winfo_exists()
+                if visible:
+                    progress_bar.set(state["done"] / max(state["total"], 1))
+                if state["finished"]:
+                    self.queries.invalidate()
+                    skipped = state["skipped"]
+                    if visible: progress_label.configure(text=f"재계산 완료: {state['changed']:,}건 변경")
+                    if skipped:
+                        # 보관 DB 로 옮긴 달은 보관 당시 금액 그대로 (그 달 정산에는 새 요금표가 반영되지 않음)
+                        messagebox.showwarning("재계산 제외", f"보관된 {len(skipped)}개월({skipped[0]} ~ {skipped[-1]})은 "
+                                                             "재계산하지 않았습니다.\n그 달의 금액은 보관 당시 값 그대로입니다.")
+                    return
+                if visible: progress_label.configure(text=f"재계산 중... {state['done']:,} / {state['total']:,}")
+                self.after(200, poll)
+
+            progress_bar.pack(pady=(10, 0))
+            progress_label.pack()
+            threading.Thread(target=work, daemon=True).start()
+            poll()
+
+        def save():
+            try:
+                # 1. 새 요금표 버전 추가 (과거 기록은 그대로)
+                effective_from = parse_date(e_effective, "00:00:00")
+                recost_start = parse_date(e_recost_start, None)
+                recost_end = parse_date(e_recost_end, None)
+                values = {
+                    'cost_bw_a4': float(e_bw.get()),
+                    'cost_color_a4': float(e_col.get()),
+                    'mult_a3_bw': float(combo_bw_mult.get()),
+                    'mult_a3_color': float(combo_col_mult.get()),
+                }
+                retention = int(e_retention.get())
+                if retention < 0: raise ValueError
+            except ValueError:
+                messagebox.showerror("오류", "올바른 숫자/날짜(YYYY-MM-DD)를 입력해주세요.")
+                return
+
+            core.add_tariff(values, effective_from)
+            if retention != int(core.current_settings.get('retention_months', 0)):
+                core.update_setting('retention_months', retention)     # 엔진이 다음 보관 주기에 반영
+
+            # 2. 기간을 지정한 경우에만 그 기간을 다시 계산
+            if recost_start or recost_end:
+                start_recost(recost_start, recost_end)
+                messagebox.showinfo("성공", "새 단가가 저장되었습니다.\n지정한 기간의 기록을 백그라운드에서 재계산합니다.")
+            else:
+                messagebox.showinfo("성공", "새 단가가 저장되었습니다.\n적용 시작 이후의 출력부터 반영됩니다.\n"
+                                          "(감시 엔진이 따로 실행 중이면 30초 안에 반영되며, 그 사이 기록은 재계산 기간으로 바로잡을 수 있습니다)")
+
+        ctk.CTkButton(self.main_frame, text="설정 저장", command=save, height=40, fg_color="green").pack(pady=20)
+
+    # --- 월 사용 한도 ---
+    def show_quotas(self):
+        self.current_page = 'quotas'
+        self.clear_main_frame()
+
+        ctk.CTkLabel(self.main_frame, text="월 사용 한도", font=("Arial", 20, "bold")).pack(pady=(0, 10), anchor="w")
+
+        # 1. 기본 한도 (개별 한도가 없는 사용자 / PC 모두에 적용)
+        form_frame = ctk.CTkFrame(self.main_frame)
+        form_frame.pack(fill="x")
+        ctk.CTkLabel(form_frame, text="[기본 한도 (0=제한 없음)]", font=("Arial", 14, "bold")).grid(row=0, column=0, columnspan=4, pady=(10, 5))
+
+        entries = {}
+        for row, (scope, title) in enumerate((("user", "사용자"), ("computer", "PC")), start=1):
+            for col, (field, unit) in enumerate((("pages", "장"), ("cost", "원"))):
+                key = f"quota_{scope}_{field}"
+                ctk.CTkLabel(form_frame, text=f"{title} 월 ({unit}):").grid(row=row, column=col * 2, padx=(20, 5), pady=5, sticky="e")
+                entries[key] = ctk.CTkEntry(form_frame, width=120)
+                entries[key].insert(0, str(int(core.current_settings.get(key, 0))))
+                entries[key].grid(row=row, column=col * 2 + 1, padx=(0, 20), pady=5, sticky="w")
+
+        ctk.CTkLabel(form_frame, text="근접 표시 (%):").grid(row=3, column=0, padx=(20, 5), pady=5, sticky="e")
+        entries["quota_warn_percent"] = ctk.CTkEntry(form_frame, width=120)
+        entries["quota_warn_percent"].insert(0, str(int(core.current_settings.get("quota_warn_percent", 80))))
+        entries["quota_warn_percent"].grid(row=3, column=1, padx=(0, 20), pady=5, sticky="w")
+        pause_var = ctk.IntVar(value=int(core.current_settings.get("quota_pause", 0)))
+        ctk.CTkCheckBox(form_frame, text="한도를 넘으면 새 작업 일시 정지", variable=pause_var).grid(row=3, column=2, columnspan=2, padx=20, pady=5, sticky="w")
+
+        def save_defaults():
+            try:
+                values = {key: int(entry.get() or 0) for key, entry in entries.items()}
+                if any(v < 0 for v in values.values()): raise ValueError
+            except ValueError:
+                messagebox.showerror("오류", "0 이상의 정수를 입력해주세요.")
+                return
+            values["quota_pause"] = pause_var.get()
+            for key, value in values.items():
+                if value != int(core.current_settings.get(key, 0)): core.update_setting(key, value)
+            self.reload_quota_limits()     # 엔진 프로세스는 다음 한도 확인 주기(30초)에 반영
+            messagebox.showinfo("성공", "기본 한도가 저장되었습니다.")
+
+        ctk.CTkButton(form_frame, text="기본 한도 저장", command=save_defaults, fg_color="green").grid(row=4, column=0, columnspan=4, pady=10)
+
+        # 2. 개별 한도 (비워 둔 항목은 기본 한도)
+        ctk.CTkLabel(self.main_frame, text="[개별 한도]", font=("Arial", 14, "bold")).pack(pady=(20, 5), anchor="w")
+        edit_frame = ctk.CTkFrame(self.main_frame)
+        edit_frame.pack(fill="x")
+        scope_combo = ctk.CTkComboBox(edit_frame, values=["사용자", "PC"], width=90)
+        scope_combo.set("사용자")
+        scope_combo.pack(side="left", padx=(10, 5), pady=10)
+        e_name = ctk.CTkEntry(edit_frame, width=180, placeholder_text="사용자 / PC 이름")
+        e_name.pack(side="left", padx=5)
+        e_pages = ctk.CTkEntry(edit_frame, width=100, placeholder_text="월 장 (기본)")
+        e_pages.pack(side="left", padx=5)
+        e_cost = ctk.CTkEntry(edit_frame, width=100, placeholder_text="월 원 (기본)")
+        e_cost.pack(side="left", padx=5)
+
+        table_frame = ctk.CTkFrame(self.main_frame)
+        table_frame.pack(fill="both", expand=True, pady=10)
+        columns = ("scope", "name", "max_pages", "max_cost", "pages", "cost")
+        tree = ttk.Treeview(table_frame, columns=columns, show="headings", style="Treeview")
+        for col, title, width in (("scope", "구분", 70), ("name", "이름", 200), ("max_pages", "한도 (장)", 100),
+                                  ("max_cost", "한도 (원)", 110), ("pages", "이번 달 (장)", 100), ("cost", "이번 달 (원)", 110)):
+            tree.heading(col, text=title)
+            tree.column(col, width=width, anchor="w" if col == "name" else "center")
+        tree.pack(side="left", fill="both", expand=True)
+
+        def fill_tree():
+            tree.delete(*tree.get_children())
+            for (scope, name), (max_pages, max_cost) in sorted(core.load_quota_limits().items()):
+                pages, cost = self.quotas.total(scope, name)
+                tree.insert("", "end", iid=f"{scope}\t{name}", values=("사용자" if scope == "user" else "PC", name,
+                            f"{max_pages:,}" if max_pages else "-", f"{max_cost:,}" if max_cost else "-", f"{pages:,}", f"{cost:,}"))
+
+        def optional_int(entry):
+            text = entry.get().strip()
+            if not text: return None
+            value = int(text)
+            if value < 0: raise ValueError
+            return value
+
+        def save_limit():
+            name = e_name.get().strip()
+            try:
+                if not name: raise ValueError
+                max_pages, max_cost = optional_int(e_pages), optional_int(e_cost)
+            except ValueError:
+                messagebox.showerror("오류", "이름과 0 이상의 정수를 입력해주세요. (비우면 기본 한도)")
+                return
+            core.set_quota_limit("user" if scope_combo.get() == "사용자" else "computer", name, max_pages, max_cost)
+            self.reload_quota_limits()
+            fill_tree()
+
+        def delete_limit():
+            for iid in tree.selection():
+                scope, name = iid.split("\t", 1)
+                core.delete_quota_limit(scope, name)
+            self.reload_quota_limits()
+            fill_tree()
+
+        def on_select(event):
+            selection = tree.selection()
+            if not selection: return
+            scope, name = selection[0].split("\t", 1)
+            scope_combo.set("사용자" if scope == "user" else "PC")
+            e_name.delete(0, 'end'); e_name.insert(0, name)
+
+        ctk.CTkButton(edit_frame, text="추가 / 변경", width=90, command=save_limit).pack(side="left", padx=5)
+        ctk.CTkButton(edit_frame, text="선택 삭제", width=90, fg_color="#555555", command=delete_limit).pack(side="left", padx=5)
+        tree.bind("<<TreeviewSelect>>", on_select)
+        fill_tree()
+
+        # 3. 지금 한도에 가까운 / 넘은 사용자, PC
+        ctk.CTkLabel(self.main_frame, text="[이번 달 한도 근접 / 초과]", font=("Arial", 14, "bold")).pack(pady=(10, 5), anchor="w")
+        lines = self.quota_lines(self.quotas.usage())
+        ctk.CTkLabel(self.main_frame, text="\n".join(lines) if lines else "없음", font=("Consolas", 12), justify="left").pack(anchor="w")
+
+    def reload_quota_limits(self):
+        try:
+            self.quotas.load_limits()
+        except sqlite3.Error as e:
+            print(f"[에러] 한도를 읽을 수 없음: {e}")
+
+    # --- 진단 ---
+    DIAG_REFRESH_MS = 2000
+
+    def show_diagnostics(self):
+        self.current_page = 'diagnostics'
+        self.clear_main_frame()
+
+        ctk.CTkLabel(self.main_frame, text="엔진 진단", font=("Arial", 20, "bold")).pack(pady=(0, 10), anchor="w")
+        self.diag_status = ctk.CTkLabel(self.main_frame, text="불러오는 중...", text_color="gray")
+        self.diag_status.pack(anchor="w")
+        self.diag_text = ctk.CTkTextbox(self.main_frame, font=("Consolas", 12), wrap="none")
+        self.diag_text.pack(fill="both", expand=True, pady=10)
+
+        # 샘플링 프로파일러: 켜 둔 동안 모든 스레드 스택을 찍어 두었다가 끌 때 결과를 보여줌
+        profile_frame = ctk.CTkFrame(self.main_frame)
+        profile_frame.pack(fill="x")
+        self.diag_profiling = getattr(self, 'diag_profiling', False)     # 다른 화면에 다녀와도 켜 둔 상태 유지
+        self.diag_profile_button = ctk.CTkButton(profile_frame, text="프로파일 정지" if self.diag_profiling else "프로파일 시작",
+                                                 width=120, command=self.toggle_profiler)
+        self.diag_profile_button.pack(side="left", padx=10, pady=10)
+        self.diag_save_button = ctk.CTkButton(profile_frame, text="프로파일 저장", width=120, state="disabled", command=self.save_profile)
+        self.diag_save_button.pack(side="left", padx=5)
+        self.diag_profile_text = ctk.CTkTextbox(self.main_frame, font=("Consolas", 11), wrap="none", height=220)
+        self.diag_profile_text.pack(fill="x", pady=(10, 0))
+        self.diag_collapsed = getattr(self, 'diag_collapsed', "")
+        if self.diag_collapsed: self.show_profile(self.diag_collapsed)
+        self.refresh_diagnostics()
+
+    def run_in_background(self, fn, callback):
+        # HTTP 요청 등은 스레드에서, 결과(또는 예외)는 메인 스레드에서 callback 으로
+        state = {}
+
+        def work():
+            try:
+                state["result"] = fn()
+            except Exception as e:
+                state["result"] = e
+
+        def poll():
+            if "result" not in state:
+                self.after(100, poll)
+                return
+            callback(state["result"])
+
+        threading.Thread(target=work, daemon=True).start()
+        poll()
+
+    def read_metrics(self):
+        import diagnostics
+        local = diagnostics.parse_metrics(core.METRICS.render())
+        if self.writer or not self.metrics_port:
+            return local    # 창 내부 실행: 이 프로세스의 값이 전부
+        metrics = diagnostics.parse_metrics(diagnostics.request(self.metrics_port, "/metrics"))
+        for name, samples in local.items():
+            if name.startswith("printmon_ui_"): metrics[name] = samples   # 화면 쪽 값은 이 프로세스에만 있음
+        return metrics
+
+    def refresh_diagnostics(self):
+        if self.current_page != 'diagnostics': return
+        def done(result):
+            if self.current_page != 'diagnostics' or not self.diag_text.winfo_exists(): return
+            import diagnostics
+            if isinstance(result, Exception):
+                self.diag_status.configure(text=f"엔진 메트릭을 읽을 수 없음: {result}", text_color="#e06c75")
+            else:
+                source = "창 내부 엔진" if self.writer else f"엔진 http://127.0.0.1:{self.metrics_port}/metrics"
+                self.diag_status.configure(text=f"{source} | {datetime.datetime.now():%H:%M:%S} 갱신", text_color="gray")
+                self.diag_text.delete("1.0", "end")
+                self.diag_text.insert("1.0", diagnostics.format_report(result))
+            self.after(self.DIAG_REFRESH_MS, self.refresh_diagnostics)
+        self.run_in_background(self.read_metrics, done)
+
+    def profiler_call(self, action):
+        import diagnostics
+        if self.writer or not self.metrics_port:
+            if action == "start": return diagnostics.PROFILER.start()
+            return diagnostics.PROFILER.stop()
+        return diagnostics.request(self.metrics_port, f"/profile/{action}", "POST")
+
+    def toggle_profiler(self):
+        action = "stop" if self.diag_profiling else "start"
+        self.diag_profile_button.configure(state="disabled")
+
+        def done(result):
+            if self.current_page != 'diagnostics' or not self.diag_profile_button.winfo_exists(): return
+            self.diag_profile_button.configure(state="normal")
+            if isinstance(result, Exception):
+                messagebox.showerror("오류", f"프로파일러 {action} 실패: {result}")
+                return
+            self.diag_profiling = action == "start"
+            self.diag_profile_button.configure(text="프로파일 정지" if self.diag_profiling else "프로파일 시작")
+            if not self.diag_profiling:
+                self.diag_collapsed = result
+                self.show_profile(result)
+        self.run_in_background(lambda: self.profiler_call(action), done)
+
+    def show_profile(self, collapsed):
+        import diagnostics
+        lines = [f"{'자체':>8} {'포함':>8}  함수 (샘플 수)"]
+        lines += [f"{own:>8,} {total:>8,}  {name}" for name, own, total in diagnostics.top_functions(collapsed)]
+        self.diag_profile_text.delete("1.0", "end")
+        self.diag_profile_text.insert("1.0", "\n".join(lines))
+        self.diag_save_button.configure(state="normal" if collapsed else "disabled")
+
+    def save_profile(self):
+        path = filedialog.asksaveasfilename(parent=self, defaultextension=".txt", initialfile="profile.txt",
+                                            filetypes=[("collapsed stacks (flamegraph / speedscope)", "*.txt")])
+        if not path: return
+        try:
+            with open(path, "w", encoding="utf-8") as f:
+                f.write(self.diag_collapsed)
+        except OSError as e:
+            messagebox.showerror("오류", f"저장 실패: {e}")